@@ -0,0 +1,51 @@
+import argparse
+import timeit
+
+from rxgrpc import chain, mappers
+from rxgrpc.thread_pool import _GRPCInvocation
+from test.proto import test_pb2
+
+_REQUEST = test_pb2.TestRequest(message='message0')
+
+
+def _new_invocation() -> _GRPCInvocation:
+    return _GRPCInvocation(None, None, None, None, lambda: _REQUEST, (), {})
+
+
+def _stages(n: int):
+    return [mappers.grpc_invocation_map(lambda m: m) if i % 2 else mappers.grpc_invocation_filter(lambda m: True)
+            for i in range(n)]
+
+
+def _per_operator(n: int):
+    stages = _stages(n)
+
+    def _f():
+        g = _new_invocation()
+        for stage in stages:
+            g = stage(g)
+        return g.input_message()
+    return _f
+
+
+def _fused(n: int):
+    compiled = chain.OperatorChain(
+        chain.Stage.map(lambda m: m) if i % 2 else chain.Stage.filter(lambda m: True) for i in range(n))
+
+    def _f():
+        return _new_invocation().compose(compiled).input_message()
+    return _f
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Per-request cost of per-operator vs fused invocation chains')
+    parser.add_argument('--number', type=int, default=100000)
+    args = parser.parse_args()
+    for n in (1, 5, 20):
+        for name, factory in (('per-operator', _per_operator), ('fused', _fused)):
+            seconds = timeit.timeit(factory(n), number=args.number)
+            print('{:>2} stages {:<13} {:>8.3f} us/request'.format(n, name, seconds / args.number * 1e6))
+
+
+if __name__ == '__main__':
+    main()
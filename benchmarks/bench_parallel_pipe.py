@@ -0,0 +1,72 @@
+import argparse
+import time
+from concurrent import futures
+
+import grpc
+
+from rxgrpc import server, operators
+from test.proto import test_pb2, test_pb2_grpc
+
+_METHOD = '/rxgrpc.test.TestService/GetOneToOne'
+
+
+class _Servicer(test_pb2_grpc.TestServiceServicer):
+    def __init__(self, servicer_delay: float):
+        self._servicer_delay = servicer_delay
+
+    def GetOneToOne(self, request: test_pb2.TestRequest, context):
+        time.sleep(self._servicer_delay)
+        return test_pb2.TestResponse(message='response: {}'.format(request.message))
+
+
+def _transform_message(m: test_pb2.TestRequest) -> test_pb2.TestRequest:
+    return test_pb2.TestRequest(message='TRANSFORMED {}'.format(m.message))
+
+
+def _run(mode: str, workers: int, clients: int, duration: float, servicer_delay: float, port: int) -> float:
+    if mode == 'serial':
+        # Same shape as the former single-thread pipe: one invocation of the method at a time.
+        s = server.create_server(test_pb2, workers, method_quotas={_METHOD: 1})
+        s.grpc_pipe(operators.map(_transform_message), method_name=_METHOD)
+    else:
+        s = server.create_server(test_pb2, workers)
+        s.grpc_pipe(
+            operators.map(_transform_message), method_name=_METHOD,
+            parallelism=workers, ordered=mode == 'ordered')
+    test_pb2_grpc.add_TestServiceServicer_to_server(_Servicer(servicer_delay), s.server)
+    s.add_insecure_port('[::]:{}'.format(port))
+    s.start()
+    try:
+        stub = test_pb2_grpc.TestServiceStub(grpc.insecure_channel('localhost:{}'.format(port)))
+        stub.GetOneToOne(test_pb2.TestRequest(message='warmup'))
+        deadline = time.monotonic() + duration
+
+        def _client() -> int:
+            calls = 0
+            while time.monotonic() < deadline:
+                stub.GetOneToOne(test_pb2.TestRequest(message='message{}'.format(calls)))
+                calls += 1
+            return calls
+
+        with futures.ThreadPoolExecutor(clients) as executor:
+            total = sum(executor.map(lambda _: _client(), range(clients)))
+        return total / duration
+    finally:
+        s.stop(None)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='RPS of a mapped unary method, serial vs parallel pipe')
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=5.0)
+    parser.add_argument('--servicer-delay', type=float, default=0.001)
+    parser.add_argument('--port', type=int, default=50061)
+    args = parser.parse_args()
+    for mode in ('serial', 'ordered', 'unordered'):
+        rps = _run(mode, args.workers, args.clients, args.duration, args.servicer_delay, args.port)
+        print('{:<10} {:>10.1f} rps'.format(mode, rps))
+
+
+if __name__ == '__main__':
+    main()
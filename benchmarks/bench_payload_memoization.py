@@ -0,0 +1,54 @@
+import argparse
+import time
+
+from rxgrpc import operators
+from rxgrpc.thread_pool import _GRPCInvocation
+from test.proto import test_pb2
+
+# A filter, a mapper and run() each read the request of a typical piped unary call.
+_READS_PER_RPC = 3
+
+
+def _serialized_request(size: int) -> bytes:
+    return test_pb2.TestRequest(message='x' * size).SerializeToString()
+
+
+def _cpu_per_rpc(f, number: int) -> float:
+    start = time.process_time()
+    for _ in range(number):
+        f()
+    return (time.process_time() - start) / number
+
+
+def _per_read(serialized: bytes):
+    def _f():
+        for _ in range(_READS_PER_RPC):
+            test_pb2.TestRequest.FromString(serialized)
+    return _f
+
+
+def _memoized(serialized: bytes):
+    chain = operators.map(lambda m: m).chain
+
+    def _f():
+        g = _GRPCInvocation(None, None, None, None, lambda: test_pb2.TestRequest.FromString(serialized), (), {})
+        g = g.compose(chain)
+        for _ in range(_READS_PER_RPC):
+            g.input_message()
+    return _f
+
+
+def main():
+    parser = argparse.ArgumentParser(description='CPU per RPC spent deserializing the request')
+    parser.add_argument('--number', type=int, default=2000)
+    args = parser.parse_args()
+    for label, size in (('1KB', 1024), ('1MB', 1024 * 1024)):
+        serialized = _serialized_request(size)
+        number = args.number if size < 1024 * 1024 else max(1, args.number // 100)
+        for name, factory in (('deserialize per read', _per_read), ('memoized', _memoized)):
+            seconds = _cpu_per_rpc(factory(serialized), number)
+            print('{:<4} {:<21} {:>10.2f} us CPU/RPC'.format(label, name, seconds * 1e6))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,152 @@
+import argparse
+import multiprocessing
+import os
+import resource
+import time
+from concurrent import futures
+
+import grpc
+from rx import operators as rx_operators
+
+from rxgrpc import server, mappers
+from test.proto import test_pb2, test_pb2_grpc
+
+_SHAPES = ('unary', 'server_streaming', 'client_streaming', 'bidi')
+_METHODS = {
+    'unary': '/rxgrpc.test.TestService/GetOneToOne',
+    'server_streaming': '/rxgrpc.test.TestService/GetOneToStream',
+    'client_streaming': '/rxgrpc.test.TestService/GetStreamToOne',
+    'bidi': '/rxgrpc.test.TestService/GetStreamToStream',
+}
+
+
+class _Servicer(test_pb2_grpc.TestServiceServicer):
+    def __init__(self, stream_length: int):
+        self._stream_length = stream_length
+
+    def GetOneToOne(self, request, context):
+        return test_pb2.TestResponse(message=request.message)
+
+    def GetOneToStream(self, request, context):
+        for _ in range(self._stream_length):
+            yield test_pb2.TestResponse(message=request.message)
+
+    def GetStreamToOne(self, request_iterator, context):
+        return test_pb2.TestResponse(message=str(sum(1 for _ in request_iterator)))
+
+    def GetStreamToStream(self, request_iterator, context):
+        for request in request_iterator:
+            yield test_pb2.TestResponse(message=request.message)
+
+
+def _identity(m):
+    return m
+
+
+def _operator():
+    # rxgrpc's own operators would be fused into a single stage, plain Rx stages keep every operator a step of its own.
+    return rx_operators.map(mappers.grpc_invocation_map(_identity))
+
+
+def _start_server(mode: str, workers: int, stream_length: int, port: int):
+    # mode is 'grpc' for a plain grpc server, otherwise the number of operators piped on every method.
+    if mode == 'grpc':
+        s = grpc.server(futures.ThreadPoolExecutor(workers))
+        test_pb2_grpc.add_TestServiceServicer_to_server(_Servicer(stream_length), s)
+        s.add_insecure_port('[::]:{}'.format(port))
+        s.start()
+        return lambda: s.stop(None).wait()
+    s = server.create_server(test_pb2, workers)
+    test_pb2_grpc.add_TestServiceServicer_to_server(_Servicer(stream_length), s.server)
+    for method_name in _METHODS.values():
+        if int(mode):
+            s.grpc_pipe(*(_operator() for _ in range(int(mode))), method_name=method_name)
+    s.add_insecure_port('[::]:{}'.format(port))
+    s.start()
+    return lambda: s.stop(None).wait()
+
+
+def _caller(stub: test_pb2_grpc.TestServiceStub, shape: str, stream_length: int):
+    request = test_pb2.TestRequest(message='x' * 32)
+    if shape == 'unary':
+        return lambda: stub.GetOneToOne(request)
+    if shape == 'server_streaming':
+        return lambda: sum(1 for _ in stub.GetOneToStream(request))
+    requests = [request] * stream_length
+    if shape == 'client_streaming':
+        return lambda: stub.GetStreamToOne(iter(requests))
+    return lambda: sum(1 for _ in stub.GetStreamToStream(iter(requests)))
+
+
+def _rss_mib() -> float:
+    # Client and server share the run's process, so this is the footprint of both.
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 2 ** 10
+
+
+def _percentile(latencies, q: float) -> float:
+    return latencies[min(len(latencies) - 1, int(q * len(latencies)))]
+
+
+def _run(mode: str, shape: str, args) -> dict:
+    stop = _start_server(mode, args.workers, args.stream_length, args.port)
+    channel = grpc.insecure_channel('localhost:{}'.format(args.port))
+    try:
+        call = _caller(test_pb2_grpc.TestServiceStub(channel), shape, args.stream_length)
+        for _ in range(args.warmup):
+            call()
+        deadline = time.monotonic() + args.duration
+
+        def _client():
+            latencies = []
+            while time.monotonic() < deadline:
+                start = time.perf_counter()
+                call()
+                latencies.append(time.perf_counter() - start)
+            return latencies
+
+        start = time.monotonic()
+        with futures.ThreadPoolExecutor(args.clients) as executor:
+            latencies = sorted(l for ls in executor.map(lambda _: _client(), range(args.clients)) for l in ls)
+        elapsed = time.monotonic() - start
+        return {
+            'rps': len(latencies) / elapsed,
+            'p50': _percentile(latencies, 0.5),
+            'p99': _percentile(latencies, 0.99),
+            'rss': _rss_mib(),
+        }
+    finally:
+        channel.close()
+        stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='RPS, latency and RSS of every RPC shape: plain grpc against rxgrpc with N operators')
+    parser.add_argument('--shapes', nargs='+', choices=_SHAPES, default=list(_SHAPES))
+    parser.add_argument('--operators', type=int, nargs='*', default=[0, 1, 5, 20])
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=5.0)
+    parser.add_argument('--warmup', type=int, default=100)
+    parser.add_argument('--stream-length', type=int, default=10)
+    parser.add_argument('--port', type=int, default=50062)
+    args = parser.parse_args()
+    modes = ['grpc'] + [str(n) for n in args.operators]
+    print('{:<17} {:<10} {:>10} {:>10} {:>10} {:>9}'.format('shape', 'server', 'rps', 'p50 ms', 'p99 ms', 'rss MiB'))
+    # Every run gets a fresh interpreter, RSS only grows within a process and would add up over the runs.
+    context = multiprocessing.get_context('spawn')
+    for shape in args.shapes:
+        for mode in modes:
+            with futures.ProcessPoolExecutor(1, mp_context=context) as executor:
+                result = executor.submit(_run, mode, shape, args).result()
+            print('{:<17} {:<10} {:>10.1f} {:>10.3f} {:>10.3f} {:>9.1f}'.format(
+                shape, mode if mode == 'grpc' else 'rx+{}'.format(mode),
+                result['rps'], result['p50'] * 1e3, result['p99'] * 1e3, result['rss']))
+
+
+if __name__ == '__main__':
+    main()
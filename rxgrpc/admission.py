@@ -0,0 +1,99 @@
+import collections
+import enum
+import threading
+import time
+import typing
+
+_K = typing.TypeVar('_K')
+_V = typing.TypeVar('_V')
+
+
+class OverflowPolicy(enum.Enum):
+    REJECT = 'reject'
+    BLOCK = 'block'
+    DROP_OLDEST = 'drop_oldest'
+
+
+class AdmissionControl:
+    def __init__(
+            self, max_pending: typing.Optional[int] = None,
+            max_pending_per_method: typing.Union[None, int, typing.Dict[str, int]] = None,
+            policy: OverflowPolicy = OverflowPolicy.REJECT,
+            block_timeout: typing.Optional[float] = 1.0):
+        if max_pending is not None and max_pending <= 0:
+            raise ValueError('max_pending must be greater than 0')
+        limits = max_pending_per_method.values() if isinstance(max_pending_per_method, dict) \
+            else [max_pending_per_method]
+        if any(limit is not None and limit <= 0 for limit in limits):
+            raise ValueError('max_pending_per_method must be greater than 0')
+        self.max_pending = max_pending
+        self.max_pending_per_method = max_pending_per_method
+        self.policy = policy
+        self.block_timeout = block_timeout
+        self._condition = threading.Condition()
+        self._pending = collections.OrderedDict()  # type: typing.Dict[typing.Any, typing.Tuple[str, typing.Any]]
+        self._pending_by_method = {}  # type: typing.Dict[str, typing.Dict[typing.Any, typing.Any]]
+        self._rejected = collections.Counter()  # type: typing.Dict[str, int]
+
+    def method_limit(self, method_name: str) -> typing.Optional[int]:
+        if isinstance(self.max_pending_per_method, dict):
+            return self.max_pending_per_method.get(method_name)
+        return self.max_pending_per_method
+
+    def admit(self, method_name: str, key: _K, item: _V) -> typing.Tuple[bool, typing.List[_V]]:
+        with self._condition:
+            method_pending = self._pending_by_method.setdefault(method_name, collections.OrderedDict())
+            method_limit = self.method_limit(method_name)
+            shed = []
+            if self.policy is OverflowPolicy.BLOCK:
+                deadline = None if self.block_timeout is None else time.monotonic() + self.block_timeout
+                while self._full(method_pending, method_limit):
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        self._rejected[method_name] += 1
+                        return False, shed
+                    self._condition.wait(remaining)
+            elif self.policy is OverflowPolicy.DROP_OLDEST:
+                while self._full(method_pending, method_limit):
+                    if method_limit is not None and len(method_pending) >= method_limit:
+                        oldest_key = next(iter(method_pending))
+                    else:
+                        oldest_key = next(iter(self._pending))
+                    oldest_method, oldest = self._remove(oldest_key)
+                    self._rejected[oldest_method] += 1
+                    shed.append(oldest)
+            elif self._full(method_pending, method_limit):
+                self._rejected[method_name] += 1
+                return False, shed
+            self._pending[key] = method_name, item
+            method_pending[key] = item
+            return True, shed
+
+    def release(self, key: _K) -> bool:
+        with self._condition:
+            if key not in self._pending:
+                return False
+            self._remove(key)
+            self._condition.notify_all()
+            return True
+
+    def depth(self, method_name: typing.Optional[str] = None) -> int:
+        with self._condition:
+            if method_name is None:
+                return len(self._pending)
+            return len(self._pending_by_method.get(method_name, ()))
+
+    def rejected(self, method_name: typing.Optional[str] = None) -> int:
+        with self._condition:
+            if method_name is None:
+                return sum(self._rejected.values())
+            return self._rejected[method_name]
+
+    def _full(self, method_pending: typing.Dict, method_limit: typing.Optional[int]) -> bool:
+        return (method_limit is not None and len(method_pending) >= method_limit) or \
+            (self.max_pending is not None and len(self._pending) >= self.max_pending)
+
+    def _remove(self, key: _K) -> typing.Tuple[str, typing.Any]:
+        method_name, item = self._pending.pop(key)
+        del self._pending_by_method[method_name][key]
+        return method_name, item
@@ -0,0 +1,277 @@
+import asyncio
+import inspect
+import logging
+import typing
+
+import grpc
+from grpc import aio as grpc_aio
+from rx import Observable
+from rx.core import Observer
+from rx.core.abc import Disposable
+
+from rxgrpc import tracing
+from rxgrpc.chain import OperatorChain, EMPTY_CHAIN, DROPPED, Stage
+from rxgrpc.completion import Completion
+from rxgrpc.server import GRPCObservableServer
+from rxgrpc.thread_pool import GRPCInvocation, _ReactiveMethods, _MethodHandle, _log, _through_response_chain, \
+    _serialized, _aborting, _FILTERED_OUT
+
+_LOGGER = logging.getLogger('rxgrpc.aio')
+_TRACER = tracing.get_tracer(_LOGGER)
+
+
+class _AioInvocationState(Completion):
+    __slots__ = ('started', 'request_streaming', 'response_streaming', 'method_name')
+
+    def __init__(
+            self, started: asyncio.Future, request_streaming: bool, response_streaming: bool, method_name: str = ''):
+        super().__init__()
+        self.started = started
+        self.method_name = method_name
+        self.request_streaming = request_streaming
+        self.response_streaming = response_streaming
+
+
+class _AioGRPCInvocation(GRPCInvocation):
+    __slots__ = ('behaviour', 'request', 'context', '_chain', '_invocation_state')
+
+    def __init__(
+            self, behaviour, request, context,
+            invocation_state: _AioInvocationState, chain: OperatorChain = EMPTY_CHAIN):
+        self.behaviour = behaviour
+        self.request = request
+        self.context = context
+        self._chain = chain
+        self._invocation_state = invocation_state
+
+    def compose(self, chain: OperatorChain) -> GRPCInvocation:
+        return _AioGRPCInvocation(
+            self.behaviour, self.request, self.context, self._invocation_state, chain=self._chain.then(chain))
+
+    def with_behaviour(self, behaviour: typing.Callable) -> GRPCInvocation:
+        return _AioGRPCInvocation(behaviour, self.request, self.context, self._invocation_state, chain=self._chain)
+
+    def compose_response(self, chain: OperatorChain) -> GRPCInvocation:
+        return self.with_behaviour(_through_response_chain(self.behaviour, chain, self.response_streaming))
+
+    @property
+    def response_serializer(self) -> typing.Optional[typing.Callable[[typing.Any], bytes]]:
+        # grpc.aio binds the serializers to the method handler, not to a single call, so operators working on
+        # serialized requests or responses leave aio invocations alone.
+        return None
+
+    def map(self, transformer: typing.Callable[[typing.Any], typing.Any]) -> GRPCInvocation:
+        return self.compose(OperatorChain((Stage.map(transformer), )))
+
+    def filter(self, filter_function: typing.Callable[[typing.Any], bool]) -> GRPCInvocation:
+        return self.compose(OperatorChain((Stage.filter(filter_function), )))
+
+    def run(self):
+        if _TRACER.enabled:
+            _TRACER.trace('release', self._invocation_state)
+        started = self._invocation_state.started
+        if not started.done():
+            started.set_result(self)
+
+    def reject(self, code: grpc.StatusCode, details: str):
+        # Nothing queues on grpc.aio, the call is answered on the loop as soon as it starts.
+        rejected = self.with_behaviour(_aborting(code, details, self.response_streaming))
+        self._invocation_state.started.get_loop().call_soon_threadsafe(rejected.run)
+
+    def defer(self, fn: typing.Callable[[GRPCInvocation], typing.Any]):
+        # The request has already been received, nothing can block.
+        fn(self)
+
+    def add_done_callback(self, done_callback):
+        self._invocation_state.add_done_callback(done_callback, self)
+
+    @property
+    def result(self):
+        return self._invocation_state.result
+
+    @property
+    def method_name(self) -> str:
+        return self._invocation_state.method_name
+
+    def invocation_metadata(self) -> typing.Sequence[typing.Tuple[str, typing.Any]]:
+        return self.context.invocation_metadata() or ()
+
+    @property
+    def request_streaming(self) -> bool:
+        return self._invocation_state.request_streaming
+
+    @property
+    def response_streaming(self) -> bool:
+        return self._invocation_state.response_streaming
+
+    def input_message(self) -> typing.Any:
+        if not self._chain:
+            return self.request
+        if self.request_streaming:
+            return self._chain.apply_aiter(self.request)
+        value = self._chain.apply(self.request)
+        return None if value is DROPPED else value
+
+    def request_bytes(self) -> typing.Optional[bytes]:
+        return None if self.request_streaming else _serialized(self.request)
+
+    async def call(self) -> typing.Any:
+        # Failed, aborted and cancelled calls complete too, with no result.
+        result = None
+        try:
+            argument = self.input_message()
+            if argument is None:
+                await self.context.abort(_FILTERED_OUT, 'Request filtered out')
+            result = self.behaviour(argument, self.context)
+            if inspect.isawaitable(result):
+                result = await result
+            return result
+        finally:
+            self._complete(result)
+
+    async def call_streaming(self) -> typing.AsyncIterator:
+        try:
+            argument = self.input_message()
+            if argument is None:
+                await self.context.abort(_FILTERED_OUT, 'Request filtered out')
+            responses = self.behaviour(argument, self.context)
+            if hasattr(responses, '__aiter__'):
+                async for response in responses:
+                    yield response
+            else:
+                for response in responses:
+                    yield response
+        finally:
+            self._complete(None)
+
+    def _complete(self, result):
+        self._invocation_state.complete(result, self)
+
+
+class _ReactiveGenericRpcHandler(grpc.GenericRpcHandler):
+    def __init__(self, bridge: '_ReactiveAioBridge', delegate: grpc.GenericRpcHandler):
+        self._bridge = bridge
+        self._delegate = delegate
+        self._wrapped = {}  # type: typing.Dict[str, typing.Tuple[grpc.RpcMethodHandler, grpc.RpcMethodHandler]]
+
+    def service(self, handler_call_details: grpc.HandlerCallDetails) -> typing.Optional[grpc.RpcMethodHandler]:
+        method_handler = self._delegate.service(handler_call_details)
+        if method_handler is None:
+            return None
+        cached = self._wrapped.get(handler_call_details.method)
+        if cached and cached[0] is method_handler:
+            return cached[1]
+        handle = self._bridge.handle(handler_call_details.method)
+        if handle is None:
+            return method_handler
+        wrapped = self._bridge.wrap_method_handler(handle, method_handler)
+        self._wrapped[handler_call_details.method] = method_handler, wrapped
+        return wrapped
+
+
+class _ReactiveAioBridge(_ReactiveMethods):
+    def __init__(self, protobuf_module):
+        super().__init__(protobuf_module)
+        self._loop = None  # type: typing.Optional[asyncio.AbstractEventLoop]
+        # Only touched on the loop.
+        self._in_pipe = {}  # type: typing.Dict[str, int]
+
+    def bind(self, loop: asyncio.AbstractEventLoop):
+        self._loop = loop
+
+    def handle(self, method_name: str) -> typing.Optional[_MethodHandle]:
+        return self._handles_by_name.get(method_name)
+
+    def _subscribe(self, handle: _MethodHandle, observable: Observable) -> Disposable:
+        if self._loop is None:
+            raise ValueError('The bridge must be bound to an event loop before subscribing')
+        loop = self._loop
+        # Parallel pipes and operators emit from their own threads, only call_soon_threadsafe wakes the loop up.
+        return observable.subscribe(
+            Observer(
+                on_next=lambda grpc_invocation: loop.call_soon_threadsafe(grpc_invocation.run),
+                on_error=lambda e: _log('Error: ', e)
+            )
+        )
+
+    def queue_depth(self, method_name: typing.Optional[str] = None) -> int:
+        # grpc.aio queues nothing for rxgrpc, calls only wait while their invocation is in the pipe.
+        if method_name is None:
+            return sum(self._in_pipe.values())
+        return self._in_pipe.get(method_name, 0)
+
+    # noinspection PyUnusedLocal
+    def expired(self, method_name: typing.Optional[str] = None) -> int:
+        # Invocations run on the loop as soon as they leave the pipe, none is shed for its deadline.
+        return 0
+
+    async def _start(self, handle: _MethodHandle, behaviour, request, context) -> _AioGRPCInvocation:
+        invocation_state = _AioInvocationState(
+            asyncio.get_event_loop().create_future(), handle.client_streaming, handle.server_streaming, handle.name)
+        grpc_invocation = _AioGRPCInvocation(behaviour, request, context, invocation_state)
+        in_pipe = self._in_pipe
+        in_pipe[handle.name] = in_pipe.get(handle.name, 0) + 1
+        try:
+            handle.dispatch(grpc_invocation)
+            return await invocation_state.started
+        except asyncio.CancelledError:
+            # The client went away while the call was still in the pipe, which will never run it.
+            grpc_invocation._complete(None)
+            raise
+        finally:
+            in_pipe[handle.name] -= 1
+
+    def wrap_method_handler(
+            self, handle: _MethodHandle, method_handler: grpc.RpcMethodHandler) -> grpc.RpcMethodHandler:
+        if method_handler.response_streaming:
+            behaviour = method_handler.stream_stream if method_handler.request_streaming \
+                else method_handler.unary_stream
+
+            async def _behaviour(request, context):
+                invocation = await self._start(handle, behaviour, request, context)
+                responses = invocation.call_streaming()
+                try:
+                    async for response in responses:
+                        yield response
+                finally:
+                    # Closing the stream early completes the invocation now rather than when it is collected.
+                    await responses.aclose()
+
+            factory = grpc.stream_stream_rpc_method_handler if method_handler.request_streaming \
+                else grpc.unary_stream_rpc_method_handler
+        else:
+            behaviour = method_handler.stream_unary if method_handler.request_streaming \
+                else method_handler.unary_unary
+
+            async def _behaviour(request, context):
+                invocation = await self._start(handle, behaviour, request, context)
+                return await invocation.call()
+
+            factory = grpc.stream_unary_rpc_method_handler if method_handler.request_streaming \
+                else grpc.unary_unary_rpc_method_handler
+        return factory(
+            _behaviour,
+            request_deserializer=method_handler.request_deserializer,
+            response_serializer=method_handler.response_serializer)
+
+
+class GRPCObservableAioServer(GRPCObservableServer):
+    def add_generic_rpc_handlers(self, generic_rpc_handlers):
+        self.server.add_generic_rpc_handlers(tuple(
+            _ReactiveGenericRpcHandler(self._grpc_observable_delegate, h) for h in generic_rpc_handlers
+        ))
+
+    async def start(self):
+        self._grpc_observable_delegate.bind(asyncio.get_event_loop())
+        self.grpc_subscribe()
+        await self.server.start()
+
+    async def stop(self, grace_time_secs: typing.Optional[float] = None):
+        await self.server.stop(grace_time_secs)
+
+    async def wait_for_termination(self, timeout: typing.Optional[float] = None) -> bool:
+        return await self.server.wait_for_termination(timeout)
+
+
+def create_server(protobuf_module, **server_kwargs) -> GRPCObservableAioServer:
+    return GRPCObservableAioServer(grpc_aio.server(**server_kwargs), _ReactiveAioBridge(protobuf_module))
@@ -0,0 +1,183 @@
+import asyncio
+import logging
+import threading
+import time
+import typing
+
+from rx import Observable
+
+from rxgrpc.deferred import on_workers, Emit
+from rxgrpc.thread_pool import GRPCInvocation
+
+_LOGGER = logging.getLogger('rxgrpc.batching')
+
+T1 = typing.TypeVar('T1')
+T2 = typing.TypeVar('T2')
+
+BatchHandler = typing.Callable[[typing.List[T1]], typing.Sequence[T2]]
+
+
+class _Batch:
+    __slots__ = ('requests', 'invocations', 'emits', 'responses', 'error', 'deadline', 'waiters')
+
+    def __init__(self, deadline: float = 0.0):
+        self.requests = []  # type: typing.List[typing.Any]
+        self.invocations = []  # type: typing.List[GRPCInvocation]
+        # A batcher may be piped on several methods, each call is passed on by its own subscription.
+        self.emits = []  # type: typing.List[Emit]
+        self.responses = None  # type: typing.Optional[typing.Sequence[typing.Any]]
+        self.error = None  # type: typing.Optional[Exception]
+        self.deadline = deadline
+        self.waiters = []  # type: typing.List[asyncio.Future]
+
+
+class Batcher:
+    # Calls join the open batch from the worker that received their request and are then set aside, so a batch
+    # holds no worker while it fills up. The worker filling it, or one the batch is handed to once max_latency has
+    # passed, runs the handler and passes every call on with its response.
+    def __init__(self, handler: BatchHandler, max_size: int, max_latency: float):
+        if max_size <= 0:
+            raise ValueError('max_size must be greater than 0')
+        if max_latency <= 0:
+            raise ValueError('max_latency must be greater than 0')
+        self.handler = handler
+        self.max_size = max_size
+        self.max_latency = max_latency
+        self._condition = threading.Condition()
+        self._open = None  # type: typing.Optional[_Batch]
+        self._open_async = None  # type: typing.Optional[_Batch]
+        self._closer = None  # type: typing.Optional[threading.Thread]
+
+    def add(self, g: GRPCInvocation, request, emit: Emit):
+        with self._condition:
+            batch = self._open
+            if batch is None:
+                batch = self._open = _Batch(time.monotonic() + self.max_latency)
+                self._start_closer()
+                self._condition.notify()
+            batch.requests.append(request)
+            batch.invocations.append(g)
+            batch.emits.append(emit)
+            if len(batch.requests) < self.max_size:
+                return
+            self._open = None
+        self._flush(batch)
+
+    def _start_closer(self):
+        # One thread per batcher closes late batches; it only hands them to a worker, never runs the handler.
+        if self._closer is None:
+            self._closer = threading.Thread(target=self._close_late_batches, name='rxgrpc-batcher', daemon=True)
+            self._closer.start()
+
+    def _close_late_batches(self):
+        while True:
+            with self._condition:
+                batch = self._open
+                if batch is None:
+                    self._condition.wait()
+                    continue
+                remaining = batch.deadline - time.monotonic()
+                if remaining > 0:
+                    self._condition.wait(remaining)
+                    continue
+                self._open = None
+            try:
+                batch.invocations[0].defer(lambda _, batch=batch: self._flush(batch))
+            except Exception:
+                _LOGGER.exception('Error handing a batch over to the workers')
+
+    def _flush(self, batch: _Batch):
+        self._run(batch)
+        for index, (g, emit) in enumerate(zip(batch.invocations, batch.emits)):
+            emit(g.with_behaviour(_answering(batch, index)))
+
+    async def call_async(self, request):
+        # On grpc.aio nothing may block: a timer on the loop closes the batch and the handler runs in its executor.
+        loop = asyncio.get_event_loop()
+        with self._condition:
+            batch = self._open_async
+            if batch is None:
+                batch = self._open_async = _Batch()
+                loop.call_later(self.max_latency, self._flush_async, batch, loop)
+            index = len(batch.requests)
+            batch.requests.append(request)
+            waiter = loop.create_future()
+            batch.waiters.append(waiter)
+            if len(batch.requests) == self.max_size:
+                # Closed right away, calls arriving before the flush runs start the next batch.
+                self._open_async = None
+                loop.call_soon(self._run_async, batch, loop)
+        await waiter
+        return self._response(batch, index)
+
+    def _flush_async(self, batch: _Batch, loop: asyncio.AbstractEventLoop):
+        with self._condition:
+            if self._open_async is not batch:
+                return
+            self._open_async = None
+        self._run_async(batch, loop)
+
+    def _run_async(self, batch: _Batch, loop: asyncio.AbstractEventLoop):
+        def _answer(_):
+            for waiter in batch.waiters:
+                if not waiter.done():
+                    waiter.set_result(None)
+
+        loop.run_in_executor(None, self._run, batch).add_done_callback(_answer)
+
+    def _run(self, batch: _Batch):
+        try:
+            responses = self.handler(batch.requests)
+            if len(responses) != len(batch.requests):
+                raise ValueError('Batch handler returned {} responses for {} requests'.format(
+                    len(responses), len(batch.requests)))
+            batch.responses = responses
+        except Exception as e:
+            _LOGGER.exception('Error running batch handler')
+            batch.error = e
+
+    @staticmethod
+    def _response(batch: _Batch, index: int):
+        if batch.error is not None:
+            raise batch.error
+        return batch.responses[index]
+
+
+def _answering(batch: _Batch, index: int) -> typing.Callable:
+    # noinspection PyUnusedLocal
+    def _behaviour(request, context):
+        return Batcher._response(batch, index)
+    return _behaviour
+
+
+def _batched_async(batcher: Batcher) -> typing.Callable:
+    # noinspection PyUnusedLocal
+    def _behaviour(request, context):
+        return batcher.call_async(request)
+    return _behaviour
+
+
+class BatchOperator:
+    __slots__ = ('batcher', )
+
+    def __init__(self, batcher: Batcher):
+        self.batcher = batcher
+
+    def _add(self, g: GRPCInvocation, emit: Emit):
+        # grpc.aio runs this on its loop, where calls wait without holding a thread anyway.
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            pass
+        else:
+            emit(g.with_behaviour(_batched_async(self.batcher)))
+            return
+        request = g.input_message()
+        if request is None:
+            # Malformed or filtered out, the call is answered without the handler.
+            emit(g)
+            return
+        self.batcher.add(g, request, emit)
+
+    def __call__(self, source: Observable) -> Observable:
+        return on_workers(self._add)(source)
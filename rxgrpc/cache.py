@@ -0,0 +1,183 @@
+import collections
+import logging
+import threading
+import time
+import typing
+
+import grpc
+from rx import Observable
+
+from rxgrpc.deferred import on_workers, Emit
+from rxgrpc.thread_pool import GRPCInvocation
+
+_LOGGER = logging.getLogger('rxgrpc.cache')
+
+
+class _Flight:
+    __slots__ = ('value', 'succeeded', 'followers')
+
+    def __init__(self):
+        self.value = None  # type: typing.Optional[bytes]
+        self.succeeded = False
+        self.followers = []  # type: typing.List[typing.Callable[[_Flight], None]]
+
+
+class ResponseCache:
+    def __init__(
+            self, max_entries: int, ttl: typing.Optional[float] = None,
+            clock: typing.Callable[[], float] = time.monotonic):
+        if max_entries <= 0:
+            raise ValueError('max_entries must be greater than 0')
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries = collections.OrderedDict()  # type: typing.Dict[typing.Hashable, typing.Tuple[float, bytes]]
+        self._in_flight = {}  # type: typing.Dict[typing.Hashable, _Flight]
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def join(
+            self, key: typing.Hashable, on_landed: typing.Callable[[_Flight], None]) \
+            -> typing.Tuple[typing.Optional[bytes], typing.Optional[_Flight]]:
+        # The cached value, or the new flight the caller leads and must land. (None, None) when a flight for the key
+        # is already in the air, on_landed is then called with it once it lands.
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > self._clock():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1], None
+                del self._entries[key]
+            flight = self._in_flight.get(key)
+            if flight is None:
+                flight = self._in_flight[key] = _Flight()
+                self.misses += 1
+                return None, flight
+            flight.followers.append(on_landed)
+            self.coalesced += 1
+            return None, None
+
+    def land(self, key: typing.Hashable, flight: _Flight):
+        with self._lock:
+            del self._in_flight[key]
+            if flight.succeeded and flight.value is not None:
+                self._store(key, flight.value)
+        for on_landed in flight.followers:
+            try:
+                on_landed(flight)
+            except Exception:
+                _LOGGER.exception('Error handing a cached response over')
+
+    def get_or_compute(
+            self, key: typing.Hashable,
+            compute: typing.Callable[[], typing.Optional[bytes]]) -> typing.Optional[bytes]:
+        # Followers wait for their leader here. CacheOperator sets them aside instead, so that they hold no worker.
+        landed = []  # type: typing.List[_Flight]
+        ready = threading.Event()
+
+        def _on_landed(leader: _Flight):
+            landed.append(leader)
+            ready.set()
+
+        value, flight = self.join(key, _on_landed)
+        if value is not None:
+            return value
+        if flight is None:
+            ready.wait()
+            if landed[0].succeeded:
+                return landed[0].value
+            # The leader's failure belongs to its own call, so this one gets its own attempt.
+            return compute()
+        try:
+            flight.value = compute()
+            flight.succeeded = True
+        finally:
+            self.land(key, flight)
+        return flight.value
+
+    def _store(self, key: typing.Hashable, value: bytes):
+        expires = float('inf') if self.ttl is None else self._clock() + self.ttl
+        self._entries[key] = expires, value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def _identity(d):
+    return d
+
+
+def _serializing(
+        behaviour: typing.Callable, serializer: typing.Callable[[typing.Any], bytes]) -> typing.Callable:
+    def _behaviour(request, context) -> typing.Optional[bytes]:
+        response = behaviour(request, context)
+        return None if response is None else serializer(response)
+    return _behaviour
+
+
+def _cached(value: bytes) -> typing.Callable:
+    # noinspection PyUnusedLocal
+    def _behaviour(request, context) -> bytes:
+        return value
+    return _behaviour
+
+
+def _leading(flight: _Flight, behaviour: typing.Callable) -> typing.Callable:
+    def _behaviour(request, context) -> typing.Optional[bytes]:
+        flight.value = behaviour(request, context)
+        flight.succeeded = True
+        return flight.value
+    return _behaviour
+
+
+def _following(flight: _Flight, behaviour: typing.Callable) -> typing.Callable:
+    def _behaviour(request, context) -> typing.Optional[bytes]:
+        # The leader's failure belongs to its own call, so this one gets its own attempt.
+        return flight.value if flight.succeeded else behaviour(request, context)
+    return _behaviour
+
+
+class CacheOperator:
+    # Keys are looked up on the worker that received the request. Calls waiting for the same key hold no worker,
+    # they are passed on from the done callback of the call computing it.
+    __slots__ = ('cache', 'key_fn')
+
+    def __init__(self, response_cache: ResponseCache, key_fn: typing.Callable[[typing.Any], typing.Hashable]):
+        self.cache = response_cache
+        self.key_fn = key_fn
+
+    def _route(self, g: GRPCInvocation, emit: Emit):
+        serializer = g.response_serializer
+        request = g.input_message() if serializer is not None else None
+        if request is None:
+            emit(g)
+            return
+        try:
+            key = self.key_fn(request)
+        except Exception:
+            _LOGGER.exception('Error computing the cache key')
+            g.reject(grpc.StatusCode.INTERNAL, 'Error computing the cache key')
+            return
+        # Cached responses are stored serialized, so grpc is handed the bytes as they are.
+        g = g.with_behaviour(_serializing(g.behaviour, serializer)).with_response_serializer(_identity)
+        value, flight = self.cache.join(key, lambda landed: emit(g.with_behaviour(_following(landed, g.behaviour))))
+        if value is not None:
+            emit(g.with_behaviour(_cached(value)))
+        elif flight is not None:
+            leader = g.with_behaviour(_leading(flight, g.behaviour))
+            # Failed, rejected and shed leaders complete too, their followers then run on their own.
+            leader.add_done_callback(lambda _: self.cache.land(key, flight))
+            emit(leader)
+
+    def __call__(self, source: Observable) -> Observable:
+        return on_workers(self._route)(source)
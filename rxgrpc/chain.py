@@ -0,0 +1,173 @@
+import typing
+
+from rx import Observable, operators as orig_operators
+
+T1 = typing.TypeVar('T1')
+T2 = typing.TypeVar('T2')
+
+DROPPED = object()
+
+
+def _identity(d):
+    return d
+
+
+class Stage:
+    __slots__ = ('kind', 'fn', 'async_fn')
+
+    MAP = 'map'
+    FILTER = 'filter'
+    STREAM = 'stream'
+
+    def __init__(self, kind: str, fn: typing.Callable, async_fn: typing.Optional[typing.Callable] = None):
+        object.__setattr__(self, 'kind', kind)
+        object.__setattr__(self, 'fn', fn)
+        object.__setattr__(self, 'async_fn', async_fn)
+
+    def __setattr__(self, key, value):
+        raise AttributeError('Stage is immutable')
+
+    @classmethod
+    def map(cls, transformer: typing.Callable[[T1], T2]) -> 'Stage':
+        return cls(cls.MAP, transformer)
+
+    @classmethod
+    def filter(cls, filter_function: typing.Callable[[T1], bool]) -> 'Stage':
+        return cls(cls.FILTER, filter_function)
+
+    @classmethod
+    def stream(
+            cls, transformer: typing.Callable[[typing.Iterator], typing.Iterator],
+            async_transformer: typing.Optional[typing.Callable[[typing.AsyncIterator], typing.AsyncIterator]] = None) \
+            -> 'Stage':
+        return cls(cls.STREAM, transformer, async_transformer)
+
+
+def _compile(stages: typing.Sequence[Stage]) -> typing.Callable[[typing.Any], typing.Any]:
+    steps = tuple((stage.kind is Stage.MAP, stage.fn) for stage in stages if stage.kind is not Stage.STREAM)
+    if not steps:
+        return _identity
+
+    def _apply(value):
+        for is_map, fn in steps:
+            if is_map:
+                value = fn(value)
+            elif not fn(value):
+                return DROPPED
+        return value
+    return _apply
+
+
+def _segments(stages: typing.Tuple[Stage, ...]) -> typing.Tuple[typing.Union[Stage, typing.Callable], ...]:
+    segments = []
+    elements = []
+    for stage in stages:
+        if stage.kind is Stage.STREAM:
+            if elements:
+                segments.append(_compile(elements))
+                elements = []
+            segments.append(stage)
+        else:
+            elements.append(stage)
+    if elements:
+        segments.append(_compile(elements))
+    return tuple(segments)
+
+
+def _apply_elements(apply: typing.Callable, iterator: typing.Iterator) -> typing.Iterator:
+    for element in iterator:
+        value = apply(element)
+        if value is not DROPPED:
+            yield value
+
+
+async def _apply_elements_async(apply: typing.Callable, iterator: typing.AsyncIterator) -> typing.AsyncIterator:
+    async for element in iterator:
+        value = apply(element)
+        if value is not DROPPED:
+            yield value
+
+
+class OperatorChain:
+    __slots__ = ('stages', 'apply', '_segments')
+
+    def __init__(self, stages: typing.Iterable[Stage] = ()):
+        stages = tuple(stages)
+        object.__setattr__(self, 'stages', stages)
+        object.__setattr__(self, 'apply', _compile(stages))
+        object.__setattr__(self, '_segments', _segments(stages))
+
+    def __setattr__(self, key, value):
+        raise AttributeError('OperatorChain is immutable')
+
+    def __bool__(self):
+        return bool(self.stages)
+
+    def __len__(self):
+        return len(self.stages)
+
+    def then(self, other: typing.Union['OperatorChain', Stage]) -> 'OperatorChain':
+        if isinstance(other, Stage):
+            return OperatorChain(self.stages + (other, ))
+        if not self.stages:
+            return other
+        if not other.stages:
+            return self
+        return OperatorChain(self.stages + other.stages)
+
+    def apply_iter(self, iterable: typing.Iterable) -> typing.Iterator:
+        iterator = iter(iterable)
+        for segment in self._segments:
+            if isinstance(segment, Stage):
+                iterator = segment.fn(iterator)
+            else:
+                iterator = _apply_elements(segment, iterator)
+        return iterator
+
+    def apply_aiter(self, iterable: typing.AsyncIterable) -> typing.AsyncIterator:
+        iterator = iterable.__aiter__()
+        for segment in self._segments:
+            if isinstance(segment, Stage):
+                if segment.async_fn is None:
+                    raise TypeError('Stage {} does not support asynchronous streams'.format(segment.fn))
+                iterator = segment.async_fn(iterator)
+            else:
+                iterator = _apply_elements_async(segment, iterator)
+        return iterator
+
+
+EMPTY_CHAIN = OperatorChain()
+
+
+class ChainOperator:
+    __slots__ = ('chain', )
+
+    def __init__(self, chain: OperatorChain):
+        self.chain = chain
+
+    def __call__(self, source: Observable) -> Observable:
+        chain = self.chain
+        return orig_operators.map(lambda g: g.compose(chain))(source)
+
+
+class ResponseChainOperator:
+    __slots__ = ('chain', )
+
+    def __init__(self, chain: OperatorChain):
+        self.chain = chain
+
+    def __call__(self, source: Observable) -> Observable:
+        chain = self.chain
+        return orig_operators.map(lambda g: g.compose_response(chain))(source)
+
+
+def fuse(
+        operators: typing.Sequence[typing.Callable[[Observable], Observable]]) \
+        -> typing.List[typing.Callable[[Observable], Observable]]:
+    result = []
+    for op in operators:
+        if isinstance(op, (ChainOperator, ResponseChainOperator)) and result and type(result[-1]) is type(op):
+            result[-1] = type(op)(result[-1].chain.then(op.chain))
+        else:
+            result.append(op)
+    return result
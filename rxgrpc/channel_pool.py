@@ -0,0 +1,67 @@
+import enum
+import threading
+import typing
+
+import grpc
+
+
+class SelectionPolicy(enum.Enum):
+    ROUND_ROBIN = 'round_robin'
+    LEAST_OUTSTANDING = 'least_outstanding'
+
+
+class ChannelPool:
+    def __init__(
+            self, channels: typing.Sequence[grpc.Channel],
+            policy: SelectionPolicy = SelectionPolicy.ROUND_ROBIN):
+        if not channels:
+            raise ValueError('At least one channel is required')
+        self.channels = tuple(channels)
+        self.policy = policy
+        self._lock = threading.Lock()
+        self._in_flight = [0] * len(self.channels)
+        self._next = 0
+
+    def __len__(self) -> int:
+        return len(self.channels)
+
+    def acquire(self) -> int:
+        with self._lock:
+            size = len(self.channels)
+            index = self._next
+            self._next = (index + 1) % size
+            if self.policy is SelectionPolicy.LEAST_OUTSTANDING:
+                # Starting from the round-robin position spreads ties instead of always picking the first channel.
+                in_flight = self._in_flight
+                index = min(range(index, index + size), key=lambda i: in_flight[i % size]) % size
+            self._in_flight[index] += 1
+            return index
+
+    def release(self, index: int):
+        with self._lock:
+            self._in_flight[index] -= 1
+
+    def in_flight(self, index: typing.Optional[int] = None) -> typing.Union[int, typing.List[int]]:
+        with self._lock:
+            if index is None:
+                return list(self._in_flight)
+            return self._in_flight[index]
+
+    def close(self):
+        for channel in self.channels:
+            channel.close()
+
+
+def insecure_channel_pool(
+        targets: typing.Union[str, typing.Sequence[str]], channels_per_target: int = 1,
+        policy: SelectionPolicy = SelectionPolicy.ROUND_ROBIN,
+        options: typing.Sequence[typing.Tuple[str, typing.Any]] = ()) -> ChannelPool:
+    if channels_per_target <= 0:
+        raise ValueError('channels_per_target must be greater than 0')
+    if isinstance(targets, str):
+        targets = [targets]
+    # grpc shares a connection between channels with identical arguments, a distinct one gives each its own.
+    return ChannelPool([
+        grpc.insecure_channel(target, options=list(options) + [('rxgrpc.channel_index', i)])
+        for target in targets for i in range(channels_per_target)
+    ], policy=policy)
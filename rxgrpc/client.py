@@ -0,0 +1,231 @@
+import logging
+import queue
+import threading
+import typing
+
+import grpc
+import rx
+from rx import Observable, operators as rx_operators
+from rx.concurrency import ThreadPoolScheduler
+from rx.core import Observer
+from rx.core.abc import Scheduler
+from rx.disposable import Disposable, SerialDisposable
+
+from rxgrpc.channel_pool import ChannelPool
+
+_LOGGER = logging.getLogger('rxgrpc.client')
+
+_NEXT, _ERROR, _COMPLETED = range(3)
+
+Requests = typing.Union[typing.Any, typing.Iterable[typing.Any], Observable]
+
+
+def _blocking_iter(requests: Observable) -> typing.Iterator[typing.Any]:
+    # grpc consumes request streams from its own thread, so an Observable is handed over through a queue.
+    notifications = queue.Queue()  # type: queue.Queue
+    disposable = requests.subscribe(Observer(
+        on_next=lambda v: notifications.put((_NEXT, v)),
+        on_error=lambda e: notifications.put((_ERROR, e)),
+        on_completed=lambda: notifications.put((_COMPLETED, None))
+    ))
+    try:
+        while True:
+            kind, value = notifications.get()
+            if kind == _NEXT:
+                yield value
+            elif kind == _ERROR:
+                raise value
+            else:
+                return
+    finally:
+        disposable.dispose()
+
+
+def _request_iterator(requests: Requests) -> typing.Iterator[typing.Any]:
+    if isinstance(requests, Observable):
+        return _blocking_iter(requests)
+    return iter(requests)
+
+
+def _future_observable(start: typing.Callable[[], grpc.Future]) -> Observable:
+    # noinspection PyUnusedLocal
+    def _subscribe(observer: Observer, scheduler: typing.Optional[Scheduler] = None):
+        future = start()
+
+        def _done(f: grpc.Future):
+            if f.cancelled():
+                return
+            error = f.exception()
+            if error is not None:
+                observer.on_error(error)
+                return
+            observer.on_next(f.result())
+            observer.on_completed()
+
+        future.add_done_callback(_done)
+        return Disposable(future.cancel)
+
+    # noinspection PyTypeChecker
+    return rx.create(_subscribe)
+
+
+def _stream_observable(start: typing.Callable[[], typing.Any], scheduler: Scheduler) -> Observable:
+    # noinspection PyUnusedLocal
+    def _subscribe(observer: Observer, subscribe_scheduler: typing.Optional[Scheduler] = None):
+        lock = threading.Lock()
+        state = {'call': None, 'disposed': False}
+
+        # noinspection PyUnusedLocal
+        def _iterate(*a):
+            with lock:
+                if state['disposed']:
+                    return
+                call = state['call'] = start()
+            try:
+                for response in call:
+                    observer.on_next(response)
+            except grpc.RpcError as e:
+                if not state['disposed']:
+                    observer.on_error(e)
+                return
+            observer.on_completed()
+
+        scheduled = scheduler.schedule(_iterate)
+
+        def _dispose():
+            with lock:
+                state['disposed'] = True
+                call = state['call']
+            if call is not None:
+                call.cancel()
+            scheduled.dispose()
+
+        return Disposable(_dispose)
+
+    # noinspection PyTypeChecker
+    return rx.create(_subscribe)
+
+
+class ReactiveMethod:
+    def __init__(
+            self, multi_callables: typing.Sequence[typing.Any], channel_pool: ChannelPool, scheduler: Scheduler):
+        self._multi_callables = multi_callables
+        self._channel_pool = channel_pool
+        first = multi_callables[0]
+        self.request_streaming = isinstance(first, (grpc.StreamUnaryMultiCallable, grpc.StreamStreamMultiCallable))
+        self.response_streaming = isinstance(
+            first, (grpc.UnaryStreamMultiCallable, grpc.StreamStreamMultiCallable))
+        self._scheduler = scheduler
+
+    def __call__(self, request: Requests, **kw) -> Observable:
+        # The call starts on subscription, so every subscription (and every retry) issues a new RPC.
+        def _start():
+            index = self._channel_pool.acquire()
+            try:
+                multi_callable = self._multi_callables[index]
+                argument = _request_iterator(request) if self.request_streaming else request
+                call = multi_callable(argument, **kw) if self.response_streaming \
+                    else multi_callable.future(argument, **kw)
+            except Exception:
+                self._channel_pool.release(index)
+                raise
+            call.add_done_callback(lambda _: self._channel_pool.release(index))
+            return call
+
+        if self.response_streaming:
+            return _stream_observable(_start, self._scheduler)
+        return _future_observable(_start)
+
+
+class ReactiveStub:
+    def __init__(
+            self, stub_class: typing.Callable[[grpc.Channel], typing.Any],
+            channel_pool: ChannelPool,
+            scheduler: typing.Optional[Scheduler] = None):
+        self.channel_pool = channel_pool
+        # Only streaming responses are read by a thread; unary calls complete on grpc's own callbacks.
+        self._scheduler = scheduler or ThreadPoolScheduler()
+        stubs = [stub_class(channel) for channel in channel_pool.channels]
+        for name, multi_callable in vars(stubs[0]).items():
+            if isinstance(multi_callable, (
+                    grpc.UnaryUnaryMultiCallable, grpc.UnaryStreamMultiCallable,
+                    grpc.StreamUnaryMultiCallable, grpc.StreamStreamMultiCallable)):
+                setattr(self, name, ReactiveMethod([getattr(s, name) for s in stubs], channel_pool, self._scheduler))
+
+
+def create_stub(
+        stub_class: typing.Callable[[grpc.Channel], typing.Any], *channels: grpc.Channel,
+        channel_pool: typing.Optional[ChannelPool] = None,
+        scheduler: typing.Optional[Scheduler] = None) -> ReactiveStub:
+    if bool(channels) == bool(channel_pool):
+        raise ValueError('You must specify either channels or channel_pool')
+    return ReactiveStub(stub_class, channel_pool or ChannelPool(channels), scheduler=scheduler)
+
+
+def pipelined(
+        method: typing.Callable[..., Observable], *operators: typing.Callable[[Observable], Observable],
+        max_concurrent: typing.Optional[int] = None, **kw) -> typing.Callable[[Observable], Observable]:
+    if max_concurrent is not None and max_concurrent <= 0:
+        raise ValueError('max_concurrent must be greater than 0')
+
+    def _call(request) -> Observable:
+        return method(request, **kw).pipe(*operators)
+
+    def _f(requests: Observable) -> Observable:
+        return requests.pipe(rx_operators.map(_call), rx_operators.merge(max_concurrent=max_concurrent))
+    return _f
+
+
+def _is_retryable(error: Exception, codes: typing.Collection[grpc.StatusCode]) -> bool:
+    return isinstance(error, grpc.RpcError) and error.code() in codes
+
+
+def retry(
+        max_attempts: int = 3,
+        codes: typing.Collection[grpc.StatusCode] = (grpc.StatusCode.UNAVAILABLE, ),
+        backoff_secs: float = 0.1,
+        max_backoff_secs: float = 5.0,
+        scheduler: typing.Optional[Scheduler] = None) -> typing.Callable[[Observable], Observable]:
+    if max_attempts <= 0:
+        raise ValueError('max_attempts must be greater than 0')
+
+    def _f(source: Observable) -> Observable:
+        def _subscribe(observer: Observer, subscribe_scheduler: typing.Optional[Scheduler] = None):
+            retry_scheduler = scheduler or subscribe_scheduler or ThreadPoolScheduler(1)
+            subscription = SerialDisposable()
+            lock = threading.Lock()
+            state = {'attempt': 0, 'emitted': False, 'retried': 0}
+
+            def _on_next(value):
+                state['emitted'] = True
+                observer.on_next(value)
+
+            def _on_error(error: Exception):
+                # Responses already delivered cannot be taken back, so a stream is only retried before its first one.
+                attempt = state['attempt']
+                if attempt >= max_attempts or state['emitted'] or not _is_retryable(error, codes):
+                    observer.on_error(error)
+                    return
+                delay = min(backoff_secs * 2 ** (attempt - 1), max_backoff_secs)
+                _LOGGER.debug('Retrying after %s (attempt %d), waiting %.3fs', error, attempt, delay)
+                with lock:
+                    state['retried'] = attempt
+                    subscription.disposable = retry_scheduler.schedule_relative(delay, _attempt)
+
+            # noinspection PyUnusedLocal
+            def _attempt(*a):
+                state['attempt'] += 1
+                attempt = state['attempt']
+                disposable = source.subscribe(Observer(
+                    on_next=_on_next, on_error=_on_error, on_completed=observer.on_completed))
+                # The source may fail before subscribe() returns, storing it then would cancel the scheduled retry.
+                with lock:
+                    if state['retried'] != attempt:
+                        subscription.disposable = disposable
+
+            _attempt()
+            return subscription
+
+        # noinspection PyTypeChecker
+        return rx.create(_subscribe)
+    return _f
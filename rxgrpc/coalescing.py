@@ -0,0 +1,92 @@
+import inspect
+import threading
+import typing
+
+from rx import Observable
+
+from rxgrpc.deferred import on_workers, Emit
+from rxgrpc.thread_pool import GRPCInvocation
+
+
+_Key = typing.Tuple[str, bytes]
+
+
+class _Flight:
+    __slots__ = ('response', 'succeeded', 'followers')
+
+    def __init__(self):
+        self.response = None
+        self.succeeded = False
+        # Each with the emit of the subscription it came from.
+        self.followers = []  # type: typing.List[typing.Tuple[GRPCInvocation, Emit]]
+
+
+class _Coalescer:
+    # Keys are compared on the worker that received the request, so arrivals are never held up by the receive of
+    # another call. Followers hold no worker while they wait, they are released when their leader completes.
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._in_flight = {}  # type: typing.Dict[_Key, _Flight]
+
+    def join(self, key: _Key, g: GRPCInvocation, emit: Emit) -> typing.Optional[_Flight]:
+        # Returns the new flight when g leads it, None when g follows one already in flight.
+        with self._lock:
+            flight = self._in_flight.get(key)
+            if flight is None:
+                flight = self._in_flight[key] = _Flight()
+                return flight
+            flight.followers.append((g, emit))
+            return None
+
+    def land(self, key: _Key) -> typing.List[typing.Tuple[GRPCInvocation, Emit]]:
+        with self._lock:
+            return self._in_flight.pop(key).followers
+
+
+def _leading(flight: _Flight, behaviour: typing.Callable) -> typing.Callable:
+    async def _awaiting(response):
+        flight.response = await response
+        flight.succeeded = True
+        return flight.response
+
+    def _behaviour(request, context):
+        response = behaviour(request, context)
+        # grpc.aio awaits what behaviours return, the response is only known once that is done.
+        if inspect.isawaitable(response):
+            return _awaiting(response)
+        flight.response = response
+        flight.succeeded = True
+        return response
+    return _behaviour
+
+
+def _following(flight: _Flight, behaviour: typing.Callable) -> typing.Callable:
+    def _behaviour(request, context):
+        # A failed leader answered with its own error, each follower then makes its own call.
+        return flight.response if flight.succeeded else behaviour(request, context)
+    return _behaviour
+
+
+def coalesce() -> typing.Callable[[Observable], Observable]:
+    coalescer = _Coalescer()
+
+    def _land(key: _Key, flight: _Flight):
+        for follower, emit in coalescer.land(key):
+            emit(follower.with_behaviour(_following(flight, follower.behaviour)))
+
+    def _route(g: GRPCInvocation, emit: Emit):
+        data = g.request_bytes()
+        if data is None:
+            emit(g)
+            return
+        # One operator may be piped on several methods, whose identical requests must not share a response.
+        key = g.method_name, data
+        flight = coalescer.join(key, g, emit)
+        if flight is None:
+            return
+        leader = g.with_behaviour(_leading(flight, g.behaviour))
+        # Failed, rejected and shed leaders complete too, their followers then run on their own.
+        leader.add_done_callback(lambda _: _land(key, flight))
+        emit(leader)
+
+    return on_workers(_route)
@@ -0,0 +1,101 @@
+import logging
+import queue
+import threading
+import typing
+
+_LOGGER = logging.getLogger('rxgrpc.completion')
+
+# States are too many and too short-lived for a lock each, they hash onto a few shared ones instead.
+_LOCKS = tuple(threading.Lock() for _ in range(64))
+
+
+def _lock_of(completion: 'Completion') -> threading.Lock:
+    return _LOCKS[(id(completion) >> 4) & 63]
+
+
+class CallbackExecutor:
+    # Lighter than a ThreadPoolExecutor: callbacks need no Future, only a queue and a few daemon threads.
+    def __init__(self, threads: int = 1, thread_name_prefix: str = 'rxgrpc-callbacks'):
+        if threads <= 0:
+            raise ValueError('threads must be greater than 0')
+        self._queue = queue.SimpleQueue() if hasattr(queue, 'SimpleQueue') else queue.Queue()
+        self._threads = [
+            threading.Thread(target=self._work, name='{}-{}'.format(thread_name_prefix, i), daemon=True)
+            for i in range(threads)
+        ]
+        for t in self._threads:
+            t.start()
+
+    def submit(self, fn: typing.Callable, *a):
+        self._queue.put((fn, a))
+
+    def shutdown(self, wait: bool = True):
+        for _ in self._threads:
+            self._queue.put(None)
+        if wait:
+            for t in self._threads:
+                t.join()
+
+    def _work(self):
+        while True:
+            task = self._queue.get()
+            if task is None:
+                return
+            _call(*task)
+
+
+def _call(fn: typing.Callable, a: tuple):
+    try:
+        fn(*a)
+    except Exception:
+        _LOGGER.exception('Error running done callback')
+
+
+def _call_all(callbacks: typing.List[typing.Callable], argument):
+    for callback in callbacks:
+        _call(callback, (argument, ))
+
+
+class Completion:
+    # Completes once. Every callback runs exactly once: those added before completion by the completing thread,
+    # later ones by the thread adding them.
+    __slots__ = ('result', 'done', 'done_callbacks', 'callback_executor')
+
+    def __init__(self):
+        self.result = None
+        self.done = False
+        self.done_callbacks = None  # type: typing.Optional[typing.List[typing.Callable]]
+        self.callback_executor = None
+
+    def complete(self, result, argument) -> bool:
+        with _lock_of(self):
+            if self.done:
+                return False
+            self.result = result
+            self.done = True
+            callbacks, self.done_callbacks = self.done_callbacks, None
+        if callbacks:
+            executor = self.callback_executor
+            if executor is None:
+                _call_all(callbacks, argument)
+            else:
+                # One task for all of them keeps a call's callbacks in the order they were added.
+                executor.submit(_call_all, callbacks, argument)
+        return True
+
+    def add_done_callback(self, callback: typing.Callable, argument):
+        with _lock_of(self):
+            if not self.done:
+                if self.done_callbacks is None:
+                    self.done_callbacks = [callback]
+                else:
+                    self.done_callbacks.append(callback)
+                return
+        self._dispatch(callback, argument)
+
+    def _dispatch(self, callback: typing.Callable, argument):
+        executor = self.callback_executor
+        if executor is None:
+            _call(callback, (argument, ))
+        else:
+            executor.submit(_call, callback, (argument, ))
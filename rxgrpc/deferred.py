@@ -0,0 +1,55 @@
+import threading
+import typing
+
+import rx
+from rx import Observable
+from rx.core import Observer
+from rx.core.abc import Scheduler
+
+from rxgrpc.thread_pool import GRPCInvocation
+
+Emit = typing.Callable[[GRPCInvocation], None]
+Receive = typing.Callable[[GRPCInvocation, Emit], None]
+
+
+def on_workers(receive: Receive) -> typing.Callable[[Observable], Observable]:
+    # For operators that read unary requests: invocations are dispatched on the grpc polling thread, where receiving
+    # a request must not happen, so each one is deferred to a worker and handed to receive there. receive passes it
+    # on with emit, right away or later from any thread, possibly while another invocation is being emitted.
+    # Streaming invocations are passed on as they are.
+    def _f(source: Observable) -> Observable:
+        # noinspection PyUnusedLocal
+        def _subscribe(observer: Observer, scheduler: typing.Optional[Scheduler] = None):
+            lock = threading.RLock()
+            pending = [0]
+            completed = [False]
+
+            def _emit(g: GRPCInvocation):
+                with lock:
+                    observer.on_next(g)
+                    pending[0] -= 1
+                    if completed[0] and not pending[0]:
+                        observer.on_completed()
+
+            def _receive(g: GRPCInvocation):
+                receive(g, _emit)
+
+            def _dispatch(g: GRPCInvocation):
+                with lock:
+                    pending[0] += 1
+                if g.request_streaming or g.response_streaming:
+                    _emit(g)
+                else:
+                    g.defer(_receive)
+
+            def _completed():
+                with lock:
+                    completed[0] = True
+                    if not pending[0]:
+                        observer.on_completed()
+
+            return source.subscribe(Observer(on_next=_dispatch, on_error=observer.on_error, on_completed=_completed))
+
+        # noinspection PyTypeChecker
+        return rx.create(_subscribe)
+    return _f
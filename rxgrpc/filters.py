@@ -9,11 +9,10 @@ T = typing.TypeVar('T')
 
 
 def filter(f: typing.Callable[[T], bool]) -> typing.Callable[[GRPCInvocation], bool]:
+    # Streaming requests are filtered element by element with rxgrpc.operators.filter, without
+    # consuming the request iterator here.
     def _f(g: GRPCInvocation) -> bool:
-        input_message = g.input_message()
-        try:
-            iter(input_message)
+        if g.request_streaming:
             return True
-        except TypeError:
-            return f(input_message)
+        return f(g.input_message())
     return _f
@@ -0,0 +1,264 @@
+import collections
+import inspect
+import math
+import threading
+import time
+import typing
+
+import grpc
+from rx import Observable, operators as orig_operators
+
+from rxgrpc.thread_pool import GRPCInvocation
+
+KeyFunction = typing.Callable[[GRPCInvocation], typing.Hashable]
+
+
+def by_method(g: GRPCInvocation) -> typing.Hashable:
+    return g.method_name
+
+
+def by_metadata(key: str, default: typing.Any = None) -> KeyFunction:
+    # Callers are limited per method, so a caller hitting two methods gets a budget on each.
+    def _key(g: GRPCInvocation) -> typing.Hashable:
+        for k, v in g.invocation_metadata() or ():
+            if k == key:
+                return g.method_name, v
+        return g.method_name, default
+    return _key
+
+
+class _TokenBucket:
+    __slots__ = ('tokens', 'updated')
+
+    def __init__(self, tokens: float, updated: float):
+        self.tokens = tokens
+        self.updated = updated
+
+
+class RateLimiter:
+    def __init__(
+            self, rate: float, burst: typing.Optional[float] = None, max_keys: int = 10000,
+            clock: typing.Callable[[], float] = time.monotonic):
+        if rate <= 0:
+            raise ValueError('rate must be greater than 0')
+        if burst is not None and burst < 1:
+            raise ValueError('burst must be at least 1')
+        if max_keys <= 0:
+            raise ValueError('max_keys must be greater than 0')
+        self.rate = rate
+        self.burst = burst if burst is not None else max(rate, 1.0)
+        self.max_keys = max_keys
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._buckets = collections.OrderedDict()  # type: typing.Dict[typing.Hashable, _TokenBucket]
+        self.rejected = 0
+
+    def try_acquire(self, key: typing.Hashable = None) -> bool:
+        now = self._clock()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = _TokenBucket(self.burst, now)
+                # The least recently seen key has the fullest bucket, forgetting it loses nothing.
+                if len(self._buckets) > self.max_keys:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+                bucket.tokens = min(self.burst, bucket.tokens + (now - bucket.updated) * self.rate)
+                bucket.updated = now
+            if bucket.tokens >= 1:
+                bucket.tokens -= 1
+                return True
+            self.rejected += 1
+            return False
+
+
+class AIMDLimit:
+    def __init__(
+            self, initial_limit: int = 20, min_limit: int = 1, max_limit: int = 1000,
+            backoff_ratio: float = 0.9, timeout: float = 5.0):
+        if not 0 < backoff_ratio < 1:
+            raise ValueError('backoff_ratio must be between 0 and 1')
+        self.limit = initial_limit
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff_ratio = backoff_ratio
+        self.timeout = timeout
+
+    def update(self, rtt: float, in_flight: int, dropped: bool):
+        if dropped or rtt > self.timeout:
+            self.limit = max(self.min_limit, int(self.limit * self.backoff_ratio))
+        elif in_flight * 2 >= self.limit:
+            # Only a limit that is actually being used has earned a higher one.
+            self.limit = min(self.max_limit, self.limit + 1)
+
+
+class GradientLimit:
+    def __init__(
+            self, initial_limit: int = 20, min_limit: int = 1, max_limit: int = 1000,
+            smoothing: float = 0.2, rtt_tolerance: float = 1.5, long_window: int = 600):
+        if rtt_tolerance < 1:
+            raise ValueError('rtt_tolerance must be at least 1')
+        self.limit = initial_limit
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.smoothing = smoothing
+        self.rtt_tolerance = rtt_tolerance
+        self.long_window = long_window
+        self._estimate = float(initial_limit)
+        self._long_rtt = 0.0
+        self._samples = 0
+
+    def update(self, rtt: float, in_flight: int, dropped: bool):
+        # The long-term average latency stands for the unloaded one, a short rtt above it means requests queue.
+        rtt = max(rtt, 1e-9)
+        self._samples += 1
+        self._long_rtt += (rtt - self._long_rtt) / min(self._samples, self.long_window)
+        if self._long_rtt / rtt > 2:
+            # After a latency spike the average would keep the limit high for a whole window.
+            self._long_rtt = rtt * 2
+        gradient = 0.5 if dropped else max(0.5, min(1.0, self.rtt_tolerance * self._long_rtt / rtt))
+        estimate = self._estimate * gradient + math.sqrt(self._estimate)
+        estimate = self._estimate * (1 - self.smoothing) + estimate * self.smoothing
+        if in_flight < self._estimate / 2:
+            # Demand below half the limit says nothing about a higher one, but growing latency still lowers it.
+            estimate = min(estimate, self._estimate)
+        self._estimate = max(self.min_limit, min(self.max_limit, estimate))
+        self.limit = int(self._estimate)
+
+
+class _Permit:
+    __slots__ = ('limiter', 'key', 'started', 'released')
+
+    def __init__(self, limiter: 'ConcurrencyLimiter', key: typing.Hashable, started: float):
+        self.limiter = limiter
+        self.key = key
+        self.started = started
+        self.released = False
+
+    def release(self, dropped: bool = False):
+        self.limiter._release(self, dropped)
+
+
+class _KeyState:
+    __slots__ = ('limit', 'in_flight')
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.in_flight = 0
+
+
+class ConcurrencyLimiter:
+    def __init__(
+            self, limit: typing.Callable[[], typing.Any] = AIMDLimit, max_keys: int = 10000,
+            clock: typing.Callable[[], float] = time.perf_counter):
+        if max_keys <= 0:
+            raise ValueError('max_keys must be greater than 0')
+        self._limit_factory = limit
+        self.max_keys = max_keys
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._keys = collections.OrderedDict()  # type: typing.Dict[typing.Hashable, _KeyState]
+        self.rejected = 0
+
+    def try_acquire(self, key: typing.Hashable = None) -> typing.Optional[_Permit]:
+        with self._lock:
+            state = self._keys.get(key)
+            if state is None:
+                state = self._keys[key] = _KeyState(self._limit_factory())
+                if len(self._keys) > self.max_keys:
+                    self._evict()
+            else:
+                self._keys.move_to_end(key)
+            if state.in_flight >= state.limit.limit:
+                self.rejected += 1
+                return None
+            state.in_flight += 1
+        return _Permit(self, key, self._clock())
+
+    def _evict(self):
+        # Keys with calls in flight are still needed to release them, the least recently used idle one goes.
+        for key, state in self._keys.items():
+            if not state.in_flight:
+                del self._keys[key]
+                return
+
+    def _release(self, permit: _Permit, dropped: bool):
+        rtt = self._clock() - permit.started
+        with self._lock:
+            if permit.released:
+                return
+            permit.released = True
+            state = self._keys[permit.key]
+            state.limit.update(rtt, state.in_flight, dropped)
+            state.in_flight -= 1
+
+    def limit(self, key: typing.Hashable = None) -> typing.Optional[int]:
+        with self._lock:
+            state = self._keys.get(key)
+            return state.limit.limit if state else None
+
+    def in_flight(self, key: typing.Hashable = None) -> int:
+        with self._lock:
+            state = self._keys.get(key)
+            return state.in_flight if state else 0
+
+
+class RateLimitOperator:
+    __slots__ = ('limiter', 'key_fn')
+
+    def __init__(self, limiter: RateLimiter, key_fn: KeyFunction = by_method):
+        self.limiter = limiter
+        self.key_fn = key_fn
+
+    def _limit(self, g: GRPCInvocation) -> bool:
+        if self.limiter.try_acquire(self.key_fn(g)):
+            return True
+        g.reject(grpc.StatusCode.RESOURCE_EXHAUSTED, 'Rate limit exceeded')
+        return False
+
+    def __call__(self, source: Observable) -> Observable:
+        return orig_operators.filter(self._limit)(source)
+
+
+def _releasing(behaviour: typing.Callable, permit: _Permit) -> typing.Callable:
+    async def _awaiting(result):
+        try:
+            return await result
+        except BaseException:
+            permit.release(dropped=True)
+            raise
+
+    def _behaviour(request, context):
+        try:
+            result = behaviour(request, context)
+        except BaseException:
+            permit.release(dropped=True)
+            raise
+        return _awaiting(result) if inspect.isawaitable(result) else result
+    return _behaviour
+
+
+def _is_not_none(g: typing.Optional[GRPCInvocation]) -> bool:
+    return g is not None
+
+
+class ConcurrencyLimitOperator:
+    __slots__ = ('limiter', 'key_fn')
+
+    def __init__(self, limiter: ConcurrencyLimiter, key_fn: KeyFunction = by_method):
+        self.limiter = limiter
+        self.key_fn = key_fn
+
+    def _limit(self, g: GRPCInvocation) -> typing.Optional[GRPCInvocation]:
+        permit = self.limiter.try_acquire(self.key_fn(g))
+        if permit is None:
+            g.reject(grpc.StatusCode.RESOURCE_EXHAUSTED, 'Concurrency limit exceeded')
+            return None
+        # A failing handler counts as a drop; invocations answered by the server itself complete through the callback.
+        limited = g.with_behaviour(_releasing(g.behaviour, permit))
+        limited.add_done_callback(lambda _: permit.release())
+        return limited
+
+    def __call__(self, source: Observable) -> Observable:
+        return source.pipe(orig_operators.map(self._limit), orig_operators.filter(_is_not_none))
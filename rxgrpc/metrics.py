@@ -0,0 +1,194 @@
+import collections
+import queue
+import threading
+import typing
+
+# Log-linear buckets over nanoseconds: exact below 16ns, then 8 sub-buckets per power of two (12.5% precision).
+_SUB_BITS = 3
+_SUB_BUCKETS = 1 << _SUB_BITS
+_LINEAR_BUCKETS = _SUB_BUCKETS * 2
+_MAX_SHIFT = 40
+_BUCKETS = _LINEAR_BUCKETS + _MAX_SHIFT * _SUB_BUCKETS
+
+_FOLD_THRESHOLD = 4096
+
+STAGES = ('dispatch', 'operators', 'queue', 'run', 'callbacks')
+
+
+def _bucket(ns: int) -> int:
+    if ns < _LINEAR_BUCKETS:
+        return ns if ns > 0 else 0
+    shift = ns.bit_length() - _SUB_BITS - 1
+    if shift > _MAX_SHIFT:
+        return _BUCKETS - 1
+    return _LINEAR_BUCKETS + (shift - 1) * _SUB_BUCKETS + (ns >> shift) - _SUB_BUCKETS
+
+
+def _bucket_upper_bound(index: int) -> int:
+    if index < _LINEAR_BUCKETS:
+        return index + 1
+    k = index - _LINEAR_BUCKETS
+    shift = k // _SUB_BUCKETS + 1
+    return (k % _SUB_BUCKETS + _SUB_BUCKETS + 1) << shift
+
+
+class HistogramSnapshot:
+    __slots__ = ('count', 'sum', '_counts')
+
+    def __init__(self, counts: typing.List[int], total_ns: int):
+        self._counts = counts
+        self.count = sum(counts)
+        self.sum = total_ns / 1e9
+
+    def percentile(self, q: float) -> float:
+        if not self.count:
+            return 0.0
+        rank = q / 100.0 * self.count
+        seen = 0
+        for index, count in enumerate(self._counts):
+            seen += count
+            if count and seen >= rank:
+                return _bucket_upper_bound(index) / 1e9
+        return _bucket_upper_bound(len(self._counts) - 1) / 1e9
+
+    def buckets(self) -> typing.List[typing.Tuple[float, int]]:
+        # Cumulative counts at every power of two nanoseconds, the boundaries the sub-buckets nest in.
+        result = []
+        cumulative = 0
+        for index, count in enumerate(self._counts):
+            cumulative += count
+            upper_bound = _bucket_upper_bound(index)
+            if index >= _LINEAR_BUCKETS - 1 and upper_bound & (upper_bound - 1) == 0:
+                result.append((upper_bound / 1e9, cumulative))
+        return result
+
+    def as_dict(self) -> typing.Dict[str, float]:
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'p50': self.percentile(50),
+            'p90': self.percentile(90),
+            'p99': self.percentile(99),
+            'p999': self.percentile(99.9),
+        }
+
+
+class _Folder:
+    # One daemon thread folds the shards that filled up before anyone read them, off the threads recording into them.
+    def __init__(self):
+        self._queue = queue.SimpleQueue() if hasattr(queue, 'SimpleQueue') else queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None  # type: typing.Optional[threading.Thread]
+
+    def submit(self, method_metrics: 'MethodMetrics'):
+        # Threads do not survive a fork, a forked server starts its own.
+        if self._thread is None or not self._thread.is_alive():
+            with self._lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._thread = threading.Thread(target=self._work, name='rxgrpc-metrics', daemon=True)
+                    self._thread.start()
+        self._queue.put(method_metrics)
+
+    def _work(self):
+        while True:
+            self._queue.get().fold_full()
+
+
+_FOLDER = _Folder()
+
+
+class MethodMetrics:
+    def __init__(self, method_name: str):
+        self.method_name = method_name
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._shards = []  # type: typing.List[typing.Deque[typing.Tuple[float, ...]]]
+        self._full = []  # type: typing.List[typing.Deque[typing.Tuple[float, ...]]]
+        self._counts = [[0] * _BUCKETS for _ in STAGES]
+        self._totals = [0] * len(STAGES)
+
+    def _shard(self) -> typing.Deque[typing.Tuple[float, ...]]:
+        shard = self._local.shard = collections.deque()
+        with self._lock:
+            self._shards.append(shard)
+        return shard
+
+    def record(self, *timestamps: float):
+        # The RPC path only appends to a deque owned by its thread; bucketing is deferred to snapshot(), or to the
+        # metrics thread once a thread has gathered _FOLD_THRESHOLD timings that nobody has read.
+        try:
+            shard = self._local.shard
+        except AttributeError:
+            shard = self._shard()
+        shard.append(timestamps)
+        if len(shard) > _FOLD_THRESHOLD:
+            self._hand_over(shard)
+
+    def _hand_over(self, shard: typing.Deque[typing.Tuple[float, ...]]):
+        fresh = self._local.shard = collections.deque()
+        with self._lock:
+            self._shards[self._shards.index(shard)] = fresh
+            self._full.append(shard)
+        _FOLDER.submit(self)
+
+    def fold_full(self):
+        with self._lock:
+            while self._full:
+                self._fold(self._full.pop())
+
+    def record_invocation(
+            self, submitted: float, dequeued: typing.Optional[float], piped: typing.Optional[float],
+            started: float, finished: float, callbacks_finished: float):
+        dequeued = dequeued or submitted
+        self.record(submitted, dequeued, piped or dequeued, started, finished, callbacks_finished)
+
+    def _fold(self, shard: typing.Deque[typing.Tuple[float, ...]]):
+        popleft = shard.popleft
+        columns = list(zip(*[popleft() for _ in range(len(shard))]))
+        if not columns:
+            return
+        for i, counts in enumerate(self._counts):
+            durations = [int((end - start) * 1e9) for start, end in zip(columns[i], columns[i + 1])]
+            self._totals[i] += sum(durations)
+            for index in map(_bucket, durations):
+                counts[index] += 1
+
+    def snapshot(self) -> typing.Dict[str, HistogramSnapshot]:
+        with self._lock:
+            for shard in self._shards:
+                self._fold(shard)
+            while self._full:
+                self._fold(self._full.pop())
+            return {
+                stage: HistogramSnapshot(list(self._counts[i]), self._totals[i]) for i, stage in enumerate(STAGES)
+            }
+
+
+class Metrics:
+    def __init__(self):
+        self._methods = {}  # type: typing.Dict[str, MethodMetrics]
+
+    def method(self, method_name: str) -> MethodMetrics:
+        method_metrics = self._methods.get(method_name)
+        if method_metrics is None:
+            method_metrics = self._methods.setdefault(method_name, MethodMetrics(method_name))
+        return method_metrics
+
+    def snapshot(self) -> typing.Dict[str, typing.Dict[str, HistogramSnapshot]]:
+        return {method_name: m.snapshot() for method_name, m in self._methods.items()}
+
+    def prometheus_text(self, metric_name: str = 'rxgrpc_invocation_stage_seconds') -> str:
+        lines = [
+            '# HELP {} Time spent by gRPC invocations in each rxgrpc stage.'.format(metric_name),
+            '# TYPE {} histogram'.format(metric_name),
+        ]
+        for method_name, stages in sorted(self.snapshot().items()):
+            for stage in STAGES:
+                histogram = stages[stage]
+                labels = 'method="{}",stage="{}"'.format(method_name, stage)
+                for upper_bound, count in histogram.buckets():
+                    lines.append('{}_bucket{{{},le="{:.9g}"}} {}'.format(metric_name, labels, upper_bound, count))
+                lines.append('{}_bucket{{{},le="+Inf"}} {}'.format(metric_name, labels, histogram.count))
+                lines.append('{}_sum{{{}}} {:.9g}'.format(metric_name, labels, histogram.sum))
+                lines.append('{}_count{{{}}} {}'.format(metric_name, labels, histogram.count))
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,149 @@
+import importlib
+import logging
+import multiprocessing
+import os
+import queue
+import signal
+import threading
+import typing
+
+from rxgrpc import server
+from rxgrpc.thread_pool import _ReactiveMethods
+
+_LOGGER = logging.getLogger('rxgrpc.multiprocess')
+
+OperatorSpec = typing.NamedTuple('OperatorSpec', [
+    ('factory', typing.Callable),
+    ('args', tuple),
+    ('kwargs', dict),
+])
+
+
+def operator(factory: typing.Callable, *args, **kwargs) -> OperatorSpec:
+    return OperatorSpec(factory, args, kwargs)
+
+
+class PipelineSpec:
+    # Operators are closures and cannot be pickled, so worker processes rebuild them from their factories.
+    def __init__(self):
+        self.pipes = []  # type: typing.List[typing.Tuple[str, typing.Tuple[OperatorSpec, ...], int, bool]]
+
+    def grpc_pipe(
+            self, *operators: OperatorSpec, method_name: typing.Optional[str] = None, method=None,
+            parallelism: int = 1, ordered: bool = True) -> 'PipelineSpec':
+        if bool(method_name) == bool(method):
+            raise ValueError('You must specify either method_name or method')
+        method_name = _ReactiveMethods._get_method_name(method_name=method_name, method=method)
+        self.pipes.append((method_name, operators, parallelism, ordered))
+        return self
+
+    def apply(self, grpc_observable: server.GRPCObservableServer):
+        for method_name, operators, parallelism, ordered in self.pipes:
+            grpc_observable.grpc_pipe(
+                *(o.factory(*o.args, **o.kwargs) for o in operators),
+                method_name=method_name, parallelism=parallelism, ordered=ordered)
+
+
+ServicerSpec = typing.Tuple[typing.Callable[[typing.Any, typing.Any], None], typing.Callable[[], typing.Any]]
+
+_ServerConfig = typing.NamedTuple('_ServerConfig', [
+    ('protobuf_module_name', str),
+    ('max_workers', int),
+    ('address', str),
+    ('servicers', typing.Sequence[ServicerSpec]),
+    ('pipeline', typing.Optional[PipelineSpec]),
+    ('server_kwargs', dict),
+])
+
+
+def _serve(config: _ServerConfig, index: int, ready, stop_event, grace_time_secs):
+    # The parent process coordinates shutdown, a Ctrl-C reaching the whole process group must not kill workers.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    try:
+        server_kwargs = dict(config.server_kwargs)
+        options = list(server_kwargs.pop('options', ())) + [('grpc.so_reuseport', 1)]
+        rx_server = server.create_server(
+            importlib.import_module(config.protobuf_module_name), config.max_workers,
+            options=options, **server_kwargs)
+        for add_servicer, servicer_factory in config.servicers:
+            add_servicer(servicer_factory(), rx_server.server)
+        if config.pipeline:
+            config.pipeline.apply(rx_server)
+        rx_server.add_insecure_port(config.address)
+        rx_server.start()
+    except Exception as e:
+        _LOGGER.exception('Worker %d could not start', index)
+        ready.put((index, repr(e)))
+        return
+    ready.put((index, None))
+    stop_event.wait()
+    rx_server.stop(grace_time_secs.value).wait()
+
+
+class MultiprocessServer:
+    def __init__(self, config: _ServerConfig, processes: int):
+        self._config = config
+        self._context = multiprocessing.get_context('spawn')
+        self._ready = self._context.Queue()
+        self._stop_event = self._context.Event()
+        self._grace_time_secs = self._context.Value('d', 0.0)
+        self.processes = [
+            self._context.Process(
+                target=_serve, args=(config, i, self._ready, self._stop_event, self._grace_time_secs),
+                name='rxgrpc-server-{}'.format(i), daemon=True)
+            for i in range(processes)
+        ]
+
+    def start(self, timeout: typing.Optional[float] = 30.0):
+        for process in self.processes:
+            process.start()
+        errors = []
+        reported = set()
+        for _ in self.processes:
+            try:
+                index, error = self._ready.get(timeout=timeout)
+            except queue.Empty:
+                self.stop(0)
+                # Workers still starting do not watch the stop event yet.
+                for i, process in enumerate(self.processes):
+                    if i not in reported:
+                        process.terminate()
+                raise RuntimeError('Server processes {} did not start within {} seconds'.format(
+                    sorted(set(range(len(self.processes))) - reported), timeout))
+            reported.add(index)
+            if error:
+                errors.append('worker {}: {}'.format(index, error))
+        if errors:
+            self.stop(0).wait()
+            raise RuntimeError('Could not start every server process: {}'.format('; '.join(errors)))
+
+    def stop(self, grace_time_secs: typing.Optional[float] = None) -> threading.Event:
+        self._grace_time_secs.value = grace_time_secs or 0.0
+        self._stop_event.set()
+        stopped = threading.Event()
+
+        def _join():
+            for process in self.processes:
+                process.join()
+            stopped.set()
+
+        threading.Thread(target=_join, name='rxgrpc-server-stop', daemon=True).start()
+        return stopped
+
+    def join(self, timeout: typing.Optional[float] = None):
+        for process in self.processes:
+            process.join(timeout)
+
+
+def create_multiprocess_server(
+        protobuf_module, max_workers: int, address: str,
+        servicers: typing.Sequence[ServicerSpec] = (),
+        pipeline: typing.Optional[PipelineSpec] = None,
+        processes: typing.Optional[int] = None,
+        **server_kwargs) -> MultiprocessServer:
+    # Every process binds the same address through SO_REUSEPORT, so the kernel spreads connections among them.
+    if address.rsplit(':', 1)[-1] == '0':
+        raise ValueError('Worker processes cannot share an ephemeral port')
+    config = _ServerConfig(
+        protobuf_module.__name__, max_workers, address, tuple(servicers), pipeline, server_kwargs)
+    return MultiprocessServer(config, processes or os.cpu_count() or 1)
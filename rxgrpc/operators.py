@@ -1,9 +1,21 @@
+import functools
 import logging
+import time
 import typing
 
+import grpc
 from rx import operators as orig_operators, Observable
 
-from rxgrpc.mappers import grpc_invocation_map, grpc_invocation_filter
+from rxgrpc import streams, coalescing, raw, windowing
+from rxgrpc.batching import BatchOperator, Batcher
+from rxgrpc.cache import CacheOperator, ResponseCache
+from rxgrpc.chain import ChainOperator, OperatorChain, Stage, ResponseChainOperator
+from rxgrpc.limiting import (
+    AIMDLimit, ConcurrencyLimiter, ConcurrencyLimitOperator, KeyFunction, RateLimiter, RateLimitOperator, by_method
+)
+from rxgrpc.sharding import ShardOperator
+
+from rxgrpc.thread_pool import GRPCInvocation
 
 T1 = typing.TypeVar('T1')
 T2 = typing.TypeVar('T2')
@@ -21,11 +33,145 @@ def _composite(*operators: typing.Callable[[Observable], Observable]) -> typing.
 
 
 def map(transformer: typing.Callable[[T1], T2]) -> typing.Callable[[Observable], Observable]:
-    return orig_operators.map(grpc_invocation_map(transformer))
+    return ChainOperator(OperatorChain((Stage.map(transformer), )))
 
 
 _base_filter = filter
 
 
-def filter(f: typing.Callable[[T1], bool]):
-    return orig_operators.map(grpc_invocation_filter(f))
+def filter(f: typing.Callable[[T1], bool]) -> typing.Callable[[Observable], Observable]:
+    return ChainOperator(OperatorChain((Stage.filter(f), )))
+
+
+def _stream_operator(
+        transformer: typing.Callable, async_transformer: typing.Callable, **kw) \
+        -> typing.Callable[[Observable], Observable]:
+    return ChainOperator(OperatorChain((
+        Stage.stream(functools.partial(transformer, **kw), functools.partial(async_transformer, **kw)), )))
+
+
+def buffer_with_count(count: int) -> typing.Callable[[Observable], Observable]:
+    if count <= 0:
+        raise ValueError('count must be greater than 0')
+    return _stream_operator(streams.buffer_with_count, streams.async_buffer_with_count, count=count)
+
+
+def window_with_count(count: int) -> typing.Callable[[Observable], Observable]:
+    if count <= 0:
+        raise ValueError('count must be greater than 0')
+    return _stream_operator(streams.window_with_count, streams.async_window_with_count, count=count)
+
+
+def tumbling_window(
+        aggregator: windowing.Aggregator, count: typing.Optional[int] = None,
+        duration: typing.Optional[float] = None) -> typing.Callable[[Observable], Observable]:
+    return sliding_window(aggregator, count=count, duration=duration)
+
+
+def sliding_window(
+        aggregator: windowing.Aggregator, count: typing.Optional[int] = None,
+        duration: typing.Optional[float] = None,
+        every: typing.Optional[float] = None) -> typing.Callable[[Observable], Observable]:
+    windowing._panes(aggregator, count, duration, every, time.monotonic)
+    return _stream_operator(
+        windowing.sliding, windowing.async_sliding, aggregator=aggregator, count=count, duration=duration, every=every)
+
+
+def session_window(aggregator: windowing.Aggregator, gap: float) -> typing.Callable[[Observable], Observable]:
+    if gap <= 0:
+        raise ValueError('gap must be greater than 0')
+    return _stream_operator(windowing.session, windowing.async_session, aggregator=aggregator, gap=gap)
+
+
+def batch(
+        handler: typing.Callable[[typing.List[T1]], typing.Sequence[T2]],
+        max_size: int, max_latency_ms: float) -> BatchOperator:
+    return BatchOperator(Batcher(handler, max_size, max_latency_ms / 1000.0))
+
+
+def map_response(transformer: typing.Callable[[T1], T2]) -> typing.Callable[[Observable], Observable]:
+    return ResponseChainOperator(OperatorChain((Stage.map(transformer), )))
+
+
+def filter_response(f: typing.Callable[[T1], bool]) -> typing.Callable[[Observable], Observable]:
+    return ResponseChainOperator(OperatorChain((Stage.filter(f), )))
+
+
+def buffer_response_with_count(
+        count: int, combine: typing.Callable[[typing.List[T1]], T2]) -> typing.Callable[[Observable], Observable]:
+    if count <= 0:
+        raise ValueError('count must be greater than 0')
+
+    def _transformer(iterator: typing.Iterator[T1]) -> typing.Iterator[T2]:
+        return (combine(b) for b in streams.buffer_with_count(iterator, count))
+
+    async def _async_transformer(iterator: typing.AsyncIterator[T1]) -> typing.AsyncIterator[T2]:
+        async for b in streams.async_buffer_with_count(iterator, count):
+            yield combine(b)
+
+    return ResponseChainOperator(OperatorChain((Stage.stream(_transformer, _async_transformer), )))
+
+
+def throttle_response(max_per_second: float) -> typing.Callable[[Observable], Observable]:
+    if max_per_second <= 0:
+        raise ValueError('max_per_second must be greater than 0')
+    return ResponseChainOperator(OperatorChain((Stage.stream(
+        functools.partial(streams.throttle, max_per_second=max_per_second),
+        functools.partial(streams.async_throttle, max_per_second=max_per_second)), )))
+
+
+# grpc releases without ServicerContext.set_compression pick the algorithm from this initial metadata key.
+_COMPRESSION_REQUEST_KEY = 'grpc-internal-encoding-request'
+
+
+def _compressing(behaviour: typing.Callable, algorithm: str) -> typing.Callable:
+    def _behaviour(request, context):
+        set_compression = getattr(context, 'set_compression', None)
+        if set_compression is not None:
+            set_compression(getattr(grpc.Compression, algorithm.capitalize()))
+        else:
+            context.send_initial_metadata(((_COMPRESSION_REQUEST_KEY, algorithm), ))
+        return behaviour(request, context)
+    return _behaviour
+
+
+def compress_response(algorithm: str = 'gzip') -> typing.Callable[[Observable], Observable]:
+    if algorithm not in ('gzip', 'deflate'):
+        raise ValueError('Unsupported compression algorithm {}'.format(algorithm))
+    return orig_operators.map(lambda g: g.with_behaviour(_compressing(g.behaviour, algorithm)))
+
+
+def cache(
+        key_fn: typing.Callable[[T1], typing.Hashable], max_entries: int,
+        ttl: typing.Optional[float] = None) -> CacheOperator:
+    return CacheOperator(ResponseCache(max_entries, ttl), key_fn)
+
+
+def coalesce() -> typing.Callable[[Observable], Observable]:
+    return coalescing.coalesce()
+
+
+def rate_limit(
+        rate: float, burst: typing.Optional[float] = None, key_fn: KeyFunction = by_method) -> RateLimitOperator:
+    return RateLimitOperator(RateLimiter(rate, burst), key_fn)
+
+
+def concurrency_limit(
+        limit: typing.Callable[[], typing.Any] = AIMDLimit,
+        key_fn: KeyFunction = by_method) -> ConcurrencyLimitOperator:
+    return ConcurrencyLimitOperator(ConcurrencyLimiter(limit), key_fn)
+
+
+def respond_raw(handler: raw.RawHandler) -> raw.RawOperator:
+    return raw.RawOperator(lambda g: handler)
+
+
+def forward(channel: grpc.Channel, timeout: typing.Optional[float] = None) -> raw.RawOperator:
+    return raw.forward(channel, timeout)
+
+
+def shard_by(
+        key_fn: typing.Callable[[GRPCInvocation], typing.Hashable],
+        *operators: typing.Callable[[Observable], Observable],
+        lanes: int) -> ShardOperator:
+    return ShardOperator(key_fn, operators, lanes)
@@ -0,0 +1,151 @@
+import typing
+
+import grpc
+from rx import Observable, operators as orig_operators
+
+from rxgrpc.thread_pool import GRPCInvocation
+
+RawHandler = typing.Callable[[memoryview, typing.Any], typing.Optional[bytes]]
+
+_VARINT, _FIXED64, _LENGTH_DELIMITED, _START_GROUP, _END_GROUP, _FIXED32 = range(6)
+
+
+def _varint(data: memoryview, position: int) -> typing.Tuple[int, int]:
+    result = shift = 0
+    while True:
+        b = data[position]
+        position += 1
+        result |= (b & 0x7f) << shift
+        if not b & 0x80:
+            return result, position
+        shift += 7
+        if shift >= 64:
+            raise ValueError('Malformed varint')
+
+
+def _skip_group(data: memoryview, position: int, field_number: int) -> int:
+    while True:
+        tag, position = _varint(data, position)
+        if tag >> 3 == field_number and tag & 7 == _END_GROUP:
+            return position
+        position = _skip(data, position, tag)
+
+
+def _skip(data: memoryview, position: int, tag: int) -> int:
+    wire_type = tag & 7
+    if wire_type == _VARINT:
+        return _varint(data, position)[1]
+    if wire_type == _FIXED64:
+        return position + 8
+    if wire_type == _LENGTH_DELIMITED:
+        length, position = _varint(data, position)
+        return position + length
+    if wire_type == _FIXED32:
+        return position + 4
+    if wire_type == _START_GROUP:
+        return _skip_group(data, position, tag >> 3)
+    raise ValueError('Unexpected wire type {}'.format(wire_type))
+
+
+def peek_field(data: typing.Union[bytes, memoryview], field_number: int) -> typing.Union[None, int, memoryview]:
+    # Scans the serialized message up to the first occurrence of the field, decoding nothing else.
+    # Varints and fixed-width fields come back as unsigned integers, everything else as a view into data.
+    data = memoryview(data)
+    position, end = 0, len(data)
+    while position < end:
+        tag, position = _varint(data, position)
+        if tag >> 3 != field_number:
+            position = _skip(data, position, tag)
+            continue
+        wire_type = tag & 7
+        if wire_type == _VARINT:
+            return _varint(data, position)[0]
+        if wire_type == _LENGTH_DELIMITED:
+            length, position = _varint(data, position)
+            return data[position:position + length]
+        if wire_type == _FIXED64:
+            return int.from_bytes(data[position:position + 8], 'little')
+        if wire_type == _FIXED32:
+            return int.from_bytes(data[position:position + 4], 'little')
+        raise ValueError('Field {} is a group'.format(field_number))
+    return None
+
+
+def _identity(d):
+    return d
+
+
+def _raw_behaviour(
+        raw: GRPCInvocation, handler: RawHandler,
+        behaviour: typing.Callable, serializer: typing.Callable[[typing.Any], bytes]) -> typing.Callable:
+    def _behaviour(data: memoryview, context) -> typing.Optional[bytes]:
+        response = handler(data, context)
+        if response is not None:
+            return response
+        # The handler passed, so the servicer answers after all and its response is serialized here.
+        response = behaviour(raw.decoded_message(), context)
+        return None if response is None else serializer(response)
+    return _behaviour
+
+
+def _chained_raw_behaviour(handler: RawHandler, behaviour: typing.Callable) -> typing.Callable:
+    def _behaviour(data: memoryview, context) -> typing.Optional[bytes]:
+        response = handler(data, context)
+        return response if response is not None else behaviour(data, context)
+    return _behaviour
+
+
+class RawOperator:
+    __slots__ = ('handler_factory', )
+
+    def __init__(self, handler_factory: typing.Callable[[GRPCInvocation], RawHandler]):
+        self.handler_factory = handler_factory
+
+    def _wrap(self, g: GRPCInvocation) -> GRPCInvocation:
+        serializer = g.response_serializer
+        if g.request_streaming or g.response_streaming or serializer is None:
+            return g
+        raw = g.with_raw_request()
+        if raw is g:
+            # An earlier raw operator already takes and returns bytes, so it runs when this handler passes.
+            return g.with_behaviour(_chained_raw_behaviour(self.handler_factory(g), g.behaviour))
+        return raw.with_behaviour(_raw_behaviour(raw, self.handler_factory(g), g.behaviour, serializer)) \
+            .with_response_serializer(_identity)
+
+    def __call__(self, source: Observable) -> Observable:
+        return orig_operators.map(self._wrap)(source)
+
+
+# Transport level metadata is set by the channel making the forwarded call.
+_HOP_BY_HOP = ('user-agent', 'grpc-', ':')
+
+
+class _Forwarder:
+    def __init__(self, channel: grpc.Channel, timeout: typing.Optional[float]):
+        self._channel = channel
+        self._timeout = timeout
+        self._multi_callables = {}  # type: typing.Dict[str, grpc.UnaryUnaryMultiCallable]
+
+    def _multi_callable(self, method_name: str) -> grpc.UnaryUnaryMultiCallable:
+        multi_callable = self._multi_callables.get(method_name)
+        if multi_callable is None:
+            multi_callable = self._multi_callables[method_name] = self._channel.unary_unary(
+                method_name, request_serializer=bytes, response_deserializer=_identity)
+        return multi_callable
+
+    def __call__(self, g: GRPCInvocation) -> RawHandler:
+        def _forward(data: memoryview, context) -> bytes:
+            metadata = tuple((k, v) for k, v in g.invocation_metadata() or () if not k.startswith(_HOP_BY_HOP))
+            remaining = context.time_remaining() if context is not None else None
+            timeout = self._timeout if remaining is None else min(remaining, self._timeout or remaining)
+            try:
+                return self._multi_callable(g.method_name)(data, timeout=timeout, metadata=metadata)
+            except grpc.RpcError as e:
+                if context is None:
+                    raise
+                context.abort(e.code(), e.details())
+        return _forward
+
+
+def forward(channel: grpc.Channel, timeout: typing.Optional[float] = None) -> RawOperator:
+    return RawOperator(_Forwarder(channel, timeout))
@@ -0,0 +1,43 @@
+import typing
+
+Metadata = typing.Sequence[typing.Tuple[str, typing.Any]]
+
+_NO_DEADLINE = float('inf')
+
+
+def metadata_priority(key: str, default: int = 0) -> typing.Callable[[Metadata], int]:
+    def _priority(metadata: Metadata) -> int:
+        for k, v in metadata or ():
+            if k == key:
+                try:
+                    return int(v)
+                except (TypeError, ValueError):
+                    return default
+        return default
+    return _priority
+
+
+class Scheduling:
+    # Queued invocations run lowest priority first, then earliest deadline first.
+    def __init__(
+            self, priority_fn: typing.Optional[typing.Callable[[Metadata], typing.Any]] = None,
+            order_by_deadline: bool = True,
+            shed_expired: bool = True):
+        self.priority_fn = priority_fn
+        self.order_by_deadline = order_by_deadline
+        self.shed_expired = shed_expired
+
+    @property
+    def prioritized(self) -> bool:
+        return self.priority_fn is not None or self.order_by_deadline
+
+    def deadline(self, rpc_event) -> typing.Optional[float]:
+        # grpc reports the absolute deadline in time.time() seconds, calls without one get an infinite future.
+        deadline = rpc_event.call_details.deadline
+        return None if deadline is None or deadline == _NO_DEADLINE else deadline
+
+    def priority(self, rpc_event, deadline: typing.Optional[float]) -> typing.Tuple[typing.Any, float]:
+        priority = self.priority_fn(rpc_event.invocation_metadata) if self.priority_fn else 0
+        if not self.order_by_deadline or deadline is None:
+            return priority, _NO_DEADLINE
+        return priority, deadline
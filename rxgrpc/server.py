@@ -1,3 +1,4 @@
+import threading
 import typing
 
 import grpc
@@ -7,6 +8,40 @@ from rx import Observable
 from rx.disposable import Disposable
 
 from rxgrpc import thread_pool
+from rxgrpc.admission import AdmissionControl
+from rxgrpc.metrics import Metrics
+from rxgrpc.scheduling import Scheduling
+
+
+def _raw_request_deserializer(deserializer: typing.Callable[[bytes], typing.Any]) -> typing.Callable:
+    def _deserialize(data: bytes) -> thread_pool.RawRequest:
+        return thread_pool.RawRequest(data, deserializer)
+    return _deserialize
+
+
+class _RawRequestGenericRpcHandler(grpc.GenericRpcHandler):
+    # Unary requests keep their serialized bytes, the invocation deserializes them when a message is first needed.
+    def __init__(self, delegate: grpc.GenericRpcHandler):
+        self._delegate = delegate
+        self._wrapped = {}  # type: typing.Dict[str, typing.Tuple[grpc.RpcMethodHandler, grpc.RpcMethodHandler]]
+
+    def service(self, handler_call_details: grpc.HandlerCallDetails) -> typing.Optional[grpc.RpcMethodHandler]:
+        method_handler = self._delegate.service(handler_call_details)
+        if method_handler is None or method_handler.request_streaming or method_handler.request_deserializer is None:
+            return method_handler
+        cached = self._wrapped.get(handler_call_details.method)
+        if cached and cached[0] is method_handler:
+            return cached[1]
+        if method_handler.response_streaming:
+            factory, behaviour = grpc.unary_stream_rpc_method_handler, method_handler.unary_stream
+        else:
+            factory, behaviour = grpc.unary_unary_rpc_method_handler, method_handler.unary_unary
+        wrapped = factory(
+            behaviour,
+            request_deserializer=_raw_request_deserializer(method_handler.request_deserializer),
+            response_serializer=method_handler.response_serializer)
+        self._wrapped[handler_call_details.method] = method_handler, wrapped
+        return wrapped
 
 
 class GRPCObservableServer(thread_pool.GRPCObservable):
@@ -18,11 +53,13 @@ class GRPCObservableServer(thread_pool.GRPCObservable):
     def grpc_pipe(
             self, *operators: typing.Callable[[Observable], Observable],
             method_name: typing.Optional[str] = None,
-            method: typing.Optional[MethodDescriptor] = None):
+            method: typing.Optional[MethodDescriptor] = None,
+            parallelism: int = 1,
+            ordered: bool = True):
         if bool(method_name) == bool(method):
             raise ValueError('You must specify either method_name or method')
         return self._grpc_observable_delegate.grpc_pipe(
-            *operators, method_name=method_name, method=method)
+            *operators, method_name=method_name, method=method, parallelism=parallelism, ordered=ordered)
 
     def grpc_subscribe(self) -> Disposable:
         if self._disposable:
@@ -51,6 +88,24 @@ class GRPCObservableServer(thread_pool.GRPCObservable):
             method_name=method_name, method=method
         )
 
+    def queue_depth(
+            self, method_name: typing.Optional[str] = None,
+            method: typing.Optional[MethodDescriptor] = None) -> int:
+        if method:
+            method_name = self._grpc_observable_delegate._get_method_name(method=method)
+        return self._grpc_observable_delegate.queue_depth(method_name)
+
+    def expired(
+            self, method_name: typing.Optional[str] = None,
+            method: typing.Optional[MethodDescriptor] = None) -> int:
+        if method:
+            method_name = self._grpc_observable_delegate._get_method_name(method=method)
+        return self._grpc_observable_delegate.expired(method_name)
+
+    @property
+    def metrics(self) -> typing.Optional[Metrics]:
+        return getattr(self._grpc_observable_delegate, 'metrics', None)
+
     def add_insecure_port(self, address: str):
         self.server.add_insecure_port(address)
 
@@ -61,13 +116,38 @@ class GRPCObservableServer(thread_pool.GRPCObservable):
         self.grpc_subscribe()
         self.server.start()
 
-    def stop(self, grace_time_secs: typing.Optional[float] = None):
-        self.server.stop(grace_time_secs)
+    def stop(self, grace_time_secs: typing.Optional[float] = None) -> threading.Event:
+        server_stopped = self.server.stop(grace_time_secs)
+        worker_pool = getattr(self._grpc_observable_delegate, 'worker_pool', None)
+        if worker_pool is None:
+            return server_stopped
+        stopped = threading.Event()
+
+        def _shutdown():
+            # What is still queued belongs to calls grpc has cancelled, the workers finish it and exit.
+            server_stopped.wait()
+            worker_pool.shutdown()
+            stopped.set()
+
+        threading.Thread(target=_shutdown, name='rxgrpc-server-stop', daemon=True).start()
+        return stopped
 
     def add_generic_rpc_handlers(self, generic_rpc_handlers):
-        self.server.add_generic_rpc_handlers(generic_rpc_handlers)
+        self.server.add_generic_rpc_handlers(tuple(_RawRequestGenericRpcHandler(h) for h in generic_rpc_handlers))
 
 
-def create_server(protobuf_module, max_workers: int) -> GRPCObservableServer:
-    tp = thread_pool.create(protobuf_module, max_workers)
-    return GRPCObservableServer(grpc.server(tp), tp)
+def create_server(
+        protobuf_module, max_workers: int,
+        method_quotas: typing.Optional[typing.Dict[str, int]] = None,
+        method_weights: typing.Optional[typing.Dict[str, int]] = None,
+        admission_control: typing.Optional[AdmissionControl] = None,
+        collect_metrics: bool = False,
+        options: typing.Optional[typing.Sequence[typing.Tuple[str, typing.Any]]] = None,
+        scheduling: typing.Optional[Scheduling] = None,
+        invocation_pool_size: int = 0,
+        callback_executor=None) -> GRPCObservableServer:
+    tp = thread_pool.create(
+        protobuf_module, max_workers, method_quotas=method_quotas, method_weights=method_weights,
+        admission_control=admission_control, collect_metrics=collect_metrics, scheduling=scheduling,
+        invocation_pool_size=invocation_pool_size, callback_executor=callback_executor)
+    return GRPCObservableServer(grpc.server(tp, options=options), tp)
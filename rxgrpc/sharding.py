@@ -0,0 +1,184 @@
+import collections
+import functools
+import itertools
+import logging
+import threading
+import typing
+
+import grpc
+import rx
+from rx import Observable, operators as orig_operators
+from rx.core import Observer
+from rx.core.abc import Scheduler
+from rx.disposable import CompositeDisposable
+
+from rxgrpc.thread_pool import GRPCInvocation
+
+_LOGGER = logging.getLogger('rxgrpc.sharding')
+
+_MASK = 0xffffffffffffffff
+
+
+def jump_hash(key: int, buckets: int) -> int:
+    # Lamping & Veach: growing from n to n + 1 buckets only moves 1 / (n + 1) of the keys.
+    b, j = -1, 0
+    key &= _MASK
+    while j < buckets:
+        b = j
+        key = (key * 2862933555777941757 + 1) & _MASK
+        j = int((b + 1) * (float(1 << 31) / float((key >> 33) + 1)))
+    return b
+
+
+class _Lane:
+    __slots__ = ('observer', 'queue', 'draining')
+
+    def __init__(self):
+        self.observer = None  # type: typing.Optional[Observer]
+        self.queue = collections.deque()  # type: typing.Deque[typing.Any]
+        self.draining = False
+
+
+_COMPLETED = object()
+
+
+class ShardOperator:
+    def __init__(
+            self, key_fn: typing.Callable[[GRPCInvocation], typing.Hashable],
+            operators: typing.Sequence[typing.Callable[[Observable], Observable]],
+            lanes: int):
+        if lanes <= 0:
+            raise ValueError('lanes must be greater than 0')
+        self.key_fn = key_fn
+        self.operators = tuple(operators)
+        self.lanes = lanes
+        self._lock = threading.Lock()
+        self._depths = [0] * lanes
+        self._processed = [0] * lanes
+
+    def lane(self, key: typing.Hashable) -> int:
+        return jump_hash(hash(key), self.lanes)
+
+    def depths(self) -> typing.List[int]:
+        with self._lock:
+            return list(self._depths)
+
+    def processed(self) -> typing.List[int]:
+        with self._lock:
+            return list(self._processed)
+
+    def _enqueued(self, lane: int):
+        with self._lock:
+            self._depths[lane] += 1
+
+    def _dequeued(self, lane: int):
+        with self._lock:
+            self._depths[lane] -= 1
+            self._processed[lane] += 1
+
+    def __call__(self, source: Observable) -> Observable:
+        # noinspection PyUnusedLocal
+        def _subscribe(observer: Observer, subscribe_scheduler: typing.Optional[Scheduler] = None):
+            emit_lock = threading.Lock()
+            lanes = [_Lane() for _ in range(self.lanes)]
+            # Keys are computed in parallel, invocations are handed to the lanes in arrival order.
+            lock = threading.Lock()
+            sequence = itertools.count()
+            routed = {}  # type: typing.Dict[int, typing.Tuple[typing.Optional[int], typing.Any]]
+            next_routed = [0]
+            completed = [0]
+
+            def _emit(g: GRPCInvocation):
+                with emit_lock:
+                    observer.on_next(g)
+
+            def _lane_completed():
+                with emit_lock:
+                    completed[0] += 1
+                    if completed[0] == self.lanes:
+                        observer.on_completed()
+
+            def _lane_source(lane: int) -> Observable:
+                # noinspection PyUnusedLocal
+                def _f(lane_observer: Observer, scheduler: typing.Optional[Scheduler] = None):
+                    lanes[lane].observer = lane_observer
+
+                # noinspection PyTypeChecker
+                return rx.create(_f)
+
+            # Each lane has its own subscription to the operators, so their state is never shared.
+            disposables = [
+                _lane_source(lane).pipe(
+                    orig_operators.do_action(lambda _, lane=lane: self._dequeued(lane)),
+                    *self.operators
+                ).subscribe(Observer(on_next=_emit, on_error=observer.on_error, on_completed=_lane_completed))
+                for lane in range(self.lanes)
+            ]
+
+            def _drain(owned: typing.List[_Lane]):
+                # A lane has no thread of its own, the worker that finds it idle runs it until it is empty again.
+                try:
+                    while owned:
+                        for lane in list(owned):
+                            with lock:
+                                if not lane.queue:
+                                    lane.draining = False
+                                    owned.remove(lane)
+                                    continue
+                                item = lane.queue.popleft()
+                            if item is _COMPLETED:
+                                lane.observer.on_completed()
+                            else:
+                                lane.observer.on_next(item)
+                finally:
+                    # After an error the lanes are left to the next worker that routes an invocation to them.
+                    if owned:
+                        with lock:
+                            for lane in owned:
+                                lane.draining = False
+
+            def _release(n: int, lane: typing.Optional[int], item: typing.Any):
+                owned = []
+                added = []
+                with lock:
+                    routed[n] = lane, item
+                    while next_routed[0] in routed:
+                        lane, item = routed.pop(next_routed[0])
+                        next_routed[0] += 1
+                        if item is None:
+                            continue
+                        for i in range(self.lanes) if lane is None else (lane, ):
+                            lanes[i].queue.append(item)
+                            if lane is not None:
+                                added.append(lane)
+                            if not lanes[i].draining:
+                                lanes[i].draining = True
+                                owned.append(lanes[i])
+                for lane in added:
+                    self._enqueued(lane)
+                _drain(owned)
+
+            def _route(n: int, g: GRPCInvocation):
+                try:
+                    lane = self.lane(self.key_fn(g))
+                except Exception:
+                    _LOGGER.exception('Error computing the shard key')
+                    _release(n, None, None)
+                    g.reject(grpc.StatusCode.INTERNAL, 'Error computing the shard key')
+                    return
+                _release(n, lane, g)
+
+            # key_fn may read the request, so every invocation computes its key on a worker (see deferred.on_workers)
+            # before it is routed to its lane.
+            def _dispatch(g: GRPCInvocation):
+                g.defer(functools.partial(_route, next(sequence)))
+
+            def _completed():
+                _release(next(sequence), None, _COMPLETED)
+
+            disposables.append(
+                source.subscribe(Observer(on_next=_dispatch, on_error=observer.on_error, on_completed=_completed)))
+            return CompositeDisposable(*disposables)
+
+        # noinspection PyTypeChecker
+        return rx.create(_subscribe)
@@ -0,0 +1,92 @@
+import asyncio
+import itertools
+import time
+import typing
+
+T = typing.TypeVar('T')
+
+
+def buffer_with_count(iterator: typing.Iterator[T], count: int) -> typing.Iterator[typing.List[T]]:
+    while True:
+        buffer = list(itertools.islice(iterator, count))
+        if not buffer:
+            return
+        yield buffer
+
+
+async def async_buffer_with_count(
+        iterator: typing.AsyncIterator[T], count: int) -> typing.AsyncIterator[typing.List[T]]:
+    buffer = []
+    async for element in iterator:
+        buffer.append(element)
+        if len(buffer) == count:
+            yield buffer
+            buffer = []
+    if buffer:
+        yield buffer
+
+
+def window_with_count(iterator: typing.Iterator[T], count: int) -> typing.Iterator[typing.Iterator[T]]:
+    for first in iterator:
+        window = itertools.chain((first, ), itertools.islice(iterator, count - 1))
+        yield window
+        # Skip whatever the consumer left in the window, so the next one starts at the right element.
+        for _ in window:
+            pass
+
+
+class _AsyncWindow:
+    def __init__(self, first, iterator: typing.AsyncIterator, count: int):
+        self._first = [first]
+        self._iterator = iterator
+        self._remaining = count - 1
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self._first:
+            return self._first.pop()
+        if self._remaining <= 0:
+            raise StopAsyncIteration
+        self._remaining -= 1
+        try:
+            return await self._iterator.__anext__()
+        except StopAsyncIteration:
+            self._remaining = 0
+            raise
+
+
+async def async_window_with_count(
+        iterator: typing.AsyncIterator[T], count: int) -> typing.AsyncIterator[typing.AsyncIterator[T]]:
+    while True:
+        try:
+            first = await iterator.__anext__()
+        except StopAsyncIteration:
+            return
+        window = _AsyncWindow(first, iterator, count)
+        yield window
+        async for _ in window:
+            pass
+
+
+def throttle(iterator: typing.Iterator[T], max_per_second: float) -> typing.Iterator[T]:
+    interval = 1.0 / max_per_second
+    next_time = time.monotonic()
+    for element in iterator:
+        delay = next_time - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        next_time = max(next_time, time.monotonic() - interval) + interval
+        yield element
+
+
+async def async_throttle(iterator: typing.AsyncIterator[T], max_per_second: float) -> typing.AsyncIterator[T]:
+    interval = 1.0 / max_per_second
+    next_time = time.monotonic()
+    async for element in iterator:
+        delay = next_time - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        next_time = max(next_time, time.monotonic() - interval) + interval
+        yield element
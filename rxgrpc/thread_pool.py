@@ -1,27 +1,49 @@
 import abc
+import inspect
+import itertools
 import logging
+import sys
 import threading
+import time
+import types
 import typing
 from concurrent.futures import thread
 
+import grpc
 import rx
 # noinspection PyPackageRequirements
+from google.protobuf import descriptor_pb2
+# noinspection PyPackageRequirements
 from google.protobuf.descriptor import MethodDescriptor
 from rx import Observable
 from rx.concurrency import ThreadPoolScheduler
 from rx.core import Observer
 from rx.core.abc import Scheduler, Disposable
 from rx.disposable import CompositeDisposable
-from rx.operators import observe_on
+from rx.operators import observe_on, flat_map, to_list
+from rx import operators as rx_operators
+
+from rxgrpc import tracing
+from rxgrpc.admission import AdmissionControl
+from rxgrpc.chain import OperatorChain, EMPTY_CHAIN, DROPPED, Stage, fuse
+from rxgrpc.completion import Completion, _lock_of
+from rxgrpc.metrics import Metrics, MethodMetrics
+from rxgrpc.scheduling import Scheduling
+from rxgrpc.worker_pool import WorkerPool
 
 _LOGGER = logging.getLogger('rxgrpc.thread_pool')
 
 
+_TRACER = tracing.get_tracer(_LOGGER)
+
+
 def _log(msg: str, *a):
     _LOGGER.debug('[Thread %s] %s', threading.current_thread().getName(), msg, *a)
 
 
 class GRPCInvocation(metaclass=abc.ABCMeta):
+    __slots__ = ()
+
     @abc.abstractmethod
     def run(self):
         pass
@@ -30,11 +52,40 @@ class GRPCInvocation(metaclass=abc.ABCMeta):
     def add_done_callback(self, done_callback):
         pass
 
+    @abc.abstractmethod
+    def reject(self, code: grpc.StatusCode, details: str):
+        # Answers the call with an error instead of running it, the invocation must not be passed on after that.
+        pass
+
+    @abc.abstractmethod
+    def defer(self, fn: typing.Callable[['GRPCInvocation'], typing.Any]):
+        # Calls fn with the invocation on a worker of the server, where receiving the request may block.
+        pass
+
     @property
     @abc.abstractmethod
     def result(self):
         pass
 
+    @abc.abstractmethod
+    def compose(self, chain: OperatorChain) -> 'GRPCInvocation':
+        pass
+
+    @abc.abstractmethod
+    def with_behaviour(self, behaviour: typing.Callable) -> 'GRPCInvocation':
+        pass
+
+    @abc.abstractmethod
+    def compose_response(self, chain: OperatorChain) -> 'GRPCInvocation':
+        pass
+
+    @property
+    @abc.abstractmethod
+    def response_serializer(self) -> typing.Optional[typing.Callable[[typing.Any], bytes]]:
+        # None when the call's serialization cannot be changed, otherwise the invocation also offers
+        # with_response_serializer and with_raw_request.
+        pass
+
     @abc.abstractmethod
     def map(self, transformer: typing.Callable[[typing.Any], typing.Any]) -> 'GRPCInvocation':
         pass
@@ -47,73 +98,386 @@ class GRPCInvocation(metaclass=abc.ABCMeta):
     def input_message(self) -> typing.Any:
         pass
 
+    @abc.abstractmethod
+    def request_bytes(self) -> typing.Optional[bytes]:
+        pass
+
+    @property
+    @abc.abstractmethod
+    def method_name(self) -> str:
+        pass
+
+    @abc.abstractmethod
+    def invocation_metadata(self) -> typing.Sequence[typing.Tuple[str, typing.Any]]:
+        pass
+
+    @property
+    @abc.abstractmethod
+    def request_streaming(self) -> bool:
+        pass
+
+    @property
+    @abc.abstractmethod
+    def response_streaming(self) -> bool:
+        pass
+
+
+_UNSET = object()
+# Stands for a request that could not be deserialized.
+_MALFORMED = object()
+# Stands for a unary request that an operator filtered out.
+_FILTERED = object()
+# Filtered out requests and responses fail the call with this status, on both the sync and the asyncio server.
+_FILTERED_OUT = grpc.StatusCode.NOT_FOUND
+# grpc never submits keyword arguments, every invocation shares this instead of keeping its own empty dict.
+_NO_KWARGS = types.MappingProxyType({})
+
+
+class RawRequest:
+    __slots__ = ('data', 'deserializer')
+
+    def __init__(self, data: bytes, deserializer: typing.Callable[[bytes], typing.Any]):
+        self.data = data
+        self.deserializer = deserializer
+
+    def decode(self) -> typing.Any:
+        try:
+            return self.deserializer(self.data)
+        except Exception:
+            _LOGGER.exception('Exception deserializing request!')
+            return _MALFORMED
+
+
+def _serialized(message: typing.Any) -> typing.Optional[bytes]:
+    if message is None:
+        return None
+    return message.SerializeToString(deterministic=True)
+
+
+def _through_response_chain(
+        behaviour: typing.Callable, chain: OperatorChain, response_streaming: bool) -> typing.Callable:
+    if response_streaming:
+        def _behaviour(request, context):
+            responses = behaviour(request, context)
+            if hasattr(responses, '__aiter__'):
+                return chain.apply_aiter(responses)
+            return chain.apply_iter(responses)
+        return _behaviour
+
+    def _apply(response, context):
+        response = chain.apply(response)
+        if response is DROPPED:
+            # On grpc.aio abort is a coroutine, the caller awaits it as the behaviour result.
+            return context.abort(_FILTERED_OUT, 'Response filtered out')
+        return response
+
+    async def _apply_async(response, context):
+        response = _apply(await response, context)
+        if inspect.isawaitable(response):
+            response = await response
+        return response
+
+    def _behaviour(request, context):
+        response = behaviour(request, context)
+        if inspect.isawaitable(response):
+            return _apply_async(response, context)
+        return _apply(response, context)
+    return _behaviour
+
+
+class _InvocationState(Completion):
+    __slots__ = (
+        'request_streaming', 'response_streaming', 'argument', 'request_data',
+        'method_metrics', 'submitted', 'dequeued', 'piped', 'pool', 'holds', 'registrant', 'registered_callback')
+
+    def reset(
+            self, request_streaming: bool = False, response_streaming: bool = False,
+            method_metrics: typing.Optional[MethodMetrics] = None):
+        self.result = None
+        self.done = False
+        self.done_callbacks = None  # type: typing.Optional[typing.List[typing.Callable]]
+        self.callback_executor = None
+        self.request_streaming = request_streaming
+        self.response_streaming = response_streaming
+        self.argument = _UNSET
+        self.request_data = None
+        self.method_metrics = method_metrics
+        self.submitted = self.dequeued = self.piped = None
+        self.pool = None  # type: typing.Optional[_ReactiveThreadPool]
+        # Pooled states are recycled once the worker and grpc are both done with them.
+        self.holds = 0
+        self.registrant = None  # type: typing.Optional[_GRPCInvocation]
+        self.registered_callback = None  # type: typing.Optional[typing.Callable]
+
+    __init__ = reset
+
+
+class _StatePool:
+    # A free list of invocation states. list.pop and list.append are atomic, so workers and the polling thread
+    # share it without a lock.
+    __slots__ = ('max_size', '_free', 'release_invocation', 'answer_and_release')
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._free = []  # type: typing.List[_InvocationState]
+        # Bound once, they are added as done callbacks to every call.
+        self.release_invocation = self._release_invocation
+        self.answer_and_release = self._answer_and_release
+
+    def __len__(self) -> int:
+        return len(self._free)
+
+    def acquire(
+            self, request_streaming: bool, response_streaming: bool,
+            method_metrics: typing.Optional[MethodMetrics]) -> _InvocationState:
+        try:
+            invocation_state = self._free.pop()
+        except IndexError:
+            return _InvocationState(request_streaming, response_streaming, method_metrics)
+        invocation_state.request_streaming = request_streaming
+        invocation_state.response_streaming = response_streaming
+        invocation_state.method_metrics = method_metrics
+        return invocation_state
+
+    def release(self, invocation_state: _InvocationState):
+        if len(self._free) < self.max_size:
+            # Clearing right away lets the request and the result go before the state is reused.
+            invocation_state.reset()
+            self._free.append(invocation_state)
+
+    def _release_invocation(self, grpc_invocation: '_GRPCInvocation'):
+        invocation_state = grpc_invocation._invocation_state
+        with _lock_of(invocation_state):
+            invocation_state.holds -= 1
+            if invocation_state.holds:
+                return
+        self.release(invocation_state)
+
+    def _answer_and_release(self, grpc_invocation: '_GRPCInvocation'):
+        # One callback for both, so that a callback executor cannot recycle the state while grpc's callback runs.
+        try:
+            grpc_invocation._invocation_state.registered_callback(grpc_invocation)
+        except Exception:
+            _LOGGER.exception('Error running done callback')
+        self._release_invocation(grpc_invocation)
+
 
 class _GRPCInvocation(GRPCInvocation):
-    def __init__(self, fun: callable, rpc_event, state, behaviour, argument_thunk, a, kw):
+    __slots__ = (
+        'fun', 'rpc_event', 'state', 'behaviour', 'argument_thunk', 'a', 'kw', '_chain', '_invocation_state',
+        '_message')
+
+    def __init__(
+            self, fun: callable, rpc_event, state, behaviour, argument_thunk, a, kw,
+            chain: OperatorChain = EMPTY_CHAIN, invocation_state: typing.Optional[_InvocationState] = None):
         self.fun = fun
         self.rpc_event = rpc_event
         self.state = state
         self.behaviour = behaviour
         self.argument_thunk = argument_thunk
         self.a = a
-        self.kw = kw
-        self._result = None
-        self._done_callbacks = []
-        self._done = False
-        self._transform = lambda d: d
-        self._filter = lambda d: True
+        self.kw = kw or _NO_KWARGS
+        self._chain = chain
+        self._invocation_state = invocation_state or _InvocationState()
+        self._message = _UNSET
 
-    def map(self, transformer: typing.Callable[[typing.Any], typing.Any]) -> GRPCInvocation:
-        result = _GRPCInvocation(
+    def compose(self, chain: OperatorChain) -> GRPCInvocation:
+        return type(self)(
             self.fun, self.rpc_event, self.state,
-            self.behaviour, self.argument_thunk, self.a, self.kw)
-        result._done_callbacks.extend(self._done_callbacks)
-        result._transform = transformer
+            self.behaviour, self.argument_thunk, self.a, self.kw,
+            chain=self._chain.then(chain), invocation_state=self._invocation_state)
+
+    def with_behaviour(self, behaviour: typing.Callable) -> GRPCInvocation:
+        result = type(self)(
+            self.fun, self.rpc_event, self.state,
+            behaviour, self.argument_thunk, self.a, self.kw,
+            chain=self._chain, invocation_state=self._invocation_state)
+        result._message = self._message
         return result
 
-    def filter(self, filter_function: typing.Callable[[typing.Any], bool]) -> GRPCInvocation:
-        result = _GRPCInvocation(
+    def compose_response(self, chain: OperatorChain) -> GRPCInvocation:
+        return self.with_behaviour(_through_response_chain(self.behaviour, chain, self.response_streaming))
+
+    @property
+    def response_serializer(self) -> typing.Optional[typing.Callable[[typing.Any], bytes]]:
+        # grpc submits its response functions with (request_deserializer, response_serializer).
+        return self.a[1] if len(self.a) > 1 else None
+
+    def with_response_serializer(self, serializer: typing.Callable[[typing.Any], bytes]) -> GRPCInvocation:
+        result = type(self)(
             self.fun, self.rpc_event, self.state,
-            self.behaviour, self.argument_thunk, self.a, self.kw)
-        result._done_callbacks.extend(self._done_callbacks)
-        result._filter = filter_function
+            self.behaviour, self.argument_thunk, self.a[:1] + (serializer, ) + self.a[2:], self.kw,
+            chain=self._chain, invocation_state=self._invocation_state)
+        result._message = self._message
         return result
 
+    def with_raw_request(self) -> GRPCInvocation:
+        if self._invocation_state.request_streaming:
+            raise ValueError('Only unary requests can be handed over as bytes')
+        return _RawGRPCInvocation(
+            self.fun, self.rpc_event, self.state,
+            self.behaviour, self.argument_thunk, self.a, self.kw,
+            chain=self._chain, invocation_state=self._invocation_state)
+
+    def map(self, transformer: typing.Callable[[typing.Any], typing.Any]) -> GRPCInvocation:
+        return self.compose(OperatorChain((Stage.map(transformer), )))
+
+    def filter(self, filter_function: typing.Callable[[typing.Any], bool]) -> GRPCInvocation:
+        return self.compose(OperatorChain((Stage.filter(filter_function), )))
+
     def run(self):
+        invocation_state = self._invocation_state
         try:
-            _log('grpc invocation run')
-            self._result = self.fun(
-                self.rpc_event, self.state, self.behaviour,
-                self.input_message,  # the new argument thunk
-                *self.a, **self.kw)
-            _log('grpc invocation run complete, result')
-            self._done = True
-            self._run_callbacks()
+            method_metrics = invocation_state.method_metrics
+            if method_metrics is not None:
+                started = time.perf_counter()
+            if _TRACER.enabled:
+                _TRACER.trace('run', invocation_state)
+            if invocation_state.request_streaming:
+                behaviour, argument_thunk = self.behaviour, self.input_message
+            else:
+                behaviour, argument_thunk = self._unary_behaviour, self._unary_argument
+            result = self.fun(self.rpc_event, self.state, behaviour, argument_thunk, *self.a, **self.kw)
+            if _TRACER.enabled:
+                _TRACER.trace('run complete', invocation_state)
+            if method_metrics is None:
+                invocation_state.complete(result, self)
+            else:
+                finished = time.perf_counter()
+                # Completing may recycle a pooled state, its timestamps are read before.
+                submitted = invocation_state.submitted
+                dequeued = invocation_state.dequeued
+                piped = invocation_state.piped
+                invocation_state.complete(result, self)
+                method_metrics.record_invocation(submitted, dequeued, piped, started, finished, time.perf_counter())
         except Exception:
             _LOGGER.exception('Error running task')
+            invocation_state.complete(None, self)
             raise
 
+    def _unary_argument(self) -> typing.Any:
+        # grpc answers nothing when the argument thunk returns None, malformed and filtered out requests have to
+        # reach the behaviour. None is left for requests that never arrived.
+        message = self.input_message()
+        if message is None:
+            argument = self._invocation_state.argument
+            if argument is _MALFORMED:
+                return _MALFORMED
+            if argument is not None:
+                return _FILTERED
+        return message
+
+    def _unary_behaviour(self, request, context):
+        if request is _MALFORMED:
+            context.abort(grpc.StatusCode.INTERNAL, 'Exception deserializing request!')
+        if request is _FILTERED:
+            context.abort(_FILTERED_OUT, 'Request filtered out')
+        return self.behaviour(request, context)
+
+    def reject(self, code: grpc.StatusCode, details: str):
+        pool = self._invocation_state.pool
+        if pool is None:
+            _aborted(self, code, details).run()
+        else:
+            pool._reject(self, code, details)
+
+    def defer(self, fn: typing.Callable[[GRPCInvocation], typing.Any]):
+        pool = self._invocation_state.pool
+        if pool is None:
+            fn(self)
+        else:
+            pool._defer(self, fn)
+
     def add_done_callback(self, done_callback):
-        _log('adding callback')
-        self._done_callbacks.append(done_callback)
-        if self._done:
-            self._run_callbacks()
+        invocation_state = self._invocation_state
+        if _TRACER.enabled:
+            _TRACER.trace('add done callback', invocation_state)
+        if invocation_state.registrant is self:
+            # grpc adds its callback to the invocation submit returned once submit is over, possibly after the call
+            # completed. A pooled state is only recycled after that callback ran.
+            invocation_state.registrant = None
+            invocation_state.registered_callback = done_callback
+            invocation_state.add_done_callback(invocation_state.pool.state_pool.answer_and_release, self)
+            return
+        invocation_state.add_done_callback(done_callback, self)
 
     @property
     def result(self):
-        return self._result
+        return self._invocation_state.result
+
+    @property
+    def method_name(self) -> str:
+        method = self.rpc_event.call_details.method
+        return method.decode('utf-8') if isinstance(method, bytes) else method
+
+    def invocation_metadata(self) -> typing.Sequence[typing.Tuple[str, typing.Any]]:
+        return self.rpc_event.invocation_metadata
+
+    @property
+    def request_streaming(self) -> bool:
+        return self._invocation_state.request_streaming
+
+    @property
+    def response_streaming(self) -> bool:
+        return self._invocation_state.response_streaming
 
     def input_message(self) -> typing.Any:
-        argument_thunk = self.argument_thunk()
-        try:
-            return map(self._transform, filter(self._filter, iter(argument_thunk)))
-        except TypeError:
-            return self._transform(argument_thunk) if self._filter(argument_thunk) else None
+        message = self._message
+        if message is not _UNSET:
+            return message
+        invocation_state = self._invocation_state
+        argument = invocation_state.argument
+        if argument is _UNSET:
+            argument = self._receive()
+        elif type(argument) is RawRequest:
+            argument = invocation_state.argument = argument.decode()
+        if argument is _MALFORMED:
+            return None
+        if not self._chain:
+            return argument
+        if invocation_state.request_streaming:
+            return self._chain.apply_iter(argument)
+        if argument is None:
+            return None
+        message = self._chain.apply(argument)
+        message = self._message = None if message is DROPPED else message
+        return message
+
+    def request_bytes(self) -> typing.Optional[bytes]:
+        if self._invocation_state.request_streaming:
+            return None
+        if self._invocation_state.argument is _UNSET:
+            self._receive(decode=False)
+        data = self._invocation_state.request_data
+        return data if data is not None else _serialized(self._invocation_state.argument)
+
+    def _receive(self, decode: bool = True) -> typing.Any:
+        # grpc's argument thunk receives and deserializes the request, so it is evaluated once per call
+        # and shared by every invocation derived from it. Undecoded requests stay a RawRequest until first used.
+        invocation_state = self._invocation_state
+        argument = self.argument_thunk()
+        if type(argument) is RawRequest:
+            invocation_state.request_data = argument.data
+            if decode:
+                argument = argument.decode()
+        invocation_state.argument = argument
+        return argument
+
+
+class _RawGRPCInvocation(_GRPCInvocation):
+    __slots__ = ()
+
+    # The behaviour gets a view of the serialized request, which is only deserialized if someone asks for the message.
+    def input_message(self) -> typing.Any:
+        # grpc's thunk returns None when the request never arrived, grpc then answers nothing itself.
+        data = self.request_bytes()
+        return memoryview(data) if data is not None else None
 
-    def _run_callbacks(self):
-        _log('running callbacks')
-        for c in self._done_callbacks:
-            c(self)
+    def with_raw_request(self) -> GRPCInvocation:
+        return self
+
+    def decoded_message(self) -> typing.Any:
+        return super().input_message()
 
 
 class DuckTypingThreadPool(metaclass=abc.ABCMeta):
@@ -127,7 +491,9 @@ class GRPCObservable(metaclass=abc.ABCMeta):
     def grpc_pipe(
             self, *operators: typing.Callable[[Observable], Observable],
             method_name: typing.Optional[str] = None,
-            method: typing.Optional[MethodDescriptor] = None) -> Observable:
+            method: typing.Optional[MethodDescriptor] = None,
+            parallelism: int = 1,
+            ordered: bool = True) -> Observable:
         pass
 
     @abc.abstractmethod
@@ -148,40 +514,147 @@ class GRPCObservable(metaclass=abc.ABCMeta):
         pass
 
 
-class _ReactiveThreadPool(GRPCObservable, DuckTypingThreadPool):
-    def __init__(self, protobuf_module, max_workers: int):
+class _MethodHandle:
+    __slots__ = ('name', 'path', 'client_streaming', 'server_streaming', 'observers', 'dispatch')
+
+    def __init__(self, name: str, client_streaming: bool, server_streaming: bool):
+        self.name = sys.intern(name)
+        self.path = name.encode()
+        self.client_streaming = client_streaming
+        self.server_streaming = server_streaming
+        self.observers = []  # type: typing.List[Observer]
+        self.dispatch = self._dispatcher(self.observers)
+
+    @staticmethod
+    def _dispatcher(observers: typing.List[Observer]) -> typing.Callable[[GRPCInvocation], None]:
+        def _dispatch(grpc_invocation: GRPCInvocation):
+            for observer in observers:
+                observer.on_next(grpc_invocation)
+        return _dispatch
+
+
+_REJECTED = '<rejected>'
+
+
+def _aborting(code: grpc.StatusCode, details: str, response_streaming: bool = False) -> typing.Callable:
+    # The sync context raises from abort(), the asyncio one returns a coroutine that has to be awaited.
+    async def _aborted_stream(aborted):
+        await aborted
+        yield
+
+    # noinspection PyUnusedLocal
+    def _behaviour(request, context):
+        aborted = context.abort(code, details)
+        return _aborted_stream(aborted) if response_streaming else aborted
+    return _behaviour
+
+
+class _Resequencer:
+    def __init__(self, on_next: typing.Callable[[typing.Any], None]):
+        self._on_next = on_next
+        self._lock = threading.Lock()
+        self._next_sequence = 0
+        self._pending = {}  # type: typing.Dict[int, typing.List[typing.Any]]
+
+    def push(self, sequence: int, items: typing.List[typing.Any]):
+        with self._lock:
+            self._pending[sequence] = items
+            while self._next_sequence in self._pending:
+                for item in self._pending.pop(self._next_sequence):
+                    self._on_next(item)
+                self._next_sequence += 1
+
+
+def _mark_dequeued(grpc_invocation: GRPCInvocation):
+    invocation_state = getattr(grpc_invocation, '_invocation_state', None)
+    if getattr(invocation_state, 'method_metrics', None) is not None:
+        invocation_state.dequeued = time.perf_counter()
+
+
+def _parallel_pipe(
+        operators: typing.Sequence[typing.Callable[[Observable], Observable]],
+        parallelism: int, ordered: bool) -> typing.Callable[[Observable], Observable]:
+    def _f(source: Observable) -> Observable:
+        # noinspection PyUnusedLocal
+        def _subscribe(observer: Observer, scheduler: typing.Optional[Scheduler] = None):
+            # Lanes only run operators; they are not taken from the worker pool, so operators cannot starve servicers.
+            lanes = ThreadPoolScheduler(parallelism)
+
+            def _lane(grpc_invocation: GRPCInvocation) -> Observable:
+                return rx.of(grpc_invocation).pipe(
+                    observe_on(lanes), rx_operators.do_action(_mark_dequeued), *operators)
+
+            if not ordered:
+                return source.pipe(flat_map(_lane)).subscribe(observer)
+
+            resequencer = _Resequencer(observer.on_next)
+            sequence = itertools.count()
+
+            def _ordered_lane(grpc_invocation: GRPCInvocation) -> Observable:
+                n = next(sequence)
+                return _lane(grpc_invocation).pipe(to_list(), rx_operators.map(lambda items: (n, items)))
+
+            return source.pipe(flat_map(_ordered_lane)).subscribe(
+                Observer(
+                    on_next=lambda t: resequencer.push(*t),
+                    on_error=observer.on_error,
+                    on_completed=observer.on_completed
+                )
+            )
+
+        # noinspection PyTypeChecker
+        return rx.create(_subscribe)
+    return _f
+
+
+class _ReactiveMethods(GRPCObservable):
+    def __init__(self, protobuf_module):
         self.observers = {}  # type: typing.Dict[str, typing.List[Observer]]
         self.observables = {}  # type: typing.Dict[str, Observable]
         self._observable_to_be_subscribed = {}  # type: typing.Dict[str, Observable]
+        self._handles = {}  # type: typing.Dict[bytes, _MethodHandle]
+        self._handles_by_name = {}  # type: typing.Dict[str, _MethodHandle]
 
         pb_descriptor = protobuf_module.DESCRIPTOR
+        streaming = self._get_streaming_flags(pb_descriptor)
         for service in pb_descriptor.services_by_name.values():
             for method in service.methods:
                 full_method_name = self._get_method_name(method=method)
+                handle = _MethodHandle(full_method_name, *streaming[full_method_name])
+                self._handles[handle.path] = handle
+                self._handles_by_name[handle.name] = handle
+                self.observers[handle.name] = handle.observers
                 self._add_observer(full_method_name)
-                self._observable_to_be_subscribed[full_method_name] = observe_on(ThreadPoolScheduler(max_workers))(
+                self._observable_to_be_subscribed[full_method_name] = \
                     self.get_grpc_observable(method_name=full_method_name)
-                )
 
     def grpc_subscribe(self) -> Disposable:
+        tracing.refresh()
         disposables = []
-        for observable in self._observable_to_be_subscribed.values():
-            disposables.append(observable.subscribe(
-                Observer(
-                    on_next=lambda grpc_invocation: grpc_invocation.run(),
-                    on_error=lambda e: _log('Error: ', e)
-                )
-            ))
+        for method_name, observable in self._observable_to_be_subscribed.items():
+            disposables.append(self._subscribe(self._handles_by_name[method_name], observable))
         self._observable_to_be_subscribed.clear()
         return CompositeDisposable(*disposables)
 
-    def grpc_pipe(self, *operators: typing.Callable[[Observable], Observable], **kw) -> Observable:
-        pipe = self.get_grpc_observable(**kw).pipe(*operators)
+    @abc.abstractmethod
+    def _subscribe(self, handle: _MethodHandle, observable: Observable) -> Disposable:
+        pass
+
+    def grpc_pipe(
+            self, *operators: typing.Callable[[Observable], Observable],
+            parallelism: int = 1, ordered: bool = True, **kw) -> Observable:
+        if parallelism < 1:
+            raise ValueError('parallelism must be greater than 0')
+        operators = fuse(operators)
+        observable = self.get_grpc_observable(**kw)
+        if parallelism == 1:
+            pipe = observable.pipe(*operators)
+        else:
+            pipe = observable.pipe(_parallel_pipe(operators, parallelism, ordered))
         self.set_grpc_observable(pipe, **kw)
         return pipe
 
     def set_grpc_observable(self, new_observable: Observable, **kw):
-        new_observable = observe_on(ThreadPoolScheduler(1))(new_observable)
         method_name = self._get_method_name(**kw)
         if method_name not in self._observable_to_be_subscribed:
             _LOGGER.exception('Method name {} not found, kw: {}'.format(method_name, kw))
@@ -189,13 +662,18 @@ class _ReactiveThreadPool(GRPCObservable, DuckTypingThreadPool):
         self.observables[method_name] = new_observable
         self._observable_to_be_subscribed[method_name] = new_observable
 
-    def submit(self, fun: callable, rpc_event, state, behaviour, argument_thunk, *a, **kw):
-        _log('submit')
-        method = rpc_event.call_details.method.decode()
-        grpc_invocation = _GRPCInvocation(fun, rpc_event, state, behaviour, argument_thunk, a, kw)
-        for observer in self.observers[method]:
-            observer.on_next(grpc_invocation)
-        return grpc_invocation
+    @classmethod
+    def _get_streaming_flags(cls, pb_descriptor) -> typing.Dict[str, typing.Tuple[bool, bool]]:
+        # Older protobuf releases do not expose client_streaming/server_streaming on MethodDescriptor,
+        # the serialized file descriptor always carries them.
+        file_proto = descriptor_pb2.FileDescriptorProto.FromString(pb_descriptor.serialized_pb)
+        result = {}
+        for service in file_proto.service:
+            service_full_name = '.'.join(filter(None, (file_proto.package, service.name)))
+            for method in service.method:
+                result['/{}/{}'.format(service_full_name, method.name)] = \
+                    method.client_streaming, method.server_streaming
+        return result
 
     @classmethod
     def _get_method_name(
@@ -222,12 +700,174 @@ class _ReactiveThreadPool(GRPCObservable, DuckTypingThreadPool):
     def _add_observer(self, path: str):
         # noinspection PyUnusedLocal
         def _f(observer: Observer, scheduler: typing.Optional[Scheduler]):
-            self.observers.setdefault(path, []).append(observer)
+            self.observers[path].append(observer)
 
         # noinspection PyTypeChecker
         self.observables[path] = rx.create(_f)
 
 
-def create(protobuf_module, max_workers: int) \
+class _ReactiveThreadPool(_ReactiveMethods, DuckTypingThreadPool):
+    def __init__(
+            self, protobuf_module, max_workers: int,
+            method_quotas: typing.Optional[typing.Dict[str, int]] = None,
+            method_weights: typing.Optional[typing.Dict[str, int]] = None,
+            admission_control: typing.Optional[AdmissionControl] = None,
+            collect_metrics: bool = False,
+            scheduling: typing.Optional[Scheduling] = None,
+            invocation_pool_size: int = 0,
+            callback_executor=None):
+        super().__init__(protobuf_module)
+        self.worker_pool = WorkerPool(
+            max_workers, method_quotas=method_quotas, method_weights=method_weights,
+            prioritized=bool(scheduling and scheduling.prioritized))
+        self.admission_control = admission_control
+        self.scheduling = scheduling
+        self.metrics = Metrics() if collect_metrics else None
+        self._method_metrics = {
+            name: self.metrics.method(name) for name in self._handles_by_name
+        } if collect_metrics else {}
+        self.callback_executor = callback_executor
+        self.state_pool = _StatePool(invocation_pool_size) if invocation_pool_size > 0 else None
+        self._new_state = self.state_pool.acquire if self.state_pool is not None else _InvocationState
+
+    def _subscribe(self, handle: _MethodHandle, observable: Observable) -> Disposable:
+        method_name = handle.name
+        submit = self.worker_pool.submit
+        if self.state_pool is not None:
+            run = self._run_recycling
+        else:
+            run = self._run if self.admission_control else _GRPCInvocation.run
+
+        scheduling = self.scheduling
+        if scheduling is not None:
+            on_expired = self._expire if scheduling.shed_expired else None
+
+            def _on_next(grpc_invocation: _GRPCInvocation):
+                if self.metrics is not None:
+                    grpc_invocation._invocation_state.piped = time.perf_counter()
+                rpc_event = grpc_invocation.rpc_event
+                deadline = scheduling.deadline(rpc_event)
+                submit(
+                    method_name, run, grpc_invocation, priority=scheduling.priority(rpc_event, deadline),
+                    deadline=deadline if on_expired else None, on_expired=on_expired)
+        elif self.metrics is None:
+            def _on_next(grpc_invocation: _GRPCInvocation):
+                submit(method_name, run, grpc_invocation)
+        else:
+            def _on_next(grpc_invocation: _GRPCInvocation):
+                grpc_invocation._invocation_state.piped = time.perf_counter()
+                submit(method_name, run, grpc_invocation)
+
+        return observable.subscribe(
+            Observer(
+                on_next=_on_next,
+                on_error=lambda e: _log('Error: ', e)
+            )
+        )
+
+    def _run(self, grpc_invocation: '_GRPCInvocation'):
+        # Invocations shed while queued have already been answered by _abort.
+        if self.admission_control.release(grpc_invocation._invocation_state):
+            grpc_invocation.run()
+
+    def _run_recycling(self, grpc_invocation: '_GRPCInvocation'):
+        invocation_state = grpc_invocation._invocation_state
+        if self.admission_control and not self.admission_control.release(invocation_state):
+            # The aborted copy answering a shed invocation shares its state, which is then never recycled.
+            return
+        # The state goes back to the pool after the call's done callbacks and grpc's, invocations must not be used
+        # after that.
+        invocation_state.add_done_callback(self.state_pool.release_invocation, grpc_invocation)
+        grpc_invocation.run()
+
+    def submit(self, fun: callable, rpc_event, state, behaviour, argument_thunk, *a, **kw):
+        handle = self._handles.get(rpc_event.call_details.method)
+        if handle is None:
+            _LOGGER.warning('Method %s is not part of the protobuf module', rpc_event.call_details.method)
+            return self._abort(
+                _GRPCInvocation(fun, rpc_event, state, behaviour, argument_thunk, a, kw),
+                grpc.StatusCode.UNIMPLEMENTED, 'Method not found!')
+        invocation_state = self._new_state(
+            handle.client_streaming, handle.server_streaming, self._method_metrics.get(handle.name))
+        if invocation_state.method_metrics is not None:
+            invocation_state.submitted = time.perf_counter()
+        if self.callback_executor is not None:
+            invocation_state.callback_executor = self.callback_executor
+        if self.state_pool is not None:
+            invocation_state.holds = 2
+        invocation_state.pool = self
+        grpc_invocation = _GRPCInvocation(
+            fun, rpc_event, state, behaviour, argument_thunk, a, kw, invocation_state=invocation_state)
+        if self.admission_control:
+            admitted, shed = self.admission_control.admit(
+                handle.name, grpc_invocation._invocation_state, grpc_invocation)
+            for shed_invocation in shed:
+                self._abort(shed_invocation, grpc.StatusCode.RESOURCE_EXHAUSTED, 'Request queue is full')
+            if not admitted:
+                return self._abort(grpc_invocation, grpc.StatusCode.RESOURCE_EXHAUSTED, 'Request queue is full')
+        if _TRACER.enabled:
+            _TRACER.trace('submit', grpc_invocation._invocation_state)
+        handle.dispatch(grpc_invocation)
+        if self.state_pool is not None:
+            invocation_state.registrant = grpc_invocation
+        return grpc_invocation
+
+    def queue_depth(self, method_name: typing.Optional[str] = None) -> int:
+        if self.admission_control:
+            return self.admission_control.depth(method_name)
+        return self.worker_pool.queued(method_name)
+
+    def expired(self, method_name: typing.Optional[str] = None) -> int:
+        return self.worker_pool.expired(method_name)
+
+    def _expire(self, grpc_invocation: '_GRPCInvocation'):
+        # Runs on the worker in place of the invocation, whose caller has already given up on it.
+        if self.admission_control and not self.admission_control.release(grpc_invocation._invocation_state):
+            return
+        _LOGGER.debug('Shedding expired invocation of %s', grpc_invocation.rpc_event.call_details.method)
+        _aborted(grpc_invocation, grpc.StatusCode.DEADLINE_EXCEEDED, 'Deadline expired while queued').run()
+
+    def _defer(self, grpc_invocation: '_GRPCInvocation', fn: typing.Callable[[GRPCInvocation], typing.Any]):
+        # Deferred tasks share the method's queue with the invocations, so they are ordered by the same key.
+        scheduling = self.scheduling
+        if scheduling is None:
+            self.worker_pool.submit(grpc_invocation.method_name, fn, grpc_invocation)
+        else:
+            rpc_event = grpc_invocation.rpc_event
+            self.worker_pool.submit(
+                grpc_invocation.method_name, fn, grpc_invocation,
+                priority=scheduling.priority(rpc_event, scheduling.deadline(rpc_event)))
+
+    def _reject(self, grpc_invocation: '_GRPCInvocation', code: grpc.StatusCode, details: str) -> GRPCInvocation:
+        # Rejected inside the pipe, the invocation still holds the admission entry it was given in submit.
+        if self.admission_control and not self.admission_control.release(grpc_invocation._invocation_state):
+            # Shed while it was in the pipe, the call has already been answered.
+            return grpc_invocation
+        return self._abort(grpc_invocation, code, details)
+
+    def _abort(self, grpc_invocation: '_GRPCInvocation', code: grpc.StatusCode, details: str) -> GRPCInvocation:
+        self.worker_pool.submit(_REJECTED, _aborted(grpc_invocation, code, details).run)
+        return grpc_invocation
+
+
+def _aborted(grpc_invocation: _GRPCInvocation, code: grpc.StatusCode, details: str) -> _GRPCInvocation:
+    return _GRPCInvocation(
+        grpc_invocation.fun, grpc_invocation.rpc_event, grpc_invocation.state,
+        _aborting(code, details), grpc_invocation.argument_thunk, grpc_invocation.a, grpc_invocation.kw,
+        invocation_state=grpc_invocation._invocation_state)
+
+
+def create(
+        protobuf_module, max_workers: int,
+        method_quotas: typing.Optional[typing.Dict[str, int]] = None,
+        method_weights: typing.Optional[typing.Dict[str, int]] = None,
+        admission_control: typing.Optional[AdmissionControl] = None,
+        collect_metrics: bool = False,
+        scheduling: typing.Optional[Scheduling] = None,
+        invocation_pool_size: int = 0,
+        callback_executor=None) \
         -> typing.Union[thread.ThreadPoolExecutor, GRPCObservable]:
-    return _ReactiveThreadPool(protobuf_module, max_workers)
+    return _ReactiveThreadPool(
+        protobuf_module, max_workers, method_quotas=method_quotas, method_weights=method_weights,
+        admission_control=admission_control, collect_metrics=collect_metrics, scheduling=scheduling,
+        invocation_pool_size=invocation_pool_size, callback_executor=callback_executor)
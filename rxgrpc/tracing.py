@@ -0,0 +1,78 @@
+import collections
+import logging
+import threading
+import time
+import typing
+
+TraceEvent = typing.NamedTuple('TraceEvent', [
+    ('timestamp', float),
+    ('event', str),
+    ('invocation_id', int),
+    ('thread_id', int),
+])
+
+
+class Tracer:
+    __slots__ = ('logger', 'enabled', '_debug', '_events')
+
+    def __init__(self, logger: logging.Logger):
+        self.logger = logger
+        self.enabled = False
+        self._debug = False
+        self._events = None  # type: typing.Optional[typing.Deque[TraceEvent]]
+        self.refresh()
+
+    def refresh(self):
+        self._debug = self.logger.isEnabledFor(logging.DEBUG)
+        self.enabled = self._debug or self._events is not None
+
+    def trace(self, event: str, key: typing.Any = None):
+        # Call sites check `enabled` first, so none of this runs while tracing is off.
+        if self._events is not None:
+            self._events.append(TraceEvent(time.perf_counter(), event, id(key), threading.get_ident()))
+        if self._debug:
+            self.logger.debug('[Thread %s] %s %x', threading.current_thread().name, event, id(key))
+
+    def start_recording(self, max_events: int):
+        self._events = collections.deque(maxlen=max_events)
+        self.refresh()
+
+    def stop_recording(self) -> typing.List[TraceEvent]:
+        events = self.events()
+        self._events = None
+        self.refresh()
+        return events
+
+    def events(self) -> typing.List[TraceEvent]:
+        return list(self._events) if self._events is not None else []
+
+
+_TRACERS = []  # type: typing.List[Tracer]
+
+
+def get_tracer(logger: logging.Logger) -> Tracer:
+    tracer = Tracer(logger)
+    _TRACERS.append(tracer)
+    return tracer
+
+
+def refresh():
+    for tracer in _TRACERS:
+        tracer.refresh()
+
+
+def start_recording(max_events: int = 100000):
+    for tracer in _TRACERS:
+        tracer.start_recording(max_events)
+
+
+def stop_recording() -> typing.List[TraceEvent]:
+    return sorted(
+        (event for tracer in _TRACERS for event in tracer.stop_recording()),
+        key=lambda event: event.timestamp)
+
+
+def events() -> typing.List[TraceEvent]:
+    return sorted(
+        (event for tracer in _TRACERS for event in tracer.events()),
+        key=lambda event: event.timestamp)
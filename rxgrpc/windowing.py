@@ -0,0 +1,225 @@
+import collections
+import functools
+import time
+import typing
+
+T = typing.TypeVar('T')
+A = typing.TypeVar('A')
+R = typing.TypeVar('R')
+
+
+def _identity(a):
+    return a
+
+
+class Aggregator(typing.Generic[T, A, R]):
+    # A monoid over the accumulators: windows fold elements in with add, and sliding windows merge panes.
+    __slots__ = ('zero', 'add', 'merge', 'result')
+
+    def __init__(
+            self, zero: A, add: typing.Callable[[A, T], A], merge: typing.Callable[[A, A], A],
+            result: typing.Callable[[A], R] = _identity):
+        self.zero = zero
+        self.add = add
+        self.merge = merge
+        self.result = result
+
+    def then(self, result: typing.Callable[[R], typing.Any]) -> 'Aggregator':
+        previous = self.result
+        return Aggregator(self.zero, self.add, self.merge, lambda acc: result(previous(acc)))
+
+
+def _add(a, b):
+    return a + b
+
+
+def count() -> Aggregator:
+    return Aggregator(0, lambda acc, _: acc + 1, _add)
+
+
+def sum_of(key: typing.Callable[[T], float] = _identity) -> Aggregator:
+    return Aggregator(0, lambda acc, value: acc + key(value), _add)
+
+
+def mean_of(key: typing.Callable[[T], float] = _identity) -> Aggregator:
+    return Aggregator(
+        (0, 0), lambda acc, value: (acc[0] + 1, acc[1] + key(value)),
+        lambda a, b: (a[0] + b[0], a[1] + b[1]),
+        lambda acc: acc[1] / acc[0] if acc[0] else None)
+
+
+def _min(a, b):
+    return b if a is None or (b is not None and b < a) else a
+
+
+def _max(a, b):
+    return b if a is None or (b is not None and b > a) else a
+
+
+def min_of(key: typing.Callable[[T], typing.Any] = _identity) -> Aggregator:
+    return Aggregator(None, lambda acc, value: _min(acc, key(value)), _min)
+
+
+def max_of(key: typing.Callable[[T], typing.Any] = _identity) -> Aggregator:
+    return Aggregator(None, lambda acc, value: _max(acc, key(value)), _max)
+
+
+def last() -> Aggregator:
+    return Aggregator(None, lambda acc, value: value, lambda a, b: a if b is None else b)
+
+
+def combine(**aggregators: Aggregator) -> Aggregator:
+    names = tuple(aggregators)
+    parts = tuple(aggregators[name] for name in names)
+    return Aggregator(
+        tuple(p.zero for p in parts),
+        lambda acc, value: tuple(p.add(a, value) for p, a in zip(parts, acc)),
+        lambda x, y: tuple(p.merge(a, b) for p, a, b in zip(parts, x, y)),
+        lambda acc: {name: p.result(a) for name, p, a in zip(names, parts, acc)})
+
+
+class _Panes:
+    # A window is made of panes, each folded element by element; a sliding window merges the panes it spans.
+    __slots__ = (
+        'aggregator', 'panes', 'size', 'count_step', 'duration_step', 'clock', 'acc', 'n', 'pane_end', 'empty')
+
+    def __init__(
+            self, aggregator: Aggregator, panes: int, count_step: typing.Optional[int],
+            duration_step: typing.Optional[float], clock: typing.Callable[[], float]):
+        self.aggregator = aggregator
+        self.size = panes
+        self.panes = collections.deque(maxlen=panes)  # type: typing.Deque[typing.Tuple[typing.Any, int]]
+        self.count_step = count_step
+        self.duration_step = duration_step
+        self.clock = clock
+        self.acc = aggregator.zero
+        self.n = 0
+        self.pane_end = None  # type: typing.Optional[float]
+        self.empty = 0
+
+    def push(self, value) -> typing.List[typing.Any]:
+        summaries = []
+        if self.duration_step is not None:
+            now = self.clock()
+            if self.pane_end is None:
+                self.pane_end = now + self.duration_step
+            while now >= self.pane_end:
+                if self.empty >= self.size:
+                    # Every pane of the window is empty, so the panes in between need not be closed one by one.
+                    self.pane_end += (now - self.pane_end) // self.duration_step * self.duration_step
+                self._close(summaries)
+                self.pane_end += self.duration_step
+        self.acc = self.aggregator.add(self.acc, value)
+        self.n += 1
+        if self.n == self.count_step:
+            self._close(summaries)
+        return summaries
+
+    def _close(self, summaries: typing.List[typing.Any]):
+        self.empty = 0 if self.n else self.empty + 1
+        self.panes.append((self.acc, self.n))
+        self.acc = self.aggregator.zero
+        self.n = 0
+        if len(self.panes) == self.size and self.empty < self.size:
+            summaries.append(self._window())
+
+    def _window(self):
+        aggregator = self.aggregator
+        return aggregator.result(functools.reduce(aggregator.merge, (acc for acc, _ in self.panes)))
+
+    def flush(self) -> typing.List[typing.Any]:
+        if self.n:
+            self.panes.append((self.acc, self.n))
+            self.n = 0
+            return [self._window()]
+        if len(self.panes) < self.size and any(n for _, n in self.panes):
+            # A stream shorter than one window still gets its summary.
+            return [self._window()]
+        return []
+
+
+class _Session:
+    __slots__ = ('aggregator', 'gap', 'clock', 'acc', 'n', 'last')
+
+    def __init__(self, aggregator: Aggregator, gap: float, clock: typing.Callable[[], float]):
+        self.aggregator = aggregator
+        self.gap = gap
+        self.clock = clock
+        self.acc = aggregator.zero
+        self.n = 0
+        self.last = 0.0
+
+    def push(self, value) -> typing.List[typing.Any]:
+        now = self.clock()
+        summaries = self.flush() if self.n and now - self.last > self.gap else []
+        self.acc = self.aggregator.add(self.acc, value)
+        self.n += 1
+        self.last = now
+        return summaries
+
+    def flush(self) -> typing.List[typing.Any]:
+        if not self.n:
+            return []
+        summary = self.aggregator.result(self.acc)
+        self.acc = self.aggregator.zero
+        self.n = 0
+        return [summary]
+
+
+def _windows(iterator: typing.Iterator, windower) -> typing.Iterator:
+    for element in iterator:
+        yield from windower.push(element)
+    yield from windower.flush()
+
+
+async def _async_windows(iterator: typing.AsyncIterator, windower) -> typing.AsyncIterator:
+    async for element in iterator:
+        for summary in windower.push(element):
+            yield summary
+    for summary in windower.flush():
+        yield summary
+
+
+def _panes(
+        aggregator: Aggregator, count: typing.Optional[int], duration: typing.Optional[float],
+        every: typing.Optional[float], clock: typing.Callable[[], float]) -> typing.Callable[[], _Panes]:
+    if (count is None) == (duration is None):
+        raise ValueError('You must specify either count or duration')
+    size = count if count is not None else duration
+    step = every if every is not None else size
+    if size <= 0 or step <= 0:
+        raise ValueError('Window sizes must be greater than 0')
+    panes = size / step
+    if panes != int(panes):
+        raise ValueError('The window size must be a multiple of every')
+    if count is not None:
+        if step != int(step):
+            raise ValueError('every must be a whole number of elements')
+        return lambda: _Panes(aggregator, int(panes), int(step), None, clock)
+    return lambda: _Panes(aggregator, int(panes), None, step, clock)
+
+
+def sliding(
+        iterator: typing.Iterator[T], aggregator: Aggregator, count: typing.Optional[int] = None,
+        duration: typing.Optional[float] = None, every: typing.Optional[float] = None,
+        clock: typing.Callable[[], float] = time.monotonic) -> typing.Iterator:
+    return _windows(iterator, _panes(aggregator, count, duration, every, clock)())
+
+
+def async_sliding(
+        iterator: typing.AsyncIterator[T], aggregator: Aggregator, count: typing.Optional[int] = None,
+        duration: typing.Optional[float] = None, every: typing.Optional[float] = None,
+        clock: typing.Callable[[], float] = time.monotonic) -> typing.AsyncIterator:
+    return _async_windows(iterator, _panes(aggregator, count, duration, every, clock)())
+
+
+def session(
+        iterator: typing.Iterator[T], aggregator: Aggregator, gap: float,
+        clock: typing.Callable[[], float] = time.monotonic) -> typing.Iterator:
+    return _windows(iterator, _Session(aggregator, gap, clock))
+
+
+def async_session(
+        iterator: typing.AsyncIterator[T], aggregator: Aggregator, gap: float,
+        clock: typing.Callable[[], float] = time.monotonic) -> typing.AsyncIterator:
+    return _async_windows(iterator, _Session(aggregator, gap, clock))
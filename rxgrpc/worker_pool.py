@@ -0,0 +1,168 @@
+import collections
+import functools
+import heapq
+import itertools
+import logging
+import threading
+import time
+import typing
+
+_LOGGER = logging.getLogger('rxgrpc.worker_pool')
+
+
+class _MethodQueue:
+    __slots__ = ('name', 'tasks', 'weight', 'quota', 'running', 'current_weight', 'expired', 'push', 'pop')
+
+    def __init__(self, name: str, weight: int, quota: typing.Optional[int], prioritized: bool):
+        self.name = name
+        self.weight = weight
+        self.quota = quota
+        self.running = 0
+        self.current_weight = 0
+        self.expired = 0
+        if prioritized:
+            self.tasks = []
+            self.push = functools.partial(heapq.heappush, self.tasks)
+            self.pop = functools.partial(heapq.heappop, self.tasks)
+        else:
+            self.tasks = collections.deque()
+            self.push = self.tasks.append
+            self.pop = self.tasks.popleft
+
+    def runnable(self) -> bool:
+        return bool(self.tasks) and (self.quota is None or self.running < self.quota)
+
+
+# noinspection PyUnusedLocal
+def _skip(*a):
+    pass
+
+
+class WorkerPool:
+    def __init__(
+            self, max_workers: int,
+            method_quotas: typing.Optional[typing.Dict[str, int]] = None,
+            method_weights: typing.Optional[typing.Dict[str, int]] = None,
+            thread_name_prefix: str = 'rxgrpc-worker',
+            prioritized: bool = False):
+        if max_workers <= 0:
+            raise ValueError('max_workers must be greater than 0')
+        for quota in (method_quotas or {}).values():
+            if quota <= 0:
+                raise ValueError('Method quotas must be greater than 0')
+        for weight in (method_weights or {}).values():
+            if weight <= 0:
+                raise ValueError('Method weights must be greater than 0')
+        self.max_workers = max_workers
+        self._method_quotas = dict(method_quotas or {})
+        self._method_weights = dict(method_weights or {})
+        self._thread_name_prefix = thread_name_prefix
+        self.prioritized = prioritized
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._queues = {}  # type: typing.Dict[str, _MethodQueue]
+        self._threads = []  # type: typing.List[threading.Thread]
+        self._idle = 0
+        self._shutdown = False
+
+    def submit(
+            self, method_name: str, fn: typing.Callable, *a,
+            priority: typing.Any = 0, deadline: typing.Optional[float] = None,
+            on_expired: typing.Optional[typing.Callable] = None) -> None:
+        # Lower priorities run first when prioritized, the sequence number keeps equal ones FIFO.
+        # Tasks whose deadline (time.time() based) has passed are handed to on_expired instead of fn.
+        with self._condition:
+            if self._shutdown:
+                raise RuntimeError('Cannot submit tasks after shutdown')
+            queue = self._queues.get(method_name)
+            if queue is None:
+                queue = self._queues[method_name] = _MethodQueue(
+                    method_name,
+                    self._method_weights.get(method_name, 1),
+                    self._method_quotas.get(method_name),
+                    self.prioritized)
+            queue.push((priority, next(self._sequence), fn, a, deadline, on_expired))
+            if self._idle:
+                self._condition.notify()
+            elif len(self._threads) < self.max_workers:
+                self._start_worker()
+
+    def queued(self, method_name: typing.Optional[str] = None) -> int:
+        with self._condition:
+            if method_name is not None:
+                queue = self._queues.get(method_name)
+                return len(queue.tasks) if queue else 0
+            return sum(len(q.tasks) for q in self._queues.values())
+
+    def running(self, method_name: typing.Optional[str] = None) -> int:
+        with self._condition:
+            if method_name is not None:
+                queue = self._queues.get(method_name)
+                return queue.running if queue else 0
+            return sum(q.running for q in self._queues.values())
+
+    def expired(self, method_name: typing.Optional[str] = None) -> int:
+        with self._condition:
+            if method_name is not None:
+                queue = self._queues.get(method_name)
+                return queue.expired if queue else 0
+            return sum(q.expired for q in self._queues.values())
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._condition:
+            self._shutdown = True
+            self._condition.notify_all()
+            threads = list(self._threads)
+        if wait:
+            for t in threads:
+                t.join()
+
+    def _start_worker(self):
+        t = threading.Thread(
+            target=self._work,
+            name='{}-{}'.format(self._thread_name_prefix, len(self._threads)),
+            daemon=True)
+        self._threads.append(t)
+        t.start()
+
+    def _next_task(self) -> typing.Tuple[typing.Optional[_MethodQueue], typing.Any]:
+        best = None
+        total_weight = 0
+        for queue in self._queues.values():
+            if queue.runnable():
+                queue.current_weight += queue.weight
+                total_weight += queue.weight
+                if best is None or queue.current_weight > best.current_weight:
+                    best = queue
+        if best is None:
+            return None, None
+        best.current_weight -= total_weight
+        best.running += 1
+        _, _, fn, a, deadline, on_expired = best.pop()
+        if deadline is not None and deadline <= time.time():
+            best.expired += 1
+            if on_expired is None:
+                return best, (_skip, a)
+            return best, (on_expired, a)
+        return best, (fn, a)
+
+    def _work(self):
+        while True:
+            with self._condition:
+                while True:
+                    queue, task = self._next_task()
+                    if task is not None:
+                        break
+                    if self._shutdown:
+                        return
+                    self._idle += 1
+                    self._condition.wait()
+                    self._idle -= 1
+            fn, a = task
+            try:
+                fn(*a)
+            except Exception:
+                _LOGGER.exception('Error running task for method %s', queue.name)
+            finally:
+                with self._condition:
+                    queue.running -= 1
@@ -1,3 +1,4 @@
+import collections
 import logging
 import unittest
 
@@ -19,8 +20,9 @@ _HANDLER.setFormatter(_FORMATTER)
 
 class BaseUnitTestCase(unittest.TestCase):
     @classmethod
-    def create_server(cls, servicer: test_pb2_grpc.TestServiceServicer, workers: int=1) -> GRPCObservableServer:
-        s = server.create_server(test_pb2, workers)
+    def create_server(
+            cls, servicer: test_pb2_grpc.TestServiceServicer, workers: int=1, **server_kwargs) -> GRPCObservableServer:
+        s = server.create_server(test_pb2, workers, **server_kwargs)
         test_pb2_grpc.add_TestServiceServicer_to_server(servicer, s.server)
         s.server.add_insecure_port('[::]:50051')
         return s
@@ -29,3 +31,45 @@ class BaseUnitTestCase(unittest.TestCase):
     def create_client(cls) -> test_pb2_grpc.TestServiceStub:
         channel = grpc.insecure_channel('localhost:50051')
         return test_pb2_grpc.TestServiceStub(channel)
+
+
+# Stand-ins for what grpc hands the thread pool, for tests that build invocations without a server.
+CallDetails = collections.namedtuple('CallDetails', ['method', 'deadline'])
+RpcEvent = collections.namedtuple('RpcEvent', ['call_details', 'invocation_metadata'])
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class Aborted(Exception):
+    pass
+
+
+class Context:
+    def abort(self, code, details):
+        raise Aborted(code, details)
+
+
+# noinspection PyUnusedLocal
+def unary_response_in_pool(rpc_event, state, behaviour, argument_thunk, request_deserializer, response_serializer):
+    return behaviour(argument_thunk(), None)
+
+
+# noinspection PyUnusedLocal
+def serialized_response_in_pool(
+        rpc_event, state, behaviour, argument_thunk, request_deserializer, response_serializer):
+    return response_serializer(behaviour(argument_thunk(), None))
+
+
+# noinspection PyUnusedLocal
+def aborted_in_pool(rpc_event, state, behaviour, argument_thunk, request_deserializer, response_serializer):
+    # Answers with the status code when the behaviour aborts.
+    try:
+        return behaviour(argument_thunk(), Context())
+    except Aborted as e:
+        return e.args[0]
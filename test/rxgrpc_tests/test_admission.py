@@ -0,0 +1,116 @@
+import threading
+import time
+import typing
+import unittest
+
+import grpc
+
+from rxgrpc.admission import AdmissionControl, OverflowPolicy
+from test.proto import test_pb2, test_pb2_grpc
+from test.rxgrpc_tests import BaseUnitTestCase
+
+_GET_ONE_TO_ONE = '/rxgrpc.test.TestService/GetOneToOne'
+
+
+class _BlockingServicer(test_pb2_grpc.TestServiceServicer):
+    def __init__(self):
+        self.started = threading.Event()
+        self.gate = threading.Event()
+
+    def GetOneToOne(self, request, context):
+        if request.message == 'block':
+            self.started.set()
+            self.gate.wait(5)
+        return test_pb2.TestResponse(message=request.message)
+
+
+class TestAdmissionControl(unittest.TestCase):
+    def test_reject(self):
+        admission = AdmissionControl(max_pending_per_method=2)
+        self.assertEqual((True, []), admission.admit('/a', 1, 'a1'))
+        self.assertEqual((True, []), admission.admit('/a', 2, 'a2'))
+        self.assertEqual((False, []), admission.admit('/a', 3, 'a3'))
+        self.assertEqual((True, []), admission.admit('/b', 4, 'b1'))
+        self.assertEqual(2, admission.depth('/a'))
+        self.assertEqual(3, admission.depth())
+        self.assertEqual(1, admission.rejected('/a'))
+        self.assertTrue(admission.release(1))
+        self.assertFalse(admission.release(1))
+        self.assertEqual((True, []), admission.admit('/a', 3, 'a3'))
+
+    def test_global_limit_drop_oldest(self):
+        admission = AdmissionControl(max_pending=2, policy=OverflowPolicy.DROP_OLDEST)
+        admission.admit('/a', 1, 'a1')
+        admission.admit('/b', 2, 'b1')
+        self.assertEqual((True, ['a1']), admission.admit('/b', 3, 'b2'))
+        self.assertFalse(admission.release(1))
+        self.assertEqual(0, admission.depth('/a'))
+        self.assertEqual(2, admission.depth('/b'))
+        self.assertEqual(1, admission.rejected())
+
+    def test_block(self):
+        admission = AdmissionControl(max_pending=1, policy=OverflowPolicy.BLOCK, block_timeout=5)
+        admission.admit('/a', 1, 'a1')
+        threading.Timer(0.05, admission.release, (1, )).start()
+        self.assertEqual((True, []), admission.admit('/a', 2, 'a2'))
+
+    def test_block_timeout(self):
+        admission = AdmissionControl(max_pending=1, policy=OverflowPolicy.BLOCK, block_timeout=0.01)
+        admission.admit('/a', 1, 'a1')
+        self.assertEqual((False, []), admission.admit('/a', 2, 'a2'))
+
+
+class TestServerAdmission(BaseUnitTestCase):
+    @staticmethod
+    def _wait_for(condition: typing.Callable[[], bool]):
+        deadline = time.monotonic() + 5
+        while not condition() and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    def _queue_behind_a_blocked_call(self, admission: AdmissionControl):
+        # The only worker is held by a first call, so the next one stays queued.
+        servicer = _BlockingServicer()
+        s = self.create_server(servicer, admission_control=admission)
+        s.start()
+        client = self.create_client()
+        blocked = client.GetOneToOne.future(test_pb2.TestRequest(message='block'), timeout=5)
+        self.assertTrue(servicer.started.wait(5))
+        queued = client.GetOneToOne.future(test_pb2.TestRequest(message='queued'), timeout=5)
+        self._wait_for(lambda: s.queue_depth() == 1)
+        return s, servicer, client, blocked, queued
+
+    def test_reject(self):
+        admission = AdmissionControl(max_pending=1)
+        s, servicer, client, blocked, queued = self._queue_behind_a_blocked_call(admission)
+        try:
+            self.assertEqual(1, s.queue_depth())
+            self.assertEqual(1, s.queue_depth(method_name=_GET_ONE_TO_ONE))
+            rejected = client.GetOneToOne.future(test_pb2.TestRequest(message='rejected'), timeout=5)
+            self._wait_for(lambda: admission.rejected() == 1)
+            self.assertEqual(1, s.queue_depth())
+            # Rejections are answered on the workers too, once the blocked call lets one go.
+            servicer.gate.set()
+            self.assertEqual(grpc.StatusCode.RESOURCE_EXHAUSTED, rejected.exception().code())
+            self.assertEqual('Request queue is full', rejected.exception().details())
+            self.assertEqual('block', blocked.result().message)
+            self.assertEqual('queued', queued.result().message)
+            self.assertEqual(0, s.queue_depth())
+        finally:
+            servicer.gate.set()
+            s.stop(None)
+
+    def test_drop_oldest(self):
+        admission = AdmissionControl(max_pending=1, policy=OverflowPolicy.DROP_OLDEST)
+        s, servicer, client, blocked, queued = self._queue_behind_a_blocked_call(admission)
+        try:
+            newest = client.GetOneToOne.future(test_pb2.TestRequest(message='newest'), timeout=5)
+            self._wait_for(lambda: admission.rejected() == 1)
+            self.assertEqual(1, s.queue_depth())
+            servicer.gate.set()
+            self.assertEqual('block', blocked.result().message)
+            self.assertEqual('newest', newest.result().message)
+            self.assertEqual(grpc.StatusCode.RESOURCE_EXHAUSTED, queued.exception().code())
+            self.assertEqual(0, s.queue_depth())
+        finally:
+            servicer.gate.set()
+            s.stop(None)
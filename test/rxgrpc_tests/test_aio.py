@@ -0,0 +1,326 @@
+import asyncio
+import unittest
+
+import grpc
+import rx
+from rx import operators as rx_operators
+
+from rxgrpc import operators, windowing
+from test.proto import test_pb2, test_pb2_grpc
+
+try:
+    from grpc import aio as grpc_aio
+    from rxgrpc import aio
+except ImportError:
+    grpc_aio = aio = None
+
+
+@unittest.skipIf(grpc_aio is None, 'grpc.aio requires grpcio >= 1.32')
+class TestAio(unittest.TestCase):
+    class _Servicer(test_pb2_grpc.TestServiceServicer):
+        async def GetOneToOne(self, request: test_pb2.TestRequest, context):
+            return test_pb2.TestResponse(message='response: {}'.format(request.message))
+
+        async def GetOneToStream(self, request, context):
+            for i in range(3):
+                yield test_pb2.TestResponse(message='response {}: {}'.format(i, request.message))
+
+        async def GetStreamToOne(self, request_iterator, context):
+            messages = []
+            async for request in request_iterator:
+                messages.append(request.message)
+            return test_pb2.TestResponse(message='response: {}'.format(', '.join(messages)))
+
+        async def GetStreamToStream(self, request_iterator, context):
+            async for request in request_iterator:
+                yield test_pb2.TestResponse(message='response: {}'.format(request.message))
+
+    def _run(self, coroutine):
+        loop = asyncio.new_event_loop()
+        try:
+            return loop.run_until_complete(coroutine)
+        finally:
+            loop.close()
+
+    @classmethod
+    def _create_server(cls) -> 'aio.GRPCObservableAioServer':
+        s = aio.create_server(test_pb2)
+        test_pb2_grpc.add_TestServiceServicer_to_server(cls._Servicer(), s)
+        s.add_insecure_port('[::]:50051')
+        return s
+
+    def test_one_to_one(self):
+        def _transform_message(m: test_pb2.TestRequest) -> test_pb2.TestRequest:
+            return test_pb2.TestRequest(message='TRANSFORMED {}'.format(m.message))
+
+        async def _test():
+            server = self._create_server()
+            server.grpc_pipe(
+                operators.map(_transform_message),
+                method_name='/rxgrpc.test.TestService/GetOneToOne')
+            await server.start()
+            try:
+                async with grpc_aio.insecure_channel('localhost:50051') as channel:
+                    client = test_pb2_grpc.TestServiceStub(channel)
+                    return await client.GetOneToOne(test_pb2.TestRequest(message='message0'))
+            finally:
+                await server.stop(None)
+
+        response = self._run(_test())
+        self.assertEqual('response: TRANSFORMED message0', response.message)
+
+    def test_parallel_pipe(self):
+        def _transform_message(m: test_pb2.TestRequest) -> test_pb2.TestRequest:
+            return test_pb2.TestRequest(message='TRANSFORMED {}'.format(m.message))
+
+        async def _test():
+            server = self._create_server()
+            server.grpc_pipe(
+                operators.map(_transform_message),
+                method_name='/rxgrpc.test.TestService/GetOneToOne', parallelism=2)
+            await server.start()
+            try:
+                async with grpc_aio.insecure_channel('localhost:50051') as channel:
+                    client = test_pb2_grpc.TestServiceStub(channel)
+                    # One call at a time, so that nothing else wakes the loop up.
+                    return [
+                        (await client.GetOneToOne(
+                            test_pb2.TestRequest(message='message{}'.format(i)), timeout=5)).message
+                        for i in range(4)
+                    ]
+            finally:
+                await server.stop(None)
+
+        self.assertEqual(['response: TRANSFORMED message{}'.format(i) for i in range(4)], self._run(_test()))
+
+    def test_queue_depth(self):
+        async def _test():
+            server = self._create_server()
+            # The first call waits in the pipe until the second one arrives.
+            server.grpc_pipe(
+                rx_operators.buffer_with_count(2), rx_operators.flat_map(rx.from_iterable),
+                method_name='/rxgrpc.test.TestService/GetOneToOne')
+            await server.start()
+            try:
+                async with grpc_aio.insecure_channel('localhost:50051') as channel:
+                    client = test_pb2_grpc.TestServiceStub(channel)
+                    first = asyncio.ensure_future(client.GetOneToOne(test_pb2.TestRequest(message='message0')))
+                    while not server.queue_depth():
+                        await asyncio.sleep(0.01)
+                    depths = [
+                        server.queue_depth(), server.queue_depth(method_name='/rxgrpc.test.TestService/GetOneToOne'),
+                        server.queue_depth(method_name='/rxgrpc.test.TestService/GetOneToStream'), server.expired()]
+                    await client.GetOneToOne(test_pb2.TestRequest(message='message1'))
+                    await first
+                    return depths + [server.queue_depth()]
+            finally:
+                await server.stop(None)
+
+        self.assertEqual([1, 1, 0, 0, 0], self._run(_test()))
+
+    def test_stream_to_stream(self):
+        def _filter_message(m: test_pb2.TestRequest) -> bool:
+            return bool(int(m.message[-1]) % 2)
+
+        async def _test():
+            server = self._create_server()
+            server.grpc_pipe(
+                operators.filter(_filter_message),
+                method_name='/rxgrpc.test.TestService/GetStreamToStream')
+            await server.start()
+            try:
+                async with grpc_aio.insecure_channel('localhost:50051') as channel:
+                    client = test_pb2_grpc.TestServiceStub(channel)
+                    call = client.GetStreamToStream(
+                        iter([test_pb2.TestRequest(message='message{}'.format(i)) for i in range(4)]))
+                    return [response.message async for response in call]
+            finally:
+                await server.stop(None)
+
+        self.assertEqual(['response: message1', 'response: message3'], self._run(_test()))
+
+    def test_buffered_stream(self):
+        def _join_messages(batch) -> test_pb2.TestRequest:
+            return test_pb2.TestRequest(message='+'.join(m.message for m in batch))
+
+        async def _test():
+            server = self._create_server()
+            server.grpc_pipe(
+                operators.buffer_with_count(2),
+                operators.map(_join_messages),
+                method_name='/rxgrpc.test.TestService/GetStreamToOne')
+            await server.start()
+            try:
+                async with grpc_aio.insecure_channel('localhost:50051') as channel:
+                    client = test_pb2_grpc.TestServiceStub(channel)
+                    return await client.GetStreamToOne(
+                        iter([test_pb2.TestRequest(message='message{}'.format(i)) for i in range(5)]))
+            finally:
+                await server.stop(None)
+
+        self.assertEqual('response: message0+message1, message2+message3, message4', self._run(_test()).message)
+
+    def test_windowed_stream(self):
+        summaries = windowing.combine(n=windowing.count(), last=windowing.last()).then(
+            lambda s: test_pb2.TestRequest(message='{}:{}'.format(s['n'], s['last'].message)))
+
+        async def _test():
+            server = self._create_server()
+            server.grpc_pipe(
+                operators.sliding_window(summaries, count=4, every=2),
+                method_name='/rxgrpc.test.TestService/GetStreamToOne')
+            await server.start()
+            try:
+                async with grpc_aio.insecure_channel('localhost:50051') as channel:
+                    client = test_pb2_grpc.TestServiceStub(channel)
+                    return await client.GetStreamToOne(
+                        iter([test_pb2.TestRequest(message='message{}'.format(i)) for i in range(6)]))
+            finally:
+                await server.stop(None)
+
+        self.assertEqual('response: 4:message3, 4:message5', self._run(_test()).message)
+
+    def test_batch(self):
+        batch_sizes = []
+
+        def _handler(requests):
+            batch_sizes.append(len(requests))
+            return [test_pb2.TestResponse(message='batched: {}'.format(r.message)) for r in requests]
+
+        async def _test():
+            server = self._create_server()
+            server.grpc_pipe(
+                operators.batch(_handler, max_size=2, max_latency_ms=50),
+                method_name='/rxgrpc.test.TestService/GetOneToOne')
+            await server.start()
+            try:
+                async with grpc_aio.insecure_channel('localhost:50051') as channel:
+                    client = test_pb2_grpc.TestServiceStub(channel)
+                    return await asyncio.gather(*(
+                        client.GetOneToOne(test_pb2.TestRequest(message='message{}'.format(i))) for i in range(5)))
+            finally:
+                await server.stop(None)
+
+        responses = self._run(_test())
+        self.assertEqual(['batched: message{}'.format(i) for i in range(5)], [r.message for r in responses])
+        self.assertEqual(5, sum(batch_sizes))
+        self.assertTrue(all(size <= 2 for size in batch_sizes))
+
+    def test_rate_limit(self):
+        async def _test():
+            server = self._create_server()
+            server.grpc_pipe(
+                operators.rate_limit(1, burst=1), method_name='/rxgrpc.test.TestService/GetOneToStream')
+            await server.start()
+            try:
+                async with grpc_aio.insecure_channel('localhost:50051') as channel:
+                    client = test_pb2_grpc.TestServiceStub(channel)
+                    responses = [r async for r in client.GetOneToStream(test_pb2.TestRequest(message='message0'))]
+                    with self.assertRaises(grpc.RpcError) as e:
+                        async for _ in client.GetOneToStream(test_pb2.TestRequest(message='message1')):
+                            pass
+                    return responses, e.exception.code()
+            finally:
+                await server.stop(None)
+
+        responses, code = self._run(_test())
+        self.assertEqual(3, len(responses))
+        self.assertEqual(grpc.StatusCode.RESOURCE_EXHAUSTED, code)
+
+    def test_response_operators(self):
+        async def _test():
+            server = self._create_server()
+            server.grpc_pipe(
+                operators.map_response(lambda r: test_pb2.TestResponse(message=r.message.upper())),
+                operators.throttle_response(1000),
+                method_name='/rxgrpc.test.TestService/GetOneToStream')
+            server.grpc_pipe(
+                operators.filter_response(lambda r: r.message.endswith('allowed')),
+                method_name='/rxgrpc.test.TestService/GetOneToOne')
+            await server.start()
+            try:
+                async with grpc_aio.insecure_channel('localhost:50051') as channel:
+                    client = test_pb2_grpc.TestServiceStub(channel)
+                    call = client.GetOneToStream(test_pb2.TestRequest(message='m'))
+                    streamed = [response.message async for response in call]
+                    allowed = await client.GetOneToOne(test_pb2.TestRequest(message='allowed'))
+                    try:
+                        await client.GetOneToOne(test_pb2.TestRequest(message='denied'))
+                        code = None
+                    except grpc.RpcError as e:
+                        code = e.code()
+                    return streamed, allowed.message, code
+            finally:
+                await server.stop(None)
+
+        streamed, allowed, code = self._run(_test())
+        self.assertEqual(['RESPONSE 0: M', 'RESPONSE 1: M', 'RESPONSE 2: M'], streamed)
+        self.assertEqual('response: allowed', allowed)
+        self.assertEqual(grpc.StatusCode.NOT_FOUND, code)
+
+    def test_request_filtered_out(self):
+        async def _test():
+            server = self._create_server()
+            server.grpc_pipe(
+                operators.filter(lambda m: m.message == 'allowed'),
+                method_name='/rxgrpc.test.TestService/GetOneToOne')
+            await server.start()
+            try:
+                async with grpc_aio.insecure_channel('localhost:50051') as channel:
+                    client = test_pb2_grpc.TestServiceStub(channel)
+                    try:
+                        await client.GetOneToOne(test_pb2.TestRequest(message='denied'))
+                        code = None
+                    except grpc.RpcError as e:
+                        code = e.code()
+                    return code
+            finally:
+                await server.stop(None)
+
+        self.assertEqual(grpc.StatusCode.NOT_FOUND, self._run(_test()))
+
+    def test_failed_and_cancelled_calls_complete(self):
+        class _FailingServicer(self._Servicer):
+            async def GetOneToOne(self, request, context):
+                raise ValueError(request.message)
+
+            async def GetOneToStream(self, request, context):
+                while True:
+                    yield test_pb2.TestResponse(message=request.message)
+                    await asyncio.sleep(0.01)
+
+        completed = []
+
+        def _track(g):
+            g.add_done_callback(lambda i: completed.append(i.method_name))
+            return g
+
+        async def _test():
+            server = aio.create_server(test_pb2)
+            test_pb2_grpc.add_TestServiceServicer_to_server(_FailingServicer(), server)
+            server.add_insecure_port('[::]:50051')
+            for method_name in ('/rxgrpc.test.TestService/GetOneToOne', '/rxgrpc.test.TestService/GetOneToStream'):
+                server.grpc_pipe(rx_operators.map(_track), method_name=method_name)
+            await server.start()
+            try:
+                async with grpc_aio.insecure_channel('localhost:50051') as channel:
+                    client = test_pb2_grpc.TestServiceStub(channel)
+                    try:
+                        await client.GetOneToOne(test_pb2.TestRequest(message='failing'))
+                        code = None
+                    except grpc.RpcError as e:
+                        code = e.code()
+                    call = client.GetOneToStream(test_pb2.TestRequest(message='endless'))
+                    await call.read()
+                    call.cancel()
+                    for _ in range(100):
+                        if len(completed) == 2:
+                            break
+                        await asyncio.sleep(0.01)
+                    return code
+            finally:
+                await server.stop(None)
+
+        self.assertEqual(grpc.StatusCode.UNKNOWN, self._run(_test()))
+        self.assertEqual(
+            ['/rxgrpc.test.TestService/GetOneToOne', '/rxgrpc.test.TestService/GetOneToStream'], completed)
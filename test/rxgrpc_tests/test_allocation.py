@@ -0,0 +1,113 @@
+import gc
+import tracemalloc
+import unittest
+
+import grpc
+
+from rxgrpc import thread_pool
+from rxgrpc.admission import AdmissionControl, OverflowPolicy
+from test.proto import test_pb2
+from test.rxgrpc_tests import CallDetails, RpcEvent, aborted_in_pool, unary_response_in_pool
+
+
+_RPC_EVENT = RpcEvent(CallDetails(b'/rxgrpc.test.TestService/GetOneToOne', None), ())
+
+
+def _behaviour(request, context):
+    return request
+
+
+def _argument_thunk():
+    return None
+
+
+def _submit(tp, fun, argument: str, answered: list):
+    grpc_invocation = tp.submit(fun, _RPC_EVENT, None, _behaviour, lambda: argument, None, None)
+    # What grpc does with the invocation submit returns.
+    grpc_invocation.add_done_callback(lambda _: answered.append(grpc_invocation.result))
+    return grpc_invocation
+
+
+def _bytes_per_invocation(tp, number: int = 2000) -> float:
+    a = (None, None)
+    for _ in range(100):
+        tp.submit(unary_response_in_pool, _RPC_EVENT, None, _behaviour, _argument_thunk, *a)
+    invocations = [None] * number
+    gc.collect()
+    tracemalloc.start()
+    try:
+        # Only what rxgrpc allocates counts, threads left over by other tests allocate concurrently.
+        only_rxgrpc = [tracemalloc.Filter(True, thread_pool.__file__)]
+        before = tracemalloc.take_snapshot().filter_traces(only_rxgrpc)
+        for i in range(number):
+            invocations[i] = tp.submit(unary_response_in_pool, _RPC_EVENT, None, _behaviour, _argument_thunk, *a)
+        after = tracemalloc.take_snapshot().filter_traces(only_rxgrpc)
+        return sum(stat.size_diff for stat in after.compare_to(before, 'filename')) / number
+    finally:
+        tracemalloc.stop()
+
+
+class TestAllocation(unittest.TestCase):
+    def test_bytes_per_unary_invocation(self):
+        unpooled = _bytes_per_invocation(thread_pool.create(test_pb2, 1))
+        tp = thread_pool.create(test_pb2, 1, invocation_pool_size=3000)
+        for invocation_state in [thread_pool._InvocationState() for _ in range(2100)]:
+            tp.state_pool.release(invocation_state)
+        # Object sizes depend on the interpreter, a pooled call only allocates its invocation and not its state.
+        self.assertLess(_bytes_per_invocation(tp), unpooled * 0.75)
+
+    def test_states_are_recycled(self):
+        tp = thread_pool.create(test_pb2, 1, invocation_pool_size=8)
+        recycled = []
+        answered = []
+        for _ in range(4):
+            grpc_invocation = _submit(tp, unary_response_in_pool, 'request', answered)
+            recycled.append(grpc_invocation._invocation_state)
+            tp._run_recycling(grpc_invocation)
+        self.assertEqual(1, len({id(s) for s in recycled}))
+        self.assertEqual(['request'] * 4, answered)
+        self.assertIs(thread_pool._UNSET, recycled[0].argument)
+        self.assertIsNone(recycled[0].result)
+        self.assertEqual(1, len(tp.state_pool))
+
+    def test_states_wait_for_the_callback_of_grpc(self):
+        tp = thread_pool.create(test_pb2, 1, invocation_pool_size=8)
+        grpc_invocation = tp.submit(unary_response_in_pool, _RPC_EVENT, None, _behaviour, lambda: 'request',
+                                    None, None)
+        # The worker completes the call before grpc got to add its callback.
+        tp._run_recycling(grpc_invocation)
+        self.assertEqual(0, len(tp.state_pool))
+        answered = []
+        grpc_invocation.add_done_callback(lambda g: answered.append(g.result))
+        self.assertEqual(['request'], answered)
+        self.assertEqual(1, len(tp.state_pool))
+
+    def test_recycled_states_with_metrics(self):
+        tp = thread_pool.create(test_pb2, 1, invocation_pool_size=8, collect_metrics=True)
+        answered = []
+        for _ in range(4):
+            tp._run_recycling(_submit(tp, unary_response_in_pool, 'request', answered))
+        self.assertEqual(['request'] * 4, answered)
+        self.assertEqual(1, len(tp.state_pool))
+        stages = tp.metrics.snapshot()['/rxgrpc.test.TestService/GetOneToOne']
+        self.assertEqual(4, stages['run'].count)
+        self.assertEqual(4, stages['queue'].count)
+
+    def test_shed_states_are_not_recycled(self):
+        tp = thread_pool.create(
+            test_pb2, 1, invocation_pool_size=8,
+            admission_control=AdmissionControl(max_pending_per_method=1, policy=OverflowPolicy.DROP_OLDEST))
+        try:
+            answered = []
+            shed = _submit(tp, aborted_in_pool, 'shed', answered)
+            admitted = _submit(tp, aborted_in_pool, 'admitted', answered)
+            # The worker dequeues the shed invocation while its aborted copy is still waiting on the rejected lane.
+            tp._run_recycling(shed)
+            self.assertEqual(0, len(tp.state_pool))
+            tp._run_recycling(admitted)
+            self.assertEqual(1, len(tp.state_pool))
+            tp.worker_pool.shutdown()
+            self.assertEqual(['admitted', grpc.StatusCode.RESOURCE_EXHAUSTED], answered)
+            self.assertEqual(1, len(tp.state_pool))
+        finally:
+            tp.worker_pool.shutdown()
@@ -0,0 +1,109 @@
+import threading
+import unittest
+
+import rx
+
+from rxgrpc import operators
+from rxgrpc.cache import ResponseCache
+from rxgrpc.thread_pool import _GRPCInvocation, _InvocationState
+from test.proto import test_pb2
+from test.rxgrpc_tests import Clock, serialized_response_in_pool
+
+
+class TestResponseCache(unittest.TestCase):
+    def test_ttl_and_lru(self):
+        clock = Clock()
+        response_cache = ResponseCache(2, ttl=10, clock=clock)
+        self.assertEqual(b'a', response_cache.get_or_compute('a', lambda: b'a'))
+        self.assertEqual(b'a', response_cache.get_or_compute('a', lambda: b'other'))
+        response_cache.get_or_compute('b', lambda: b'b')
+        response_cache.get_or_compute('a', lambda: b'other')
+        response_cache.get_or_compute('c', lambda: b'c')
+        self.assertEqual(b'b2', response_cache.get_or_compute('b', lambda: b'b2'))
+        clock.now = 11
+        self.assertEqual(b'c2', response_cache.get_or_compute('c', lambda: b'c2'))
+        self.assertEqual((2, 5), (response_cache.hits, response_cache.misses))
+        self.assertEqual(2, len(response_cache))
+
+    def test_single_flight(self):
+        response_cache = ResponseCache(10)
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def _compute():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return b'value'
+
+        results = []
+        leader = threading.Thread(target=lambda: results.append(response_cache.get_or_compute('k', _compute)))
+        leader.start()
+        started.wait(5)
+        follower = threading.Thread(target=lambda: results.append(response_cache.get_or_compute('k', _compute)))
+        follower.start()
+        while not response_cache.coalesced:
+            pass
+        release.set()
+        leader.join(5)
+        follower.join(5)
+        self.assertEqual([b'value', b'value'], results)
+        self.assertEqual(1, len(calls))
+
+    def test_failures_are_not_cached(self):
+        response_cache = ResponseCache(10)
+
+        def _fail():
+            raise ValueError()
+
+        with self.assertRaises(ValueError):
+            response_cache.get_or_compute('k', _fail)
+        self.assertEqual(b'value', response_cache.get_or_compute('k', lambda: b'value'))
+
+    def test_operator(self):
+        calls = []
+
+        def _behaviour(request, context):
+            calls.append(request.message)
+            return test_pb2.TestResponse(message='response: {}'.format(request.message))
+
+        cache_operator = operators.cache(lambda r: r.message, max_entries=10)
+        results = []
+        for message in ('a', 'a', 'b'):
+            g = _GRPCInvocation(
+                serialized_response_in_pool, None, None, _behaviour, lambda m=message: test_pb2.TestRequest(message=m),
+                (test_pb2.TestRequest.FromString, test_pb2.TestResponse.SerializeToString), {},
+                invocation_state=_InvocationState())
+            cache_operator(rx.of(g)).subscribe(lambda cached: cached.run())
+            results.append(test_pb2.TestResponse.FromString(g.result).message)
+        self.assertEqual(['response: a', 'response: a', 'response: b'], results)
+        self.assertEqual(['a', 'b'], calls)
+        self.assertEqual((1, 2), (cache_operator.cache.hits, cache_operator.cache.misses))
+
+    def test_operator_sets_followers_aside(self):
+        calls = []
+
+        def _behaviour(request, context):
+            calls.append(request.message)
+            return test_pb2.TestResponse(message='response: {}'.format(request.message))
+
+        invocations = [
+            _GRPCInvocation(
+                serialized_response_in_pool, None, None, _behaviour, lambda: test_pb2.TestRequest(message='a'),
+                (test_pb2.TestRequest.FromString, test_pb2.TestResponse.SerializeToString), {},
+                invocation_state=_InvocationState())
+            for _ in range(2)
+        ]
+        cache_operator = operators.cache(lambda r: r.message, max_entries=10)
+        emitted = []
+        cache_operator(rx.from_iterable(invocations)).subscribe(emitted.append)
+        # The follower waits for its leader without being handed on, so it takes no worker meanwhile.
+        self.assertEqual(1, len(emitted))
+        emitted[0].run()
+        self.assertEqual(2, len(emitted))
+        emitted[1].run()
+        self.assertEqual(['a'], calls)
+        response_cache = cache_operator.cache
+        self.assertEqual((0, 1, 1), (response_cache.hits, response_cache.misses, response_cache.coalesced))
+        self.assertEqual(invocations[0].result, invocations[1].result)
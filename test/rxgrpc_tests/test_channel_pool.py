@@ -0,0 +1,33 @@
+import unittest
+
+from rxgrpc.channel_pool import ChannelPool, SelectionPolicy, insecure_channel_pool
+
+
+class TestChannelPool(unittest.TestCase):
+    def test_round_robin(self):
+        pool = ChannelPool(['a', 'b', 'c'])
+        self.assertEqual([0, 1, 2, 0], [pool.acquire() for _ in range(4)])
+        self.assertEqual([2, 1, 1], pool.in_flight())
+        pool.release(0)
+        self.assertEqual(1, pool.in_flight(0))
+
+    def test_least_outstanding(self):
+        pool = ChannelPool(['a', 'b', 'c'], policy=SelectionPolicy.LEAST_OUTSTANDING)
+        self.assertEqual([0, 1, 2], [pool.acquire() for _ in range(3)])
+        pool.release(1)
+        self.assertEqual(1, pool.acquire())
+        pool.release(2)
+        pool.release(0)
+        self.assertEqual([0, 2], sorted(pool.acquire() for _ in range(2)))
+        self.assertEqual([1, 1, 1], pool.in_flight())
+
+    def test_insecure_channel_pool(self):
+        pool = insecure_channel_pool(['localhost:1', 'localhost:2'], channels_per_target=2)
+        try:
+            self.assertEqual(4, len(pool))
+        finally:
+            pool.close()
+
+    def test_empty(self):
+        with self.assertRaises(ValueError):
+            ChannelPool([])
@@ -0,0 +1,93 @@
+import threading
+
+import grpc
+import rx
+from rx import operators as ops
+
+from rxgrpc import client
+from rxgrpc.channel_pool import insecure_channel_pool, SelectionPolicy
+from test.proto import test_pb2, test_pb2_grpc
+from test.rxgrpc_tests import BaseUnitTestCase
+from test.rxgrpc_tests import test_simple_rpc
+
+
+class TestReactiveClient(BaseUnitTestCase):
+    @classmethod
+    def create_reactive_client(cls, channels: int = 1) -> client.ReactiveStub:
+        return client.create_stub(
+            test_pb2_grpc.TestServiceStub, *(grpc.insecure_channel('localhost:50051') for _ in range(channels)))
+
+    def test_all_shapes(self):
+        server = self.create_server(test_simple_rpc.TestSimpleRPC._Servicer(), workers=4)
+        server.start()
+        try:
+            stub = self.create_reactive_client()
+            request = test_pb2.TestRequest(message='m')
+            requests = rx.of(test_pb2.TestRequest(message='a'), test_pb2.TestRequest(message='b'))
+            self.assertEqual('response: m', stub.GetOneToOne(request).run().message)
+            self.assertEqual(
+                ['response 0: m', 'response 1: m', 'response 2: m'],
+                [r.message for r in stub.GetOneToStream(request).pipe(ops.to_list()).run()])
+            self.assertEqual('response: a, b', stub.GetStreamToOne(requests).run().message)
+            self.assertEqual(
+                ['response: a', 'response: b'],
+                [r.message for r in stub.GetStreamToStream(requests).pipe(ops.to_list()).run()])
+        finally:
+            server.stop(None)
+
+    def test_pipelined(self):
+        server = self.create_server(test_simple_rpc.TestSimpleRPC._Servicer(), workers=4)
+        server.start()
+        try:
+            stub = self.create_reactive_client(channels=2)
+            responses = rx.from_(range(20)).pipe(
+                ops.map(lambda i: test_pb2.TestRequest(message=str(i))),
+                client.pipelined(stub.GetOneToOne, max_concurrent=4),
+                ops.to_list()
+            ).run()
+            self.assertEqual(
+                sorted('response: {}'.format(i) for i in range(20)), sorted(r.message for r in responses))
+        finally:
+            server.stop(None)
+
+    def test_channel_pool(self):
+        server = self.create_server(test_simple_rpc.TestSimpleRPC._Servicer(), workers=4)
+        server.start()
+        pool = insecure_channel_pool('localhost:50051', channels_per_target=3, policy=SelectionPolicy.LEAST_OUTSTANDING)
+        try:
+            stub = client.create_stub(test_pb2_grpc.TestServiceStub, channel_pool=pool)
+            responses = rx.from_(range(20)).pipe(
+                ops.map(lambda i: test_pb2.TestRequest(message=str(i))),
+                client.pipelined(stub.GetOneToStream, max_concurrent=6),
+                ops.to_list()
+            ).run()
+            self.assertEqual(60, len(responses))
+            self.assertEqual([0, 0, 0], pool.in_flight())
+        finally:
+            pool.close()
+            server.stop(None)
+
+    def test_retry(self):
+        stub = client.create_stub(test_pb2_grpc.TestServiceStub, grpc.insecure_channel('localhost:1'))
+        attempts = []
+        source = rx.defer(lambda _: attempts.append(1) or stub.GetOneToOne(test_pb2.TestRequest(), timeout=1))
+        with self.assertRaises(grpc.RpcError) as e:
+            source.pipe(client.retry(max_attempts=3, backoff_secs=0.01)).run()
+        self.assertEqual(grpc.StatusCode.UNAVAILABLE, e.exception.code())
+        self.assertEqual(3, len(attempts))
+
+    def test_retry_on_error_during_subscribe(self):
+        class _Unavailable(grpc.RpcError):
+            def code(self):
+                return grpc.StatusCode.UNAVAILABLE
+
+        attempts = []
+        errors = []
+        terminated = threading.Event()
+        # rx.throw fails while retry is still inside subscribe().
+        source = rx.defer(lambda _: attempts.append(1) or rx.throw(_Unavailable()))
+        source.pipe(client.retry(max_attempts=3, backoff_secs=0.01)).subscribe(
+            on_error=lambda e: errors.append(e) or terminated.set(), on_completed=terminated.set)
+        self.assertTrue(terminated.wait(5))
+        self.assertEqual(3, len(attempts))
+        self.assertIsInstance(errors[0], _Unavailable)
@@ -0,0 +1,120 @@
+import threading
+import unittest
+
+import grpc
+import rx
+from rx.core import Observer
+
+from rxgrpc import operators, server
+from rxgrpc.thread_pool import _GRPCInvocation, _InvocationState, RawRequest
+from test.proto import test_pb2, test_pb2_grpc
+from test.rxgrpc_tests import CallDetails, RpcEvent, unary_response_in_pool
+
+
+def _invocation(behaviour, message: str, method: bytes = b'/rxgrpc.test.TestService/GetOneToOne') -> _GRPCInvocation:
+    data = test_pb2.TestRequest(message=message).SerializeToString()
+    return _GRPCInvocation(
+        unary_response_in_pool, RpcEvent(CallDetails(method, None), ()), None, behaviour,
+        lambda: RawRequest(data, test_pb2.TestRequest.FromString), (None, None), {},
+        invocation_state=_InvocationState())
+
+
+def _respond(request, context):
+    return test_pb2.TestResponse(message='response: {}'.format(request.message))
+
+
+class _GatedServicer(test_pb2_grpc.TestServiceServicer):
+    def __init__(self):
+        self.gate = threading.Event()
+
+    def GetOneToOne(self, request, context):
+        self.gate.wait(5)
+        return test_pb2.TestResponse(message='response: {}'.format(request.message))
+
+    def GetStreamToOne(self, request_iterator, context):
+        return test_pb2.TestResponse(message='response: {}'.format(', '.join(r.message for r in request_iterator)))
+
+
+class TestCoalescing(unittest.TestCase):
+    def test_duplicates_share_the_leader_response(self):
+        calls = []
+
+        def _behaviour(request, context):
+            calls.append(request.message)
+            return test_pb2.TestResponse(message='response: {}'.format(request.message))
+
+        emitted = []
+        invocations = rx.from_iterable([_invocation(_behaviour, m) for m in ('a', 'a', 'b')])
+        invocations.pipe(operators.coalesce()).subscribe(Observer(on_next=emitted.append))
+        # The duplicate waits for its leader without being handed on, so it takes no worker meanwhile.
+        self.assertEqual(2, len(emitted))
+        leader_a, leader_b = emitted
+        leader_a.run()
+        self.assertEqual(3, len(emitted))
+        follower_a = emitted[2]
+        follower_a.run()
+        leader_b.run()
+        self.assertEqual(['a', 'b'], sorted(calls))
+        self.assertIs(leader_a.result, follower_a.result)
+        self.assertEqual('response: b', leader_b.result.message)
+
+    def test_followers_of_a_failed_leader_make_their_own_call(self):
+        calls = []
+
+        def _behaviour(request, context):
+            calls.append(request.message)
+            if len(calls) == 1:
+                raise ValueError(request.message)
+            return test_pb2.TestResponse(message='response: {}'.format(request.message))
+
+        emitted = []
+        completed = threading.Event()
+        rx.from_iterable([_invocation(_behaviour, 'a'), _invocation(_behaviour, 'a')]).pipe(
+            operators.coalesce()).subscribe(Observer(on_next=emitted.append, on_completed=completed.set))
+        self.assertFalse(completed.is_set())
+        with self.assertRaises(ValueError):
+            emitted[0].run()
+        self.assertTrue(completed.is_set())
+        emitted[1].run()
+        self.assertEqual(['a', 'a'], calls)
+        self.assertEqual('response: a', emitted[1].result.message)
+
+    def test_methods_do_not_share_responses(self):
+        emitted = []
+        coalesce = operators.coalesce()
+        for method in (b'/rxgrpc.test.TestService/GetOneToOne', b'/rxgrpc.test.TestService/Other'):
+            rx.of(_invocation(_respond, 'a', method)).pipe(coalesce).subscribe(Observer(on_next=emitted.append))
+        self.assertEqual(2, len(emitted))
+
+    def test_followers_are_passed_on_by_their_own_subscription(self):
+        coalesce = operators.coalesce()
+        leaders, followers = [], []
+        completed = threading.Event()
+        rx.of(_invocation(_respond, 'a')).pipe(coalesce).subscribe(Observer(on_next=leaders.append))
+        rx.of(_invocation(_respond, 'a')).pipe(coalesce).subscribe(
+            Observer(on_next=followers.append, on_completed=completed.set))
+        self.assertEqual((1, 0), (len(leaders), len(followers)))
+        leaders[0].run()
+        self.assertEqual((1, 1), (len(leaders), len(followers)))
+        self.assertTrue(completed.is_set())
+
+    def test_a_burst_leaves_workers_to_other_methods(self):
+        servicer = _GatedServicer()
+        s = server.create_server(test_pb2, 2)
+        test_pb2_grpc.add_TestServiceServicer_to_server(servicer, s)
+        s.add_insecure_port('[::]:50051')
+        s.grpc_pipe(operators.coalesce(), method_name='/rxgrpc.test.TestService/GetOneToOne')
+        s.start()
+        channel = grpc.insecure_channel('localhost:50051')
+        try:
+            stub = test_pb2_grpc.TestServiceStub(channel)
+            burst = [stub.GetOneToOne.future(test_pb2.TestRequest(message='hot'), timeout=5) for _ in range(5)]
+            # Only the leader holds a worker, the other one is still free.
+            response = stub.GetStreamToOne(iter([test_pb2.TestRequest(message='cold')]), timeout=1)
+            self.assertEqual('response: cold', response.message)
+            servicer.gate.set()
+            self.assertEqual(['response: hot'] * 5, [f.result().message for f in burst])
+        finally:
+            servicer.gate.set()
+            channel.close()
+            s.stop(None)
@@ -0,0 +1,67 @@
+import threading
+import unittest
+
+from rxgrpc.completion import CallbackExecutor, Completion
+from rxgrpc.thread_pool import _GRPCInvocation, _InvocationState
+from test.rxgrpc_tests import unary_response_in_pool
+
+
+class TestCompletion(unittest.TestCase):
+    def test_callbacks_added_after_completion_run_once(self):
+        g = _GRPCInvocation(
+            unary_response_in_pool, None, None, lambda r, c: r, lambda: 'response', (None, None), {},
+            invocation_state=_InvocationState())
+        calls = []
+        g.add_done_callback(lambda i: calls.append('first'))
+        g.run()
+        g.add_done_callback(lambda i: calls.append('second'))
+        g.add_done_callback(lambda i: calls.append('third'))
+        self.assertEqual(['first', 'second', 'third'], calls)
+        self.assertEqual('response', g.result)
+
+    def test_exactly_once_under_concurrency(self):
+        for _ in range(50):
+            completion = Completion()
+            calls = []
+            barrier = threading.Barrier(5)
+
+            def _add(n: int):
+                barrier.wait()
+                for i in range(100):
+                    completion.add_done_callback(lambda _, k=(n, i): calls.append(k), None)
+
+            def _complete():
+                barrier.wait()
+                completion.complete('done', None)
+                completion.complete('again', None)
+
+            threads = [threading.Thread(target=_add, args=(n, )) for n in range(4)]
+            threads.append(threading.Thread(target=_complete))
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join(5)
+            self.assertEqual(400, len(calls))
+            self.assertEqual(400, len(set(calls)))
+            self.assertEqual('done', completion.result)
+
+    def test_executor_and_failing_callbacks(self):
+        executor = CallbackExecutor()
+        completion = Completion()
+        completion.callback_executor = executor
+        ran = threading.Event()
+        threads = []
+
+        def _fail(_):
+            raise ValueError()
+
+        def _record(_):
+            threads.append(threading.current_thread())
+            ran.set()
+
+        completion.add_done_callback(_fail, None)
+        completion.add_done_callback(_record, None)
+        completion.complete(None, None)
+        self.assertTrue(ran.wait(5))
+        self.assertIsNot(threading.current_thread(), threads[0])
+        executor.shutdown()
@@ -0,0 +1,134 @@
+import unittest
+
+import grpc
+import rx
+
+from rxgrpc import operators, server
+from rxgrpc.admission import AdmissionControl
+from rxgrpc.limiting import AIMDLimit, ConcurrencyLimiter, GradientLimit, RateLimiter, by_metadata
+from rxgrpc.thread_pool import _GRPCInvocation, _InvocationState
+from test.proto import test_pb2, test_pb2_grpc
+from test.rxgrpc_tests import CallDetails, RpcEvent, Clock, aborted_in_pool
+
+
+class _Pool:
+    def __init__(self, rejections: list):
+        self.rejections = rejections
+
+    def _reject(self, *a):
+        self.rejections.append(a)
+
+
+def _invocation(behaviour, caller: str = 'a') -> _GRPCInvocation:
+    rpc_event = RpcEvent(CallDetails(b'/rxgrpc.test.TestService/GetOneToOne', None), (('x-caller', caller), ))
+    return _GRPCInvocation(
+        aborted_in_pool, rpc_event, None, behaviour, lambda: test_pb2.TestRequest(message='m'),
+        (test_pb2.TestRequest.FromString, test_pb2.TestResponse.SerializeToString), {},
+        invocation_state=_InvocationState())
+
+
+def _respond(request, context):
+    return test_pb2.TestResponse(message=request.message)
+
+
+class _Servicer(test_pb2_grpc.TestServiceServicer):
+    def GetOneToOne(self, request, context):
+        return _respond(request, context)
+
+
+class TestLimiting(unittest.TestCase):
+    def test_token_bucket(self):
+        clock = Clock()
+        limiter = RateLimiter(2, burst=2, clock=clock)
+        self.assertEqual([True, True, False], [limiter.try_acquire('k') for _ in range(3)])
+        self.assertTrue(limiter.try_acquire('other'))
+        clock.now = 0.5
+        self.assertEqual([True, False], [limiter.try_acquire('k') for _ in range(2)])
+        self.assertEqual(2, limiter.rejected)
+
+    def test_aimd(self):
+        limiter = ConcurrencyLimiter(lambda: AIMDLimit(initial_limit=4, backoff_ratio=0.5, timeout=1))
+        permits = [limiter.try_acquire() for _ in range(5)]
+        self.assertIsNone(permits[-1])
+        permits[0].release()
+        self.assertEqual(5, limiter.limit())
+        permits[1].release(dropped=True)
+        permits[1].release(dropped=True)
+        self.assertEqual(2, limiter.limit())
+        self.assertEqual(2, limiter.in_flight())
+        self.assertIsNone(limiter.try_acquire())
+
+    def test_gradient_backs_off_when_latency_grows(self):
+        clock = Clock()
+        limiter = ConcurrencyLimiter(lambda: GradientLimit(initial_limit=10, smoothing=1.0), clock=clock)
+        for rtt in (0.01, ) * 20 + (0.1, ) * 3:
+            # A steady demand of 10 concurrent calls, of which the limit lets some through.
+            permits = [p for p in (limiter.try_acquire() for _ in range(10)) if p]
+            clock.now += rtt
+            for permit in permits:
+                permit.release()
+            if rtt == 0.01:
+                self.assertGreaterEqual(limiter.limit(), 10)
+        self.assertLess(limiter.limit(), 10)
+
+    def test_operators_reject_with_resource_exhausted(self):
+        rate_limit = operators.rate_limit(1, key_fn=by_metadata('x-caller'))
+        invocations = [_invocation(_respond, caller) for caller in ('a', 'a', 'b')]
+        passed = []
+        for g in invocations:
+            rate_limit(rx.of(g)).subscribe(passed.append)
+        for g in passed:
+            g.run()
+        self.assertEqual(2, len(passed))
+        self.assertEqual('m', invocations[0].result.message)
+        self.assertEqual(grpc.StatusCode.RESOURCE_EXHAUSTED, invocations[1].result)
+        self.assertEqual('m', invocations[2].result.message)
+
+        concurrency_limit = operators.concurrency_limit(lambda: AIMDLimit(initial_limit=1))
+        held = []
+        concurrency_limit(rx.of(_invocation(_respond))).subscribe(held.append)
+        rejected = _invocation(_respond)
+        concurrency_limit(rx.of(rejected)).subscribe(held.append)
+        self.assertEqual(1, len(held))
+        self.assertEqual(grpc.StatusCode.RESOURCE_EXHAUSTED, rejected.result)
+        held[0].run()
+        self.assertEqual(0, concurrency_limit.limiter.in_flight('/rxgrpc.test.TestService/GetOneToOne'))
+
+    def test_rejections_go_to_the_pool(self):
+        rejections = []
+        g = _invocation(_respond)
+        g._invocation_state.pool = _Pool(rejections)
+        operators.rate_limit(1, burst=1)(rx.of(_invocation(_respond), g)).subscribe()
+        self.assertEqual([(g, grpc.StatusCode.RESOURCE_EXHAUSTED, 'Rate limit exceeded')], rejections)
+        self.assertFalse(g._invocation_state.done)
+
+    def test_concurrency_limiter_forgets_idle_keys(self):
+        limiter = ConcurrencyLimiter(max_keys=2)
+        busy = limiter.try_acquire('busy')
+        limiter.try_acquire('idle').release()
+        limiter.try_acquire('new')
+        self.assertIsNone(limiter.limit('idle'))
+        self.assertEqual(1, limiter.in_flight('busy'))
+        busy.release()
+        self.assertEqual(0, limiter.in_flight('busy'))
+
+    def test_rejected_calls_leave_the_admission_queue(self):
+        s = server.create_server(test_pb2, 2, admission_control=AdmissionControl(max_pending=2))
+        test_pb2_grpc.add_TestServiceServicer_to_server(_Servicer(), s)
+        s.add_insecure_port('[::]:50051')
+        s.grpc_pipe(operators.rate_limit(0.001, burst=1), method_name='/rxgrpc.test.TestService/GetOneToOne')
+        s.start()
+        channel = grpc.insecure_channel('localhost:50051')
+        try:
+            stub = test_pb2_grpc.TestServiceStub(channel)
+            self.assertEqual('m', stub.GetOneToOne(test_pb2.TestRequest(message='m'), timeout=5).message)
+            # Leaked admission entries would fill the queue, then calls would be answered 'Request queue is full'.
+            for _ in range(5):
+                with self.assertRaises(grpc.RpcError) as e:
+                    stub.GetOneToOne(test_pb2.TestRequest(message='m'), timeout=5)
+                self.assertEqual(grpc.StatusCode.RESOURCE_EXHAUSTED, e.exception.code())
+                self.assertEqual('Rate limit exceeded', e.exception.details())
+            self.assertEqual(0, s.queue_depth())
+        finally:
+            channel.close()
+            s.stop(None)
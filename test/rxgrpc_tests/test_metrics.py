@@ -0,0 +1,43 @@
+import unittest
+
+from rxgrpc import metrics
+
+
+class TestMetrics(unittest.TestCase):
+    def test_bucket_bounds(self):
+        for ns in (0, 1, 15, 16, 17, 31, 32, 1000, 123456789):
+            index = metrics._bucket(ns)
+            self.assertLess(ns, metrics._bucket_upper_bound(index))
+            if index:
+                self.assertGreaterEqual(ns, metrics._bucket_upper_bound(index - 1))
+
+    def test_snapshot(self):
+        m = metrics.Metrics()
+        method_metrics = m.method('/a')
+        for i in range(1, 101):
+            method_metrics.record(0, 0, 0, 0, i / 1e6, i / 1e6)
+        run = m.snapshot()['/a']['run']
+        self.assertEqual(100, run.count)
+        self.assertAlmostEqual(0.00505, run.sum, places=6)
+        self.assertAlmostEqual(50e-6, run.percentile(50), delta=50e-6 / 8)
+        self.assertAlmostEqual(99e-6, run.percentile(99), delta=99e-6 / 8)
+        self.assertLessEqual(m.snapshot()['/a']['queue'].percentile(99), 1e-9)
+
+    def test_full_shards_are_folded_off_the_recording_thread(self):
+        m = metrics.Metrics()
+        method_metrics = m.method('/a')
+        number = metrics._FOLD_THRESHOLD * 3
+        for i in range(number):
+            method_metrics.record(0, 0, 0, 0, 1e-6, 1e-6)
+        self.assertLessEqual(len(method_metrics._local.shard), metrics._FOLD_THRESHOLD)
+        self.assertEqual(number, m.snapshot()['/a']['run'].count)
+
+    def test_prometheus_text(self):
+        m = metrics.Metrics()
+        m.method('/a').record(0, 1e-6, 3e-6, 6e-6, 11e-6, 16e-6)
+        text = m.prometheus_text()
+        self.assertIn('# TYPE rxgrpc_invocation_stage_seconds histogram', text)
+        self.assertIn('rxgrpc_invocation_stage_seconds_count{method="/a",stage="run"} 1', text)
+        self.assertIn('rxgrpc_invocation_stage_seconds_bucket{method="/a",stage="run",le="+Inf"} 1', text)
+        self.assertIn('rxgrpc_invocation_stage_seconds_bucket{method="/a",stage="run",le="4.096e-06"} 0', text)
+        self.assertIn('rxgrpc_invocation_stage_seconds_bucket{method="/a",stage="run",le="8.192e-06"} 1', text)
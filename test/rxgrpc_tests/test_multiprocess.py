@@ -0,0 +1,47 @@
+import time
+
+from rxgrpc import operators
+from rxgrpc.multiprocess import create_multiprocess_server, PipelineSpec, operator
+from test.proto import test_pb2, test_pb2_grpc
+from test.rxgrpc_tests import BaseUnitTestCase, test_simple_rpc
+
+
+def _servicer() -> test_pb2_grpc.TestServiceServicer:
+    return test_simple_rpc.TestSimpleRPC._Servicer()
+
+
+def _slow_servicer() -> test_pb2_grpc.TestServiceServicer:
+    time.sleep(30)
+    return _servicer()
+
+
+def _transformation(request: test_pb2.TestRequest) -> test_pb2.TestRequest:
+    return test_pb2.TestRequest(message='transformed {}'.format(request.message))
+
+
+class TestMultiprocessServer(BaseUnitTestCase):
+    def test_one_to_one(self):
+        pipeline = PipelineSpec().grpc_pipe(
+            operator(operators.map, _transformation), method_name='/rxgrpc.test.TestService/GetOneToOne')
+        server = create_multiprocess_server(
+            test_pb2, 2, '[::]:50051',
+            servicers=[(test_pb2_grpc.add_TestServiceServicer_to_server, _servicer)],
+            pipeline=pipeline, processes=2)
+        server.start()
+        try:
+            client = self.create_client()
+            for i in range(4):
+                response = client.GetOneToOne(test_pb2.TestRequest(message='message{}'.format(i)))
+                self.assertEqual('response: transformed message{}'.format(i), response.message)
+        finally:
+            self.assertTrue(server.stop(1).wait(10))
+        self.assertTrue(all(p.exitcode == 0 for p in server.processes))
+
+    def test_start_timeout_stops_every_process(self):
+        server = create_multiprocess_server(
+            test_pb2, 2, '[::]:50051',
+            servicers=[(test_pb2_grpc.add_TestServiceServicer_to_server, _slow_servicer)], processes=2)
+        with self.assertRaises(RuntimeError):
+            server.start(timeout=1)
+        server.join(10)
+        self.assertFalse([p for p in server.processes if p.is_alive()])
@@ -0,0 +1,102 @@
+import unittest
+from concurrent import futures
+
+import grpc
+import rx
+
+from rxgrpc import operators
+from rxgrpc.raw import peek_field
+from rxgrpc.thread_pool import RawRequest, _GRPCInvocation, _InvocationState
+from test.proto import test_pb2, test_pb2_grpc
+from test.rxgrpc_tests import CallDetails, RpcEvent, serialized_response_in_pool
+
+
+class _Echo(test_pb2_grpc.TestServiceServicer):
+    def GetOneToOne(self, request, context):
+        return test_pb2.TestResponse(message='upstream: {}'.format(request.message))
+
+
+class TestRaw(unittest.TestCase):
+    def test_peek_field(self):
+        # field 2 varint 300, field 3 fixed32 7, field 4 fixed64 9, field 1 'key', field 5 'other'
+        data = b'\x10\xac\x02' + b'\x1d\x07\x00\x00\x00' + b'\x21' + (9).to_bytes(8, 'little') + \
+            b'\x0a\x03key' + b'\x2a\x05other'
+        self.assertEqual(b'key', bytes(peek_field(data, 1)))
+        self.assertEqual(300, peek_field(data, 2))
+        self.assertEqual(7, peek_field(data, 3))
+        self.assertEqual(9, peek_field(data, 4))
+        self.assertIsNone(peek_field(data, 6))
+        self.assertEqual('m', bytes(peek_field(test_pb2.TestRequest(message='m').SerializeToString(), 1)).decode())
+
+    def test_respond_raw(self):
+        decoded = []
+
+        def _deserialize(data: bytes) -> test_pb2.TestRequest:
+            decoded.append(data)
+            return test_pb2.TestRequest.FromString(data)
+
+        def _behaviour(request, context):
+            return test_pb2.TestResponse(message='servicer: {}'.format(request.message))
+
+        def _handler(data: memoryview, context):
+            if bytes(peek_field(data, 1)) == b'raw':
+                return test_pb2.TestResponse(message='raw').SerializeToString()
+            return None
+
+        results = []
+        for message in ('raw', 'servicer'):
+            data = test_pb2.TestRequest(message=message).SerializeToString()
+            g = _GRPCInvocation(
+                serialized_response_in_pool, None, None, _behaviour, lambda d=data: RawRequest(d, _deserialize),
+                (None, test_pb2.TestResponse.SerializeToString), {}, invocation_state=_InvocationState())
+            operators.respond_raw(_handler)(rx.of(g)).subscribe(lambda raw: raw.run())
+            results.append(test_pb2.TestResponse.FromString(g.result).message)
+        self.assertEqual(['raw', 'servicer: servicer'], results)
+        self.assertEqual(1, len(decoded))
+
+        g = _GRPCInvocation(
+            serialized_response_in_pool, None, None, _behaviour, lambda: RawRequest(b'\x0a\x05other', _deserialize),
+            (None, test_pb2.TestResponse.SerializeToString), {}, invocation_state=_InvocationState())
+        rx.of(g).pipe(
+            operators.respond_raw(lambda data, context: b'\x0a\x05first'),
+            operators.respond_raw(_handler)
+        ).subscribe(lambda raw: raw.run())
+        self.assertEqual('first', test_pb2.TestResponse.FromString(g.result).message)
+        self.assertEqual(1, len(decoded))
+
+    def test_respond_raw_without_request(self):
+        g = _GRPCInvocation(
+            serialized_response_in_pool, None, None, None, lambda: None,
+            (None, test_pb2.TestResponse.SerializeToString), {}, invocation_state=_InvocationState())
+        raw = []
+        operators.respond_raw(lambda data, context: bytes(data))(rx.of(g)).subscribe(raw.append)
+        self.assertIsNone(raw[0].input_message())
+
+    def test_forward(self):
+        upstream = grpc.server(futures.ThreadPoolExecutor(2))
+        test_pb2_grpc.add_TestServiceServicer_to_server(_Echo(), upstream)
+        port = upstream.add_insecure_port('localhost:0')
+        upstream.start()
+        channel = grpc.insecure_channel('localhost:{}'.format(port))
+        try:
+            data = test_pb2.TestRequest(message='m').SerializeToString()
+            rpc_event = RpcEvent(CallDetails(b'/rxgrpc.test.TestService/GetOneToOne', None), (('x-caller', 'a'), ))
+            g = _GRPCInvocation(
+                serialized_response_in_pool, rpc_event, None, None, lambda: RawRequest(data, None),
+                (None, test_pb2.TestResponse.SerializeToString), {}, invocation_state=_InvocationState())
+            operators.forward(channel, timeout=5)(rx.of(g)).subscribe(lambda forwarded: forwarded.run())
+            self.assertEqual('upstream: m', test_pb2.TestResponse.FromString(g.result).message)
+
+            missing = _GRPCInvocation(
+                serialized_response_in_pool, RpcEvent(CallDetails(b'/rxgrpc.test.TestService/Missing', None), ()), None,
+                None, lambda: RawRequest(data, None), (None, test_pb2.TestResponse.SerializeToString), {},
+                invocation_state=_InvocationState())
+            forwarded = []
+            operators.forward(channel, timeout=5)(rx.of(missing)).subscribe(forwarded.append)
+            with self.assertRaises(grpc.RpcError) as e:
+                forwarded[0].run()
+            self.assertEqual(grpc.StatusCode.UNIMPLEMENTED, e.exception.code())
+        finally:
+            channel.close()
+            upstream.stop(None)
+
@@ -0,0 +1,24 @@
+import unittest
+
+from rxgrpc.scheduling import Scheduling, metadata_priority
+from test.rxgrpc_tests import CallDetails, RpcEvent
+
+
+class TestScheduling(unittest.TestCase):
+    def test_metadata_priority(self):
+        priority = metadata_priority('x-priority', default=5)
+        self.assertEqual(1, priority((('other', 'a'), ('x-priority', '1'))))
+        self.assertEqual(5, priority((('x-priority', 'high'), )))
+        self.assertEqual(5, priority(()))
+
+    def test_priority_then_deadline(self):
+        scheduling = Scheduling(priority_fn=metadata_priority('x-priority'))
+        events = [
+            RpcEvent(CallDetails('/m', 30.0), (('x-priority', '1'), )),
+            RpcEvent(CallDetails('/m', float('inf')), (('x-priority', '0'), )),
+            RpcEvent(CallDetails('/m', 20.0), (('x-priority', '1'), )),
+            RpcEvent(CallDetails('/m', 10.0), (('x-priority', '0'), )),
+        ]
+        keys = [scheduling.priority(e, scheduling.deadline(e)) for e in events]
+        self.assertEqual([3, 1, 2, 0], sorted(range(4), key=keys.__getitem__))
+        self.assertIsNone(scheduling.deadline(events[1]))
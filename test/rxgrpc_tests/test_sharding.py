@@ -0,0 +1,125 @@
+import collections
+import random
+import threading
+import time
+import unittest
+from concurrent import futures
+
+import grpc
+import rx
+from rx import operators as rx_operators
+
+from rxgrpc import operators, server
+from rxgrpc.scheduling import Scheduling, metadata_priority
+from rxgrpc.sharding import jump_hash
+from test.proto import test_pb2, test_pb2_grpc
+
+
+class _Invocation:
+    def __init__(self, key: str, n: int, workers: futures.Executor):
+        self.key = key
+        self.n = n
+        self.workers = workers
+
+    def defer(self, fn):
+        self.workers.submit(fn, self)
+
+
+class _Servicer(test_pb2_grpc.TestServiceServicer):
+    def GetOneToOne(self, request, context):
+        time.sleep(0.01)
+        return test_pb2.TestResponse(message=request.message)
+
+
+class TestSharding(unittest.TestCase):
+    def test_jump_hash_is_consistent(self):
+        before = [jump_hash(k, 10) for k in range(1000)]
+        after = [jump_hash(k, 11) for k in range(1000)]
+        moved = [a for b, a in zip(before, after) if a != b]
+        self.assertTrue(all(lane == 10 for lane in moved))
+        self.assertLess(len(moved), 200)
+        self.assertEqual(set(range(10)), set(before))
+
+    def test_keys_stay_in_order_on_the_workers(self):
+        key_threads = set()
+        active = collections.Counter()
+        overlapped = []
+        seen = collections.defaultdict(list)
+        done = threading.Event()
+        received = []
+
+        def _key(g: _Invocation) -> str:
+            key_threads.add(threading.current_thread().name)
+            # Keys take longer to compute than the invocations take to arrive, so they are done out of order.
+            time.sleep(random.random() / 1000)
+            return g.key
+
+        def _record(g: _Invocation):
+            active[g.key] += 1
+            if active[g.key] > 1:
+                overlapped.append(g.key)
+            seen[g.key].append(g.n)
+            active[g.key] -= 1
+
+        def _on_next(g):
+            received.append(g)
+            if len(received) == 200:
+                done.set()
+
+        workers = futures.ThreadPoolExecutor(8, thread_name_prefix='worker')
+        try:
+            shard = operators.shard_by(_key, rx_operators.do_action(_record), lanes=4)
+            invocations = [_Invocation('key{}'.format(i % 10), i, workers) for i in range(200)]
+            rx.concat(rx.from_iterable(invocations), rx.never()).pipe(shard).subscribe(_on_next)
+            self.assertTrue(done.wait(5))
+        finally:
+            workers.shutdown()
+        self.assertTrue(all(name.startswith('worker') for name in key_threads))
+        self.assertFalse(overlapped)
+        for key, ns in seen.items():
+            self.assertEqual(sorted(ns), ns)
+        self.assertEqual([0] * 4, shard.depths())
+        self.assertEqual(200, sum(shard.processed()))
+
+    def test_lane_recovers_after_an_error(self):
+        source = []
+        received = []
+
+        def _on_next(g: _Invocation):
+            received.append(g.n)
+            if g.n == 0:
+                raise RuntimeError('on_next failed')
+
+        workers = futures.ThreadPoolExecutor(1)
+        try:
+            rx.create(lambda observer, scheduler=None: source.append(observer)).pipe(
+                operators.shard_by(lambda g: g.key, lanes=1)).subscribe(_on_next)
+            for n in range(2):
+                workers.submit(source[0].on_next, _Invocation('key', n, workers)).result()
+                workers.submit(lambda: None).result()
+        finally:
+            workers.shutdown()
+        self.assertEqual([0, 1], received)
+
+    def test_shard_on_a_scheduled_server(self):
+        s = server.create_server(test_pb2, 1, scheduling=Scheduling(priority_fn=metadata_priority('x-priority')))
+        test_pb2_grpc.add_TestServiceServicer_to_server(_Servicer(), s)
+        s.add_insecure_port('[::]:50051')
+        s.grpc_pipe(
+            operators.shard_by(lambda g: g.input_message().message, lanes=2),
+            method_name='/rxgrpc.test.TestService/GetOneToOne')
+        s.start()
+        channel = grpc.insecure_channel('localhost:50051')
+        try:
+            stub = test_pb2_grpc.TestServiceStub(channel)
+            # The single worker is busy, so the deferred key computations queue up next to the invocations.
+            calls = [
+                stub.GetOneToOne.future(
+                    test_pb2.TestRequest(message='m{}'.format(i % 3)), timeout=5,
+                    metadata=(('x-priority', str(i % 2)), ))
+                for i in range(20)
+            ]
+            self.assertEqual(['m{}'.format(i % 3) for i in range(20)], [c.result().message for c in calls])
+        finally:
+            channel.close()
+            s.stop(None)
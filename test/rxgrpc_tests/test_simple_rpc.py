@@ -1,4 +1,7 @@
-from test.proto import test_pb2
+import grpc
+
+from rxgrpc import operators, server
+from test.proto import test_pb2, test_pb2_grpc
 from test.proto.test_pb2_grpc import TestServiceServicer
 from test.rxgrpc_tests import BaseUnitTestCase
 
@@ -36,6 +39,38 @@ class TestSimpleRPC(BaseUnitTestCase):
         finally:
             server.stop(None)
 
+    def test_stop_shuts_the_workers_down(self):
+        server = self.create_server(self._Servicer(), workers=2)
+        server.start()
+        try:
+            self.create_client().GetOneToOne(test_pb2.TestRequest(message='message0'))
+        finally:
+            self.assertTrue(server.stop(None).wait(5))
+        workers = server._grpc_observable_delegate.worker_pool._threads
+        self.assertTrue(workers)
+        self.assertFalse([t for t in workers if t.is_alive()])
+
+    def test_malformed_request(self):
+        s = server.create_server(test_pb2, 2)
+        test_pb2_grpc.add_TestServiceServicer_to_server(self._Servicer(), s)
+        s.add_insecure_port('[::]:50051')
+        s.grpc_pipe(operators.coalesce(), method_name='/rxgrpc.test.TestService/GetOneToOne')
+        s.start()
+        channel = grpc.insecure_channel('localhost:50051')
+        try:
+            call = channel.unary_unary(
+                '/rxgrpc.test.TestService/GetOneToOne', response_deserializer=test_pb2.TestResponse.FromString)
+            # A second identical call would wait forever behind a leader that never completed.
+            for _ in range(2):
+                with self.assertRaises(grpc.RpcError) as e:
+                    call(b'\x0a\xff', timeout=5)
+                self.assertEqual(grpc.StatusCode.INTERNAL, e.exception.code())
+            self.assertEqual(
+                'response: message0', call(test_pb2.TestRequest(message='message0').SerializeToString()).message)
+        finally:
+            channel.close()
+            s.stop(None)
+
     def test_one_to_stream(self):
         server = self.create_server(self._Servicer())
         server.start()
@@ -0,0 +1,37 @@
+import logging
+import unittest
+
+from rxgrpc import tracing
+
+
+class TestTracing(unittest.TestCase):
+    def setUp(self):
+        self.logger = logging.getLogger('rxgrpc.test.tracing')
+        self.logger.setLevel(logging.INFO)
+        self.tracer = tracing.get_tracer(self.logger)
+
+    def tearDown(self):
+        tracing.stop_recording()
+
+    def test_disabled_by_default(self):
+        self.assertFalse(self.tracer.enabled)
+
+    def test_refresh_follows_log_level(self):
+        self.logger.setLevel(logging.DEBUG)
+        self.assertFalse(self.tracer.enabled)
+        tracing.refresh()
+        self.assertTrue(self.tracer.enabled)
+        self.logger.setLevel(logging.INFO)
+        tracing.refresh()
+        self.assertFalse(self.tracer.enabled)
+
+    def test_structured_recording(self):
+        key = object()
+        tracing.start_recording(max_events=2)
+        self.assertTrue(self.tracer.enabled)
+        for event in ('submit', 'run', 'run complete'):
+            self.tracer.trace(event, key)
+        events = [e for e in tracing.stop_recording() if e.invocation_id == id(key)]
+        self.assertEqual(['run', 'run complete'], [e.event for e in events])
+        self.assertLessEqual(events[0].timestamp, events[1].timestamp)
+        self.assertFalse(self.tracer.enabled)
@@ -1,3 +1,5 @@
+import grpc
+
 from rxgrpc import operators
 
 from test.proto import test_pb2
@@ -70,3 +72,178 @@ class TestTransformation(BaseUnitTestCase):
                 response.message)
         finally:
             server.stop(None)
+
+    def test_message_transformation_parallel(self):
+        def _transform_message(m: test_pb2.TestRequest) -> test_pb2.TestRequest:
+            return test_pb2.TestRequest(message='TRANSFORMED {}'.format(m.message))
+
+        server = self.create_server(self._Servicer(), workers=4)
+        server.grpc_pipe(
+            operators.map(_transform_message),
+            method_name='/rxgrpc.test.TestService/GetOneToOne',
+            parallelism=4,
+            ordered=False
+        )
+        server.start()
+        try:
+            client = self.create_client()
+            futures = [
+                client.GetOneToOne.future(test_pb2.TestRequest(message='message{}'.format(i)))
+                for i in range(8)
+            ]
+            for i, future in enumerate(futures):
+                self.assertEqual('response: TRANSFORMED message{}'.format(i), future.result().message)
+        finally:
+            server.stop(None)
+
+    def test_chained_transformations_compose(self):
+        def _transform_message(m: test_pb2.TestRequest) -> test_pb2.TestRequest:
+            return test_pb2.TestRequest(message='TRANSFORMED {}'.format(m.message))
+
+        def _filter_message(m: test_pb2.TestRequest) -> bool:
+            return bool(int(m.message[-1]) % 2)
+
+        server = self.create_server(self._Servicer())
+        server.grpc_pipe(
+            operators.filter(_filter_message),
+            operators.map(_transform_message),
+            operators.map(_transform_message),
+            method_name='/rxgrpc.test.TestService/GetStreamToOne'
+        )
+        server.start()
+        try:
+            client = self.create_client()
+            response = client.GetStreamToOne(
+                (test_pb2.TestRequest(message='message{}'.format(i)) for i in range(4))
+            )
+            self.assertEqual(
+                'response: TRANSFORMED TRANSFORMED message1, TRANSFORMED TRANSFORMED message3',
+                response.message)
+        finally:
+            server.stop(None)
+
+    def test_buffered_stream(self):
+        def _join_messages(batch) -> test_pb2.TestRequest:
+            return test_pb2.TestRequest(message='+'.join(m.message for m in batch))
+
+        server = self.create_server(self._Servicer())
+        server.grpc_pipe(
+            operators.buffer_with_count(2),
+            operators.map(_join_messages),
+            method_name='/rxgrpc.test.TestService/GetStreamToOne'
+        )
+        server.start()
+        try:
+            client = self.create_client()
+            response = client.GetStreamToOne(
+                (test_pb2.TestRequest(message='message{}'.format(i)) for i in range(5))
+            )
+            self.assertEqual('response: message0+message1, message2+message3, message4', response.message)
+        finally:
+            server.stop(None)
+
+    def test_batch(self):
+        batch_sizes = []
+
+        def _handler(requests):
+            batch_sizes.append(len(requests))
+            return [test_pb2.TestResponse(message='batched: {}'.format(r.message)) for r in requests]
+
+        server = self.create_server(self._Servicer(), workers=4)
+        server.grpc_pipe(
+            operators.batch(_handler, max_size=2, max_latency_ms=50),
+            method_name='/rxgrpc.test.TestService/GetOneToOne'
+        )
+        server.start()
+        try:
+            client = self.create_client()
+            futures = [
+                client.GetOneToOne.future(test_pb2.TestRequest(message='message{}'.format(i)))
+                for i in range(5)
+            ]
+            for i, future in enumerate(futures):
+                self.assertEqual('batched: message{}'.format(i), future.result().message)
+            self.assertEqual(5, sum(batch_sizes))
+            self.assertTrue(all(size <= 2 for size in batch_sizes))
+        finally:
+            server.stop(None)
+
+    def test_batch_larger_than_the_pool(self):
+        batch_sizes = []
+
+        def _handler(requests):
+            batch_sizes.append(len(requests))
+            return [test_pb2.TestResponse(message='batched: {}'.format(r.message)) for r in requests]
+
+        server = self.create_server(self._Servicer(), workers=2)
+        server.grpc_pipe(
+            operators.batch(_handler, max_size=6, max_latency_ms=60000),
+            method_name='/rxgrpc.test.TestService/GetOneToOne'
+        )
+        server.start()
+        try:
+            client = self.create_client()
+            # Waiting calls hold no worker, so the batch fills up long before max_latency_ms.
+            futures = [
+                client.GetOneToOne.future(test_pb2.TestRequest(message='message{}'.format(i)), timeout=5)
+                for i in range(6)
+            ]
+            for i, future in enumerate(futures):
+                self.assertEqual('batched: message{}'.format(i), future.result().message)
+            self.assertEqual([6], batch_sizes)
+        finally:
+            server.stop(None)
+
+    def test_response_operators_stream(self):
+        def _join_responses(batch) -> test_pb2.TestResponse:
+            return test_pb2.TestResponse(message='+'.join(r.message for r in batch))
+
+        server = self.create_server(self._Servicer())
+        server.grpc_pipe(
+            operators.filter_response(lambda r: not r.message.startswith('response 1')),
+            operators.buffer_response_with_count(2, _join_responses),
+            operators.map_response(lambda r: test_pb2.TestResponse(message=r.message.upper())),
+            method_name='/rxgrpc.test.TestService/GetOneToStream'
+        )
+        server.start()
+        try:
+            client = self.create_client()
+            responses = list(client.GetOneToStream(test_pb2.TestRequest(message='m')))
+            self.assertEqual(['RESPONSE 0: M+RESPONSE 2: M'], [r.message for r in responses])
+        finally:
+            server.stop(None)
+
+    def test_response_filtered_out(self):
+        server = self.create_server(self._Servicer())
+        server.grpc_pipe(
+            operators.filter_response(lambda r: r.message.endswith('allowed')),
+            method_name='/rxgrpc.test.TestService/GetOneToOne'
+        )
+        server.start()
+        try:
+            client = self.create_client()
+            self.assertEqual(
+                'response: allowed', client.GetOneToOne(test_pb2.TestRequest(message='allowed')).message)
+            with self.assertRaises(grpc.RpcError) as e:
+                client.GetOneToOne(test_pb2.TestRequest(message='denied'))
+            self.assertEqual(grpc.StatusCode.NOT_FOUND, e.exception.code())
+        finally:
+            server.stop(None)
+
+    def test_request_filtered_out(self):
+        server = self.create_server(self._Servicer())
+        server.grpc_pipe(
+            operators.filter(lambda m: m.message == 'allowed'),
+            method_name='/rxgrpc.test.TestService/GetOneToOne'
+        )
+        server.start()
+        try:
+            client = self.create_client()
+            self.assertEqual(
+                'response: allowed', client.GetOneToOne(test_pb2.TestRequest(message='allowed')).message)
+            with self.assertRaises(grpc.RpcError) as e:
+                client.GetOneToOne(test_pb2.TestRequest(message='denied'), timeout=5)
+            self.assertEqual(grpc.StatusCode.NOT_FOUND, e.exception.code())
+            self.assertEqual('Request filtered out', e.exception.details())
+        finally:
+            server.stop(None)
@@ -0,0 +1,53 @@
+import asyncio
+import unittest
+
+from rxgrpc import windowing
+from test.rxgrpc_tests import Clock
+
+
+def _timed(clock: Clock, elements):
+    for t, value in elements:
+        clock.now = t
+        yield value
+
+
+async def _aiter(elements):
+    for element in elements:
+        yield element
+
+
+class TestWindowing(unittest.TestCase):
+    def test_tumbling_count(self):
+        self.assertEqual([3, 7, 5], list(windowing.sliding(iter([1, 2, 3, 4, 5]), windowing.sum_of(), count=2)))
+
+    def test_sliding_count(self):
+        stats = windowing.combine(n=windowing.count(), low=windowing.min_of(), high=windowing.max_of())
+        self.assertEqual(
+            [{'n': 4, 'low': 1, 'high': 4}, {'n': 4, 'low': 3, 'high': 6}, {'n': 3, 'low': 5, 'high': 7}],
+            list(windowing.sliding(iter(range(1, 8)), stats, count=4, every=2)))
+        self.assertEqual([1.5], list(windowing.sliding(iter([1, 2]), windowing.mean_of(), count=4, every=2)))
+
+    def test_sliding_duration(self):
+        clock = Clock()
+        elements = [(0.0, 1), (0.5, 2), (1.2, 3), (2.5, 4), (9.0, 5)]
+        self.assertEqual(
+            [6, 7, 4, 5],
+            list(windowing.sliding(_timed(clock, elements), windowing.sum_of(), duration=2, every=1, clock=clock)))
+
+    def test_session(self):
+        clock = Clock()
+        elements = [(0.0, 'a'), (0.5, 'b'), (3.0, 'c'), (3.1, 'd'), (3.2, 'e')]
+        self.assertEqual(
+            [2, 3], list(windowing.session(_timed(clock, elements), windowing.count(), gap=1, clock=clock)))
+
+    def test_async(self):
+        async def _collect():
+            return [s async for s in windowing.async_sliding(_aiter(range(5)), windowing.last(), count=2)]
+
+        self.assertEqual([1, 3, 4], asyncio.new_event_loop().run_until_complete(_collect()))
+
+    def test_invalid_sizes(self):
+        with self.assertRaises(ValueError):
+            windowing.sliding(iter([]), windowing.count(), count=4, every=3)
+        with self.assertRaises(ValueError):
+            windowing.sliding(iter([]), windowing.count(), count=4, duration=1)
@@ -0,0 +1,94 @@
+import threading
+import time
+import unittest
+
+from rxgrpc.worker_pool import WorkerPool
+
+
+class TestWorkerPool(unittest.TestCase):
+    def test_max_workers_is_shared_across_methods(self):
+        pool = WorkerPool(2)
+        lock = threading.Lock()
+        running = [0]
+        peak = [0]
+        done = threading.Semaphore(0)
+
+        def _task():
+            with lock:
+                running[0] += 1
+                peak[0] = max(peak[0], running[0])
+            time.sleep(0.01)
+            with lock:
+                running[0] -= 1
+            done.release()
+
+        for i in range(20):
+            pool.submit('/rxgrpc.test.TestService/Method{}'.format(i % 4), _task)
+        for _ in range(20):
+            self.assertTrue(done.acquire(timeout=5))
+        pool.shutdown()
+        self.assertEqual(2, peak[0])
+
+    def test_method_quota(self):
+        pool = WorkerPool(4, method_quotas={'/quota': 1})
+        lock = threading.Lock()
+        running = [0]
+        peak = [0]
+        done = threading.Semaphore(0)
+
+        def _task():
+            with lock:
+                running[0] += 1
+                peak[0] = max(peak[0], running[0])
+            time.sleep(0.01)
+            with lock:
+                running[0] -= 1
+            done.release()
+
+        for _ in range(8):
+            pool.submit('/quota', _task)
+        for _ in range(8):
+            self.assertTrue(done.acquire(timeout=5))
+        pool.shutdown()
+        self.assertEqual(1, peak[0])
+
+    def test_weighted_fair_scheduling(self):
+        pool = WorkerPool(1, method_weights={'/heavy': 3})
+        gate = threading.Event()
+        order = []
+        pool.submit('/gate', gate.wait)
+        for _ in range(6):
+            pool.submit('/heavy', order.append, 'heavy')
+            pool.submit('/light', order.append, 'light')
+        gate.set()
+        pool.shutdown()
+        self.assertEqual(3, order[:4].count('heavy'))
+        self.assertEqual(12, len(order))
+
+    def test_prioritized(self):
+        pool = WorkerPool(1, prioritized=True)
+        gate = threading.Event()
+        order = []
+        pool.submit('/gate', gate.wait)
+        for priority in (3, 1, 2, 1):
+            pool.submit('/method', order.append, priority, priority=(priority, len(order)))
+        gate.set()
+        pool.shutdown()
+        self.assertEqual([1, 1, 2, 3], order)
+
+    def test_expired_tasks_are_shed(self):
+        pool = WorkerPool(1)
+        gate = threading.Event()
+        ran = []
+        expired = []
+        pool.submit('/gate', gate.wait)
+        pool.submit('/method', ran.append, 'late', deadline=time.time() + 0.01, on_expired=expired.append)
+        pool.submit('/method', ran.append, 'on time', deadline=time.time() + 60, on_expired=expired.append)
+        pool.submit('/method', ran.append, 'no deadline')
+        time.sleep(0.05)
+        gate.set()
+        pool.shutdown()
+        self.assertEqual(['on time', 'no deadline'], ran)
+        self.assertEqual(['late'], expired)
+        self.assertEqual(1, pool.expired('/method'))
+        self.assertEqual(1, pool.expired())